@@ -0,0 +1,89 @@
+"""
+Per-product cost of `_extract_from_html` with the site's extraction plan compiled once, against
+resolving the selectors and regexes again for every product as the extractor used to.
+Pages are parsed once up front, only the extraction is timed.
+
+	python -m benchmarks.extraction_plan --sites panacota cailonuong --repeat 20
+	python -m benchmarks.extraction_plan --sites breadtalk --html-dir path/to/saved/pages
+"""
+import argparse
+import glob
+import os
+import time
+import tracemalloc
+from typing import List, Tuple
+from urllib.parse import urlparse
+
+from scripts.extract import extraction_plan
+from scripts.extract.html_parser import parse_html
+from scripts.extract.http_client import get_response_cache
+from scripts.extract.products_scraping import ProductExtractor, ProductInfo, config
+from utils import helpers
+
+def _load_pages(website_name: str, html_dir: str, limit: int) -> List[Tuple[str, bytes]]:
+	if html_dir:
+		paths = sorted(glob.glob(os.path.join(html_dir, "*.html")))[:limit]
+		website_path = config["websites"][website_name]["path"]["website_path"].rstrip("/")
+		return [(f"{website_path}/products/{os.path.basename(path)}", open(path, "rb").read()) for path in paths]
+
+	cache = get_response_cache()
+	if cache is None:
+		return []
+	website_path = urlparse(config["websites"][website_name]["path"]["website_path"])
+	prefix = f"{website_path.scheme}://{website_path.netloc}"
+	return [(cached.url, cached.body) for cached in cache.iter_responses(prefix)][:limit]
+
+def _time_extraction(extractor: ProductExtractor, trees, repeat: int, compile_each: bool) -> float:
+	scraping_config = extractor.scraping_config
+	start = time.perf_counter()
+	for _ in range(repeat):
+		for url, bs in trees:
+			if compile_each:
+				extraction_plan._plans[extractor.website_name] = extraction_plan.ExtractionPlan.compile(scraping_config)
+			extractor._extract_from_html(bs, url)
+	return (time.perf_counter() - start) / (repeat * len(trees))
+
+def _product_size() -> float:
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	products = [ProductInfo(f"product {i}", f"https://example.com/{i}", "brand") for i in range(10000)]
+	size = (tracemalloc.get_traced_memory()[0] - before) / len(products)
+	tracemalloc.stop()
+	return size
+
+def main():
+	helpers.setup_logger("benchmarks.log")
+	parser = argparse.ArgumentParser(description="Per-product extraction cost with and without compiled plans")
+	parser.add_argument("--sites", nargs="*", help="Websites to benchmark (default: all with detail selectors)")
+	parser.add_argument("--html-dir", help="Read *.html detail pages from this directory instead of the response cache")
+	parser.add_argument("--limit", type=int, default=50, help="Maximum pages per site")
+	parser.add_argument("--repeat", type=int, default=10, help="Extract every page this many times")
+	args = parser.parse_args()
+
+	print(f"{'site':<16}{'pages':>6}{'per product':>14}{'compiled':>11}{'speedup':>9}")
+	for website_name in args.sites or list(config["websites"]):
+		scraping_config = config["websites"][website_name].get("scraping", {})
+		if not isinstance(scraping_config.get("product_detail_selectors"), dict):
+			continue
+
+		pages = _load_pages(website_name, args.html_dir, args.limit)
+		if not pages:
+			print(f"{website_name:<16}no pages, run a crawl first or pass --html-dir")
+			continue
+
+		extractor = ProductExtractor(config["websites"], website_name, config["websites"][website_name]["path"]["website_path"])
+		trees = [(url, parse_html(body, extractor.parser_backend)) for url, body in pages]
+
+		before = _time_extraction(extractor, trees, args.repeat, compile_each=True)
+		extraction_plan._plans.pop(website_name, None)
+		after = _time_extraction(extractor, trees, args.repeat, compile_each=False)
+		print(
+			f"{website_name:<16}{len(trees):>6}{before * 1e6:>12.0f}us{after * 1e6:>9.0f}us"
+			f"{before / after if after else 0.0:>8.1f}x"
+		)
+
+	print(f"ProductInfo: {_product_size():.0f} bytes per record")
+	return 0
+
+if __name__ == "__main__":
+	exit(main())
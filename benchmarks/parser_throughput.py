@@ -0,0 +1,112 @@
+"""
+Parse-throughput comparison of the HTML parser backends on pages kept in the response cache.
+
+A backend is reported as safe for a site when `_extract_from_html` and `_extract_from_meta`
+return exactly what they return with html5lib on every sampled page. The "partial" row is the
+`parse_mode: targeted` tree built from the site's compiled selectors.
+
+	python -m benchmarks.parser_throughput --limit 50 --repeat 3
+"""
+import argparse
+import dataclasses
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+from scripts.extract.html_parser import DEFAULT_PARSER, PARSER_BACKENDS, PARTIAL_PARSER, parse_html
+from scripts.extract.http_client import get_response_cache
+from scripts.extract.products_scraping import ProductExtractor, config
+from utils import helpers
+
+def _extract(extractor: ProductExtractor, markup: bytes, url: str, backend: str, parse_only=None):
+	bs = parse_html(markup, backend, parse_only=parse_only)
+
+	results = []
+	for extract in (
+		lambda: extractor._extract_from_html(bs, url),
+		lambda: extractor._extract_from_meta(bs, url)
+	):
+		try:
+			product = extract()
+			results.append(dataclasses.asdict(product) if product else None)
+		except Exception as e:
+			results.append(type(e).__name__)
+
+	return results
+
+def benchmark_site(website_name: str, pages: List[Tuple[str, bytes]], backends: List[str], repeat: int) -> List[Dict]:
+	website_path = config["websites"][website_name]["path"]["website_path"]
+	extractor = ProductExtractor(config["websites"], website_name, website_path)
+
+	baseline = {url: _extract(extractor, body, url, DEFAULT_PARSER) for url, body in pages}
+	largest_page = max((body for _, body in pages), key=len)
+
+	runs = [(backend, backend, None) for backend in backends]
+	if extractor.plan.detail_strainer is not None:
+		runs.append(("partial", PARTIAL_PARSER, extractor.plan.detail_strainer))
+
+	rows = []
+	for label, backend, parse_only in runs:
+		start = time.perf_counter()
+		for _ in range(repeat):
+			for _, body in pages:
+				parse_html(body, backend, parse_only=parse_only)
+		elapsed = time.perf_counter() - start
+
+		tracemalloc.start()
+		parse_html(largest_page, backend, parse_only=parse_only)
+		peak = tracemalloc.get_traced_memory()[1]
+		tracemalloc.stop()
+
+		mismatches = [url for url, body in pages if _extract(extractor, body, url, backend, parse_only) != baseline[url]]
+		rows.append({
+			"site": website_name,
+			"backend": label,
+			"pages": len(pages),
+			"pages_per_second": round(len(pages) * repeat / elapsed, 1) if elapsed else 0.0,
+			"peak_kb": round(peak / 1024),
+			"mismatches": len(mismatches),
+			"safe": not mismatches,
+			"sample_mismatch": mismatches[0] if mismatches else ""
+		})
+
+	return rows
+
+def main():
+	helpers.setup_logger("benchmarks.log")
+	parser = argparse.ArgumentParser(description="Compare HTML parser backends on cached pages")
+	parser.add_argument("--sites", nargs="*", help="Websites to benchmark (default: all configured)")
+	parser.add_argument("--backends", nargs="*", default=list(PARSER_BACKENDS), help="Parser backends to compare")
+	parser.add_argument("--limit", type=int, default=50, help="Maximum cached pages per site")
+	parser.add_argument("--repeat", type=int, default=3, help="Parse every page this many times per backend")
+	args = parser.parse_args()
+
+	cache = get_response_cache()
+	if cache is None:
+		print("The response cache is disabled (http.cache.enabled), nothing to benchmark")
+		return 1
+
+	print(f"{'site':<16}{'backend':<13}{'pages':>6}{'pages/s':>10}{'speedup':>9}{'peak KB':>9}{'mismatch':>10}  safe")
+	for website_name in args.sites or list(config["websites"]):
+		website_path = urlparse(config["websites"][website_name]["path"]["website_path"])
+		prefix = f"{website_path.scheme}://{website_path.netloc}"
+
+		pages = [(cached.url, cached.body) for cached in cache.iter_responses(prefix)][:args.limit]
+		if not pages:
+			print(f"{website_name:<16}no cached pages, run a crawl first")
+			continue
+
+		rows = benchmark_site(website_name, pages, args.backends, args.repeat)
+		baseline_speed = next((r["pages_per_second"] for r in rows if r["backend"] == DEFAULT_PARSER), 0.0)
+		for row in rows:
+			speedup = row["pages_per_second"] / baseline_speed if baseline_speed else 0.0
+			print(
+				f"{row['site']:<16}{row['backend']:<13}{row['pages']:>6}{row['pages_per_second']:>10}"
+				f"{speedup:>8.1f}x{row['peak_kb']:>9}{row['mismatches']:>10}  {'yes' if row['safe'] else 'no'}"
+			)
+
+	return 0
+
+if __name__ == "__main__":
+	exit(main())
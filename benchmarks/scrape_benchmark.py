@@ -0,0 +1,281 @@
+"""
+Offline scrape benchmark: every site under benchmarks/fixtures/ is served from a local HTTP
+server and crawled with `scrape_website` and `ProductExtractor` exactly like the live sites.
+
+	python -m benchmarks.scrape_benchmark
+	python -m benchmarks.scrape_benchmark --latency-ms 80 --error-rate 0.05 --parsers html5lib lxml
+	python -m benchmarks.scrape_benchmark --record breadtalk   # save the cached pages of a real crawl
+
+A fixture directory holds the saved pages and `pages.json`: the site origin, the menu path, the
+category paths and a path -> file map. Links to the origin are rewritten to the local server.
+
+Every run is saved to benchmarks/results/ and compared with the latest run that used the same
+server settings, pages/s drops above --threshold are reported as regressions. "parse s" is the
+time spent inside the parser summed over the detail threads, "wait s" is wall time not spent on CPU.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import glob
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import resource
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from utils import helpers
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIRECTORY = os.path.join(BENCHMARK_DIR, "fixtures")
+RESULTS_DIRECTORY = os.path.join(BENCHMARK_DIR, "results")
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+
+def load_fixture(site: str) -> Dict:
+	directory = os.path.join(FIXTURES_DIRECTORY, site)
+	with open(os.path.join(directory, "pages.json"), encoding="utf-8") as f:
+		fixture = json.load(f)
+	fixture["directory"] = directory
+	return fixture
+
+def _make_handler(fixture: Dict, latency: float, jitter: float, error_rate: float, seed: int):
+	origin = fixture["origin"].encode()
+	rng = random.Random(seed)
+	rng_lock = threading.Lock()
+
+	class FixtureHandler(BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"
+
+		def log_message(self, *args):
+			pass
+
+		def do_GET(self):
+			with rng_lock:
+				delay = max(latency + rng.uniform(-jitter, jitter), 0.0)
+				failed = rng.random() < error_rate
+			time.sleep(delay)
+
+			if failed:
+				self._reply(503, b"injected failure", {"Retry-After": "0"})
+				return
+
+			file_name = fixture["pages"].get(self.path)
+			if file_name is None:
+				self._reply(404, b"not in the fixture")
+				return
+
+			with open(os.path.join(fixture["directory"], file_name), "rb") as f:
+				body = f.read()
+			local_origin = f"http://{self.headers['Host']}".encode()
+			self._reply(200, body.replace(origin, local_origin), {"Content-Type": "text/html; charset=utf-8"})
+
+		def _reply(self, status: int, body: bytes, headers: Dict = None):
+			self.send_response(status)
+			for name, value in (headers or {}).items():
+				self.send_header(name, value)
+			self.send_header("Content-Length", str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+	return FixtureHandler
+
+def _serve(site: str, port_queue, latency: float, jitter: float, error_rate: float, seed: int):
+	# runs in its own process so that serving does not count as scraper CPU time
+	server = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(load_fixture(site), latency, jitter, error_rate, seed))
+	port_queue.put(server.server_address[1])
+	server.serve_forever()
+
+def _cpu_seconds() -> float:
+	usage = resource.getrusage(resource.RUSAGE_SELF)
+	return usage.ru_utime + usage.ru_stime
+
+def _run_configuration(site: str, base_url: str, parser: str, parse_mode: str, keep_rate_limit: bool) -> Dict:
+	# runs in a fresh worker process, so peak RSS belongs to this configuration only
+	from scripts.extract import http_client
+	from scripts.extract.html_parser import parse_stats
+	from scripts.extract.menus_crawling import scrape_website
+	from scripts.extract.products_scraping import ProductExtractor, config
+
+	http_client.config["http"]["cache"]["enabled"] = False
+	if not keep_rate_limit:
+		http_client.config["http"]["rate_limit"]["requests_per_second"] = 0
+
+	fixture = load_fixture(site)
+	site_config = config["websites"][site]
+	site_config["path"]["website_path"] = base_url + fixture["menu"]
+	scraping = site_config["scraping"]
+	scraping["parser"] = parser
+	scraping["parse_mode"] = parse_mode
+
+	start, cpu_start = time.perf_counter(), _cpu_seconds()
+
+	categories = scrape_website(
+		site_config["path"]["website_path"], scraping["tag_name"], scraping["menu_selector"],
+		scraping["filter-keyword"], website_name=site, parser=parser
+	) or []
+
+	products = 0
+	for category_path in fixture["categories"]:
+		extractor = ProductExtractor(config["websites"], site, base_url + category_path)
+		products += len(extractor.process_pages() or [])
+
+	wall = time.perf_counter() - start
+	cpu = _cpu_seconds() - cpu_start
+	parse_seconds = sum(stats["seconds"] for stats in parse_stats().values())
+	pages = http_client.fetch_count(site) + http_client.fetch_count(http_client.session_key(None, base_url))
+
+	return {
+		"site": site,
+		"parser": parser,
+		"parse_mode": parse_mode,
+		"categories_found": len(categories),
+		"pages": pages,
+		"products": products,
+		"wall_seconds": round(wall, 3),
+		"pages_per_second": round(pages / wall, 2) if wall else 0.0,
+		"products_per_second": round(products / wall, 2) if wall else 0.0,
+		"cpu_seconds": round(cpu, 3),
+		"parse_seconds": round(parse_seconds, 3),
+		"wait_seconds": round(max(wall - cpu, 0.0), 3),
+		"peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+	}
+
+def run_site(site: str, parsers: List[str], parse_modes: List[str], latency: float, jitter: float,
+			 error_rate: float, seed: int, keep_rate_limit: bool) -> List[Dict]:
+	port_queue = multiprocessing.Queue()
+	server = multiprocessing.Process(target=_serve, args=(site, port_queue, latency, jitter, error_rate, seed), daemon=True)
+	server.start()
+	base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+
+	rows = []
+	try:
+		for parser, parse_mode in itertools.product(parsers, parse_modes):
+			with ProcessPoolExecutor(max_workers=1) as executor:
+				rows.append(executor.submit(_run_configuration, site, base_url, parser, parse_mode, keep_rate_limit).result())
+	finally:
+		server.terminate()
+		server.join()
+
+	return rows
+
+def _configuration_key(row: Dict) -> str:
+	return f"{row['site']}/{row['parser']}/{row['parse_mode']}"
+
+# runs are only compared when the server behaved the same way
+COMPARED_SETTINGS = ("latency_ms", "jitter_ms", "error_rate", "seed", "keep_rate_limit")
+
+def _previous_results(settings: Dict) -> Dict[str, Dict]:
+	for path in sorted(glob.glob(os.path.join(RESULTS_DIRECTORY, "scrape-*.json")), reverse=True):
+		with open(path, encoding="utf-8") as f:
+			previous = json.load(f)
+		if all(previous["settings"].get(key) == settings.get(key) for key in COMPARED_SETTINGS):
+			return {_configuration_key(row): row for row in previous["results"]}
+	return {}
+
+def save_results(rows: List[Dict], settings: Dict) -> str:
+	os.makedirs(RESULTS_DIRECTORY, exist_ok=True)
+	path = os.path.join(RESULTS_DIRECTORY, f"scrape-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+	with open(path, "w", encoding="utf-8") as f:
+		json.dump({"settings": settings, "results": rows}, f, indent=1)
+	return path
+
+def record_fixture(site: str, limit: int) -> str:
+	"""
+	Copy the cached pages of a real crawl of `site` into benchmarks/fixtures/<site>/.
+	"""
+	from scripts.extract.http_client import get_response_cache
+	from scripts.extract.products_scraping import config
+
+	cache = get_response_cache()
+	if cache is None:
+		raise RuntimeError("The response cache is disabled (http.cache.enabled), nothing to record")
+
+	website_path = urlparse(config["websites"][site]["path"]["website_path"])
+	origin = f"{website_path.scheme}://{website_path.netloc}"
+	directory = os.path.join(FIXTURES_DIRECTORY, site)
+	os.makedirs(directory, exist_ok=True)
+
+	web_urls = {}
+	for urls_file in glob.glob(os.path.join(BENCHMARK_DIR, "..", "data", "web_urls", "*_urls.json")):
+		with open(urls_file, encoding="utf-8") as f:
+			web_urls.update({url: True for url in json.load(f).get(site, [])})
+
+	fixture = {"origin": origin, "menu": website_path.path or "/", "categories": [], "pages": {}}
+	for i, cached in enumerate(itertools.islice(cache.iter_responses(origin), limit)):
+		parsed = urlparse(cached.url)
+		path = parsed.path + (f"?{parsed.query}" if parsed.query else "")
+		file_name = f"page-{i}.html"
+		with open(os.path.join(directory, file_name), "wb") as f:
+			f.write(cached.body)
+		fixture["pages"][path] = file_name
+		if cached.url in web_urls:
+			fixture["categories"].append(path)
+
+	with open(os.path.join(directory, "pages.json"), "w", encoding="utf-8") as f:
+		json.dump(fixture, f, indent=1, ensure_ascii=False)
+	return directory
+
+def main():
+	helpers.setup_logger("benchmarks.log")
+	parser = argparse.ArgumentParser(description="Benchmark the scrapers against saved pages on a local server")
+	parser.add_argument("--sites", nargs="*", help="Fixture sites to run (default: all in benchmarks/fixtures)")
+	parser.add_argument("--parsers", nargs="*", default=["html5lib"], help="Parser backends to compare")
+	parser.add_argument("--parse-modes", nargs="*", default=["full"], help="full and/or targeted")
+	parser.add_argument("--latency-ms", type=float, default=20.0, help="Mean server latency per request")
+	parser.add_argument("--jitter-ms", type=float, default=10.0, help="Uniform latency jitter")
+	parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+	parser.add_argument("--seed", type=int, default=42, help="Seed for latency and error injection")
+	parser.add_argument("--keep-rate-limit", action="store_true", help="Keep the configured per-host rate limit")
+	parser.add_argument("--threshold", type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+						help="Relative pages/s drop reported as a regression")
+	parser.add_argument("--record", metavar="SITE", help="Save the cached pages of SITE as a fixture and exit")
+	parser.add_argument("--record-limit", type=int, default=200, help="Maximum pages recorded")
+	args = parser.parse_args()
+
+	if args.record:
+		print(f"Recorded fixture in {record_fixture(args.record, args.record_limit)}")
+		return 0
+
+	sites = args.sites or sorted(
+		os.path.basename(os.path.dirname(path)) for path in glob.glob(os.path.join(FIXTURES_DIRECTORY, "*", "pages.json"))
+	)
+	settings = {key: value for key, value in vars(args).items() if key not in ("record", "record_limit")}
+	previous = _previous_results(settings)
+
+	rows = []
+	for site in sites:
+		rows.extend(run_site(site, args.parsers, args.parse_modes, args.latency_ms / 1000, args.jitter_ms / 1000,
+							 args.error_rate, args.seed, args.keep_rate_limit))
+
+	print(
+		f"{'configuration':<34}{'pages':>6}{'products':>9}{'pages/s':>9}{'prod/s':>8}"
+		f"{'cpu s':>7}{'parse s':>8}{'wait s':>7}{'rss MB':>8}  vs previous"
+	)
+	regressions = 0
+	for row in rows:
+		before = previous.get(_configuration_key(row))
+		change = ""
+		if before and before["pages_per_second"]:
+			ratio = row["pages_per_second"] / before["pages_per_second"] - 1
+			change = f"{ratio:+.0%}"
+			if ratio < -args.threshold:
+				change += " REGRESSION"
+				regressions += 1
+
+		print(
+			f"{_configuration_key(row):<34}{row['pages']:>6}{row['products']:>9}{row['pages_per_second']:>9}"
+			f"{row['products_per_second']:>8}{row['cpu_seconds']:>7}{row['parse_seconds']:>8}{row['wait_seconds']:>7}"
+			f"{row['peak_rss_mb']:>8}  {change}"
+		)
+
+	print(f"Saved {save_results(rows, settings)}")
+
+	return 1 if regressions else 0
+
+if __name__ == "__main__":
+	exit(main())
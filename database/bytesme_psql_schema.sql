@@ -38,7 +38,8 @@ CREATE TABLE app_data.product_images (
   product_image_name VARCHAR(255),
   product_image_type SMALLINT,
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  product_image_key VARCHAR(100) -- data/images/<key>, empty until the image is downloaded
 );
 
 CREATE TABLE app_data.migrations (
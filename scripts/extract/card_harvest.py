@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+import logging
+from typing import List
+
+from selenium.common.exceptions import WebDriverException
+
+logger = logging.getLogger(__name__)
+
+# returns [href, name, image] of the product cards not returned by an earlier call on this document,
+# cards are marked in the page so each tab only ships its new cards back to python
+HARVEST_SCRIPT = """
+	var seen = window.__bytesmeHarvested || (window.__bytesmeHarvested = {});
+	var cards = document.querySelectorAll(arguments[0]);
+	var fresh = [];
+	for (var i = 0; i < cards.length; i++) {
+		var card = cards[i];
+		if (card.getAttribute('data-bytesme-harvested')) continue;
+		card.setAttribute('data-bytesme-harvested', '1');
+
+		var anchor = card.matches('a[href]') ? card : card.querySelector('a[href]');
+		if (!anchor) continue;
+		var href = anchor.href;
+		if (seen[href]) continue;
+		seen[href] = true;
+
+		var title = card.querySelector('h1, h2, h3, h4, [class*=title], [class*=name]') || anchor;
+		var image = card.querySelector('img');
+		fresh.push([
+			href,
+			(title.textContent || '').trim(),
+			image ? (image.currentSrc || image.getAttribute('data-src') || image.src || '') : ''
+		]);
+	}
+	return fresh;
+"""
+
+@dataclass(slots=True)
+class HarvestedCard:
+	product_url: str
+	name: str = ""
+	image: str = ""
+
+class CardHarvester:
+	"""
+	Collects the product cards of a tab-based page in the browser, one `execute_script` per tab,
+	instead of pulling and re-parsing the whole page source after every click.
+	"""
+
+	def __init__(self, driver, card_selector: str):
+		self.driver = driver
+		self.card_selector = card_selector
+		self.calls = 0
+		self.harvested = 0
+
+	def harvest(self) -> List[HarvestedCard]:
+		try:
+			rows = self.driver.execute_script(HARVEST_SCRIPT, self.card_selector) or []
+		except WebDriverException as e:
+			logger.warning(f"Card harvesting failed: {str(e)}")
+			return []
+
+		self.calls += 1
+		self.harvested += len(rows)
+		return [HarvestedCard(*row) for row in rows if row and row[0]]
+
+	def log_summary(self, url: str):
+		logger.info(f"Harvested {self.harvested} new cards in {self.calls} script calls on {url}")
@@ -0,0 +1,169 @@
+"""
+Record / replay archives of a crawl.
+
+In record mode every response returned by `http_client.fetch` and every Selenium `page_source`
+snapshot taken by the tab-based and progressive crawls is written, zlib-compressed, into one
+sqlite file per run. In replay mode the extract layer reads the same pages back from the
+archive instead of the network or a browser, so a catalog can be re-extracted offline.
+
+	python -m scripts.extract.crawl_scheduler --record
+	python -m scripts.extract.crawl_scheduler --replay data/archives/20250520-061019.sqlite3
+"""
+from dataclasses import dataclass
+import datetime
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+import zlib
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DEFAULT_ARCHIVE_DIRECTORY = "data/archives"
+
+# inherited by worker processes, e.g. "record:data/archives/20250520-061019.sqlite3"
+ARCHIVE_ENV = "BYTESME_CRAWL_ARCHIVE"
+RECORD = "record"
+REPLAY = "replay"
+
+@dataclass
+class ArchivedResponse:
+	url: str
+	status_code: int
+	body: bytes
+	content_type: str
+	etag: str
+	last_modified: str
+
+class CrawlArchive:
+	def __init__(self, path: str, mode: str = RECORD):
+		if mode not in (RECORD, REPLAY):
+			raise ValueError(f"Unknown archive mode: {mode}")
+
+		self.path = path if os.path.isabs(path) else os.path.join(BASE_DIR, path)
+		self.mode = mode
+		if mode == REPLAY and not os.path.isfile(self.path):
+			raise FileNotFoundError(f"No crawl archive at {self.path}")
+		os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+		self._lock = threading.Lock()
+		# the scheduler's worker processes record into the same file
+		self._conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False)
+		self._conn.execute("PRAGMA journal_mode=WAL")
+		self._conn.execute("""
+			CREATE TABLE IF NOT EXISTS responses (
+				url TEXT PRIMARY KEY,
+				status INTEGER NOT NULL,
+				body BLOB NOT NULL,
+				content_type TEXT,
+				etag TEXT,
+				last_modified TEXT,
+				recorded_at REAL NOT NULL
+			)
+		""")
+		self._conn.execute("""
+			CREATE TABLE IF NOT EXISTS snapshots (
+				url TEXT NOT NULL,
+				seq INTEGER NOT NULL,
+				label TEXT,
+				body BLOB NOT NULL,
+				recorded_at REAL NOT NULL,
+				PRIMARY KEY (url, seq)
+			)
+		""")
+		self._conn.commit()
+
+	def record_response(self, url: str, status_code: int, body: bytes, content_type: str = "", etag: str = "",
+						last_modified: str = ""):
+		with self._lock:
+			self._conn.execute(
+				"INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+				(url, status_code, zlib.compress(body or b""), content_type, etag, last_modified, time.time())
+			)
+			self._conn.commit()
+
+	def response(self, url: str) -> Optional[ArchivedResponse]:
+		with self._lock:
+			row = self._conn.execute(
+				"SELECT status, body, content_type, etag, last_modified FROM responses WHERE url = ?", (url,)
+			).fetchone()
+
+		if row is None:
+			return None
+		return ArchivedResponse(url, row[0], zlib.decompress(row[1]), row[2] or "", row[3] or "", row[4] or "")
+
+	def record_snapshot(self, url: str, html: str, label: str = ""):
+		with self._lock:
+			seq = self._conn.execute("SELECT COUNT(*) FROM snapshots WHERE url = ?", (url,)).fetchone()[0]
+			self._conn.execute(
+				"INSERT INTO snapshots VALUES (?, ?, ?, ?, ?)",
+				(url, seq, label, zlib.compress(html.encode("utf-8")), time.time())
+			)
+			self._conn.commit()
+
+	def snapshots(self, url: str) -> List[str]:
+		with self._lock:
+			rows = self._conn.execute("SELECT body FROM snapshots WHERE url = ? ORDER BY seq", (url,)).fetchall()
+		return [zlib.decompress(row[0]).decode("utf-8") for row in rows]
+
+	def stats(self):
+		with self._lock:
+			responses = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()
+			snapshots = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM snapshots").fetchone()
+		return {
+			"responses": responses[0],
+			"snapshots": snapshots[0],
+			"compressed_bytes": responses[1] + snapshots[1]
+		}
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
+
+_archive: Optional[CrawlArchive] = None
+_archive_pid = None # sqlite connections must not cross a fork, forked workers reopen the archive
+_archive_lock = threading.Lock()
+
+def new_archive_path() -> str:
+	return os.path.join(DEFAULT_ARCHIVE_DIRECTORY, f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.sqlite3")
+
+def activate(mode: str, path: str = None) -> CrawlArchive:
+	"""
+	Record into / replay from `path` for the rest of this process and the processes it starts.
+	"""
+	global _archive, _archive_pid
+
+	path = path or new_archive_path()
+	with _archive_lock:
+		if _archive is not None and _archive_pid == os.getpid():
+			_archive.close()
+		_archive = CrawlArchive(path, mode)
+		_archive_pid = os.getpid()
+		os.environ[ARCHIVE_ENV] = f"{mode}:{_archive.path}"
+
+	logger.info(f"Crawl archive {mode}: {_archive.path}")
+	return _archive
+
+def get_archive() -> Optional[CrawlArchive]:
+	global _archive, _archive_pid
+
+	with _archive_lock:
+		if _archive_pid != os.getpid():
+			_archive = None
+			if os.environ.get(ARCHIVE_ENV):
+				mode, path = os.environ[ARCHIVE_ENV].split(":", 1)
+				_archive = CrawlArchive(path, mode)
+			_archive_pid = os.getpid()
+		return _archive
+
+def is_replaying() -> bool:
+	archive = get_archive()
+	return archive is not None and archive.mode == REPLAY
+
+def is_recording() -> bool:
+	archive = get_archive()
+	return archive is not None and archive.mode == RECORD
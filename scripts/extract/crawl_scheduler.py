@@ -0,0 +1,230 @@
+"""
+Crawl every site/category listed in data/web_urls/*_urls.json on a process pool.
+
+	python -m scripts.extract.crawl_scheduler --workers 8 --per-site 2
+	python -m scripts.extract.crawl_scheduler --catalogs cake --sites breadtalk panacota
+	python -m scripts.extract.crawl_scheduler --record / --replay data/archives/<run>.sqlite3
+	python -m scripts.extract.crawl_scheduler --sitemaps --incremental
+"""
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+import glob
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Dict, List
+
+from scripts.extract import crawl_archive
+from utils import helpers
+
+logger = logging.getLogger(__name__)
+config = helpers.load_webconfig("webs_config.yml")
+
+LOG_FILE = "crawl_scheduler.log"
+
+BASE_DIR = Path(__file__).parent.parent.parent
+WEB_URLS_DIRECTORY = "data/web_urls"
+
+DEFAULT_MAX_WORKERS = os.cpu_count() or 4
+DEFAULT_MAX_PER_SITE = 2
+
+@dataclass
+class CrawlTask:
+	catalog: str # "cake" for data/web_urls/cake_urls.json
+	website_name: str
+	category_url: str # the sitemap url for sitemap tasks
+	sitemap: bool = False
+
+@dataclass
+class CrawlResult:
+	task: CrawlTask
+	products: List = field(default_factory=list) # emptied once the parent wrote them to the sink
+	products_count: int = 0
+	pages: int = 0
+	started_at: float = 0.0
+	finished_at: float = 0.0
+	error: str = ""
+
+	@property
+	def seconds(self) -> float:
+		return self.finished_at - self.started_at
+
+def load_tasks(catalogs: List[str] = None, sites: List[str] = None, use_sitemaps: bool = False) -> List[CrawlTask]:
+	"""
+	One task per listed category, or with `use_sitemaps` one sitemap task per site that has a `sitemap` block.
+	"""
+	from scripts.extract.sitemap_discovery import sitemap_config
+
+	tasks = []
+	pattern = os.path.join(BASE_DIR, WEB_URLS_DIRECTORY, "*_urls.json")
+	for path in sorted(glob.glob(pattern)):
+		catalog = os.path.basename(path)[:-len("_urls.json")]
+		if catalogs and catalog not in catalogs:
+			continue
+
+		with open(path, encoding="utf-8") as f:
+			category_urls = json.load(f)
+
+		for website_name, urls in category_urls.items():
+			if sites and website_name not in sites:
+				continue
+			if website_name not in config["websites"]:
+				logger.warning(f"{website_name} from {path} is not configured in webs_config.yml, skipping")
+				continue
+
+			sitemap = sitemap_config(config["websites"][website_name]) if use_sitemaps else None
+			if sitemap:
+				tasks.append(CrawlTask(catalog, website_name, sitemap["url"], sitemap=True))
+			else:
+				tasks.extend(CrawlTask(catalog, website_name, url) for url in urls)
+
+	return tasks
+
+def _crawl_category(task: CrawlTask, incremental: bool) -> CrawlResult:
+	# runs in a worker process, sessions, caches and Chrome drivers stay warm across its tasks
+	from scripts.extract import http_client
+	from scripts.extract.products_scraping import ProductExtractor
+	from scripts.extract.sitemap_discovery import crawl_sitemap
+
+	result = CrawlResult(task, started_at=time.time())
+	pages_before = http_client.fetch_count(task.website_name)
+	try:
+		if task.sitemap:
+			result.products = crawl_sitemap(config["websites"], task.website_name, incremental=incremental)
+			if not result.products:
+				result.error = "no products found through the sitemap, crawl the site without --sitemaps"
+		else:
+			extractor = ProductExtractor(config["websites"], task.website_name, task.category_url, incremental=incremental)
+			result.products = extractor.process_pages() or []
+	except Exception as e:
+		result.error = f"{type(e).__name__}: {str(e)}"
+
+	result.products_count = len(result.products)
+	result.pages = http_client.fetch_count(task.website_name) - pages_before
+	result.finished_at = time.time()
+	return result
+
+def run(tasks: List[CrawlTask], max_workers: int = DEFAULT_MAX_WORKERS, max_per_site: int = DEFAULT_MAX_PER_SITE,
+		incremental: bool = False, resume: bool = False) -> List[CrawlResult]:
+	"""
+	Run the tasks with at most `max_workers` categories in flight overall and `max_per_site`
+	per site. Results are written by this process only, into one sink per catalog.
+	With `resume` the sinks continue an interrupted run and its finished categories are skipped.
+	Incremental runs crawl one category per site at a time since each worker saves the site manifest.
+	"""
+	from scripts.extract.product_sink import ProductSink
+
+	sinks = {catalog: ProductSink(catalog, resume=resume) for catalog in {task.catalog for task in tasks}}
+	pending = [task for task in tasks if not sinks[task.catalog].is_category_done(task.category_url)]
+	logger.info(f"Scheduling {len(pending)} categories ({len(tasks) - len(pending)} already finished)")
+
+	in_flight: Dict = {}
+	per_site: Dict[str, int] = {}
+	results = []
+
+	try:
+		with ProcessPoolExecutor(max_workers=max_workers, initializer=helpers.setup_logger, initargs=(LOG_FILE,)) as executor:
+			while pending or in_flight:
+				for task in list(pending):
+					if len(in_flight) >= max_workers:
+						break
+					site_limit = 1 if incremental else max(int(
+						config["websites"][task.website_name].get("scraping", {}).get("max_concurrent_categories", max_per_site)
+					), 1)
+					if per_site.get(task.website_name, 0) >= site_limit:
+						continue
+
+					pending.remove(task)
+					per_site[task.website_name] = per_site.get(task.website_name, 0) + 1
+					in_flight[executor.submit(_crawl_category, task, incremental)] = task
+
+				done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+				for future in done:
+					task = in_flight.pop(future)
+					per_site[task.website_name] -= 1
+					result = future.result()
+					results.append(result)
+
+					sink = sinks[task.catalog]
+					for product in result.products:
+						sink.write(product, task.category_url)
+					if result.products:
+						sink.complete_category(task.category_url)
+					# only the counts are kept for the summary
+					result.products = []
+
+					status = f"failed ({result.error})" if result.error else f"{result.products_count} products"
+					logger.info(f"[{task.website_name}] {task.category_url}: {status} in {result.seconds:.1f}s")
+	finally:
+		for sink in sinks.values():
+			sink.close()
+
+	return results
+
+def summarize(results: List[CrawlResult], elapsed: float) -> str:
+	total_pages = sum(r.pages for r in results)
+	total_products = sum(r.products_count for r in results)
+	lines = [
+		f"Crawled {len(results)} categories in {elapsed:.1f}s: "
+		f"{total_pages / elapsed if elapsed else 0:.2f} pages/s, {total_products / elapsed if elapsed else 0:.2f} products/s",
+		f"{'site':<16}{'categories':>11}{'failed':>8}{'products':>10}{'pages':>8}{'avg cat s':>11}{'max cat s':>11}{'site s':>9}"
+	]
+
+	for website_name in sorted({r.task.website_name for r in results}):
+		site_results = [r for r in results if r.task.website_name == website_name]
+		latencies = [r.seconds for r in site_results]
+		site_seconds = max(r.finished_at for r in site_results) - min(r.started_at for r in site_results)
+		lines.append(
+			f"{website_name:<16}{len(site_results):>11}{sum(1 for r in site_results if r.error):>8}"
+			f"{sum(r.products_count for r in site_results):>10}{sum(r.pages for r in site_results):>8}"
+			f"{sum(latencies) / len(latencies):>11.1f}{max(latencies):>11.1f}{site_seconds:>9.1f}"
+		)
+
+	return "\n".join(lines)
+
+def main():
+	helpers.setup_logger(LOG_FILE)
+	scheduler_config = config.get("scheduler") or {}
+
+	parser = argparse.ArgumentParser(description="Crawl all configured sites and categories in parallel")
+	parser.add_argument("--catalogs", nargs="*", help="Only these data/web_urls catalogs (cake, drink, ...)")
+	parser.add_argument("--sites", nargs="*", help="Only these websites")
+	parser.add_argument("--workers", type=int, default=int(scheduler_config.get("max_workers", DEFAULT_MAX_WORKERS)),
+						help="Maximum categories crawled at the same time")
+	parser.add_argument("--per-site", type=int, default=int(scheduler_config.get("max_per_site", DEFAULT_MAX_PER_SITE)),
+						help="Maximum categories of one site crawled at the same time")
+	parser.add_argument("--incremental", action="store_true", help="Reuse unchanged products from the scrape manifests")
+	parser.add_argument("--resume", action="store_true",
+						help="Continue the interrupted run in data/raw instead of starting the outputs over")
+	parser.add_argument("--sitemaps", action="store_true",
+						help="Find product urls in the sitemaps of sites with a `sitemap` block instead of crawling their listings")
+	archive_group = parser.add_mutually_exclusive_group()
+	archive_group.add_argument("--record", nargs="?", const="", metavar="PATH",
+							   help=f"Record every response into a crawl archive (default: a new file in {crawl_archive.DEFAULT_ARCHIVE_DIRECTORY})")
+	archive_group.add_argument("--replay", metavar="PATH", help="Re-extract from a recorded crawl archive without any network access")
+	args = parser.parse_args()
+
+	archive = None
+	if args.record is not None:
+		archive = crawl_archive.activate(crawl_archive.RECORD, args.record or None)
+	elif args.replay:
+		archive = crawl_archive.activate(crawl_archive.REPLAY, args.replay)
+
+	tasks = load_tasks(args.catalogs, args.sites, use_sitemaps=args.sitemaps)
+	start = time.time()
+	results = run(tasks, max_workers=args.workers, max_per_site=args.per_site, incremental=args.incremental,
+				  resume=args.resume)
+
+	summary = summarize(results, time.time() - start)
+	if archive:
+		summary += f"\nCrawl archive ({archive.mode}) {archive.path}: {archive.stats()}"
+	logger.info(summary)
+	print(summary)
+
+	return 1 if any(r.error for r in results) else 0
+
+if __name__ == "__main__":
+	exit(main())
@@ -0,0 +1,178 @@
+import atexit
+from contextlib import contextmanager
+import logging
+import queue
+import threading
+import time
+from typing import List
+
+from selenium.common.exceptions import WebDriverException
+from utils import helpers
+
+logger = logging.getLogger(__name__)
+config = helpers.load_webconfig("webs_config.yml")
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_LEASE_TIMEOUT = 600 # seconds to wait for a free driver
+DEFAULT_PAGE_LOAD_TIMEOUT = 60
+
+class DriverUnavailable(Exception):
+	"""
+	No driver could be leased: none became free in time or a replacement failed to start.
+	"""
+
+class DriverPool:
+	"""
+	Headless Chrome drivers started once and leased to the Selenium-based crawls.
+	A driver is reset between leases and replaced when it crashes or fails to reset.
+	A slot whose driver could not be (re)started stays in the pool empty, the next lease starts it.
+	"""
+
+	def __init__(self, size: int = DEFAULT_POOL_SIZE, user_agent: str = None, light: bool = True,
+			  page_load_timeout: int = DEFAULT_PAGE_LOAD_TIMEOUT):
+		self.size = size
+		self.user_agent = user_agent or config["user_agent"]
+		self.light = light
+		self.page_load_timeout = page_load_timeout
+
+		self._idle = queue.Queue()
+		self._drivers: List = []
+		self._lock = threading.Lock()
+		self._started = False
+		self.startup_seconds: List[float] = []
+
+	def start(self):
+		with self._lock:
+			if self._started:
+				return
+			self._started = True
+
+		for _ in range(self.size):
+			try:
+				self._idle.put(self._start_driver())
+			except Exception as e:
+				logger.error(f"Could not start a Chrome driver, retrying on lease: {str(e)}")
+				self._idle.put(None)
+
+		logger.info(
+			f"Started {self.size} Chrome driver(s) in {sum(self.startup_seconds):.2f}s "
+			f"(light profile: {self.light})"
+		)
+
+	def _start_driver(self):
+		start = time.perf_counter()
+		driver = helpers.setup_selenium(self.user_agent, light=self.light)
+		driver.set_page_load_timeout(self.page_load_timeout)
+		elapsed = time.perf_counter() - start
+
+		with self._lock:
+			self._drivers.append(driver)
+			self.startup_seconds.append(elapsed)
+
+		logger.debug(f"Chrome driver started in {elapsed:.2f}s")
+		return driver
+
+	def _quit_driver(self, driver):
+		with self._lock:
+			if driver in self._drivers:
+				self._drivers.remove(driver)
+		try:
+			driver.quit()
+		except Exception as e:
+			logger.debug(f"Ignoring error while quitting a driver: {str(e)}")
+
+	def _recycle(self, driver, reason: str):
+		logger.warning(f"Recycling Chrome driver: {reason}")
+		self._quit_driver(driver)
+		return self._start_driver()
+
+	def _is_alive(self, driver) -> bool:
+		try:
+			driver.execute_script("return 1;")
+			return True
+		except WebDriverException:
+			return False
+
+	def _reset(self, driver):
+		# drop everything a previous lease could leak into the next one
+		handles = driver.window_handles
+		for handle in handles[1:]:
+			driver.switch_to.window(handle)
+			driver.close()
+		driver.switch_to.window(handles[0])
+
+		driver.delete_all_cookies()
+		driver.execute_script("try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}")
+		driver.get("about:blank")
+
+	@contextmanager
+	def lease(self, label: str = ""):
+		self.start()
+
+		try:
+			driver = self._idle.get(timeout=DEFAULT_LEASE_TIMEOUT)
+		except queue.Empty:
+			raise DriverUnavailable(f"no Chrome driver became free within {DEFAULT_LEASE_TIMEOUT}s")
+
+		try:
+			if driver is None:
+				driver = self._start_driver()
+			elif not self._is_alive(driver):
+				driver = self._recycle(driver, "driver died while idle")
+		except Exception as e:
+			self._idle.put(None)
+			raise DriverUnavailable(f"could not start a Chrome driver: {str(e)}") from e
+
+		start = time.perf_counter()
+		crashed = False
+		try:
+			yield driver
+		except WebDriverException:
+			crashed = not self._is_alive(driver)
+			raise
+		finally:
+			logger.info(f"Driver lease {label} took {time.perf_counter() - start:.2f}s")
+
+			try:
+				if crashed:
+					driver = self._recycle(driver, "driver crashed during lease")
+				else:
+					try:
+						self._reset(driver)
+					except Exception as e:
+						driver = self._recycle(driver, f"reset failed: {str(e)}")
+			except Exception as e:
+				logger.error(f"Could not replace the Chrome driver, the next lease starts one: {str(e)}")
+				driver = None
+			finally:
+				# the slot always goes back, or the pool shrinks for good
+				self._idle.put(driver)
+
+	def close(self):
+		with self._lock:
+			drivers = list(self._drivers)
+			self._started = False
+
+		for driver in drivers:
+			self._quit_driver(driver)
+
+		while not self._idle.empty():
+			self._idle.get_nowait()
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_driver_pool() -> DriverPool:
+	global _pool
+
+	with _pool_lock:
+		if _pool is None:
+			selenium_config = config.get("selenium") or {}
+			_pool = DriverPool(
+				size=int(selenium_config.get("pool_size", DEFAULT_POOL_SIZE)),
+				light=bool(selenium_config.get("light_profile", True)),
+				page_load_timeout=int(selenium_config.get("page_load_timeout", DEFAULT_PAGE_LOAD_TIMEOUT))
+			)
+			atexit.register(_pool.close)
+
+		return _pool
@@ -0,0 +1,226 @@
+from dataclasses import dataclass, field
+import re
+import threading
+from typing import Dict, List, Optional
+
+from bs4 import SoupStrainer
+import soupsieve as sv
+
+# shared by every site, compiled once at import
+NON_DIGIT_PATTERN = re.compile(r'[^\d]')
+DIGIT_PATTERN = re.compile(r'\d')
+FILE_EXTENSION_PATTERN = re.compile(r'\.[^.]+$')
+STYLE_URL_PATTERN = re.compile(r'url\(["\']?(.*?)["\']?\)')
+XR_SCRIPT_PATTERN = re.compile(r'const xr =\s*(\[.*?\]);', re.DOTALL)
+
+LITERAL_PREFIX = "literal:"
+
+# `:contains()` only looks at the element's own text, which a partial tree keeps
+_CONTAINS_PSEUDO = re.compile(r''':(?:-soup-)?contains\((?:"[^"]*"|'[^']*'|[^)])*\)''')
+_ATTRIBUTE_SELECTOR = re.compile(r'\[[^\]]*\]')
+_TAG_NAME = re.compile(r'^[a-zA-Z][\w-]*')
+_CLASS_NAME = re.compile(r'\.([\w-]+)')
+_ID_NAME = re.compile(r'#([\w-]+)')
+
+def _is_set(value) -> bool:
+	# the config spells a missing selector as the string "None"
+	return bool(value) and value != "None"
+
+@dataclass
+class ExtractionPlan:
+	"""
+	A site's `product_detail_selectors` and card settings resolved and compiled once, so that
+	extracting a product only runs the compiled selectors.
+	A selector is None when the config disables it.
+	"""
+	name: Optional[sv.SoupSieve] = None
+	descriptions: List[sv.SoupSieve] = field(default_factory=list)
+	unit_price: Optional[sv.SoupSieve] = None
+	image_container: Optional[sv.SoupSieve] = None
+	detail_image: Optional[sv.SoupSieve] = None
+	category: Optional[sv.SoupSieve] = None
+	category_literal: Optional[str] = None
+	category_tag: str = ""
+	categories_enabled: bool = False
+	code: Optional[sv.SoupSieve] = None
+
+	card_tag: str = ""
+	card_class: Optional[re.Pattern] = None
+	skip_url_pattern: Optional[str] = None
+
+	# partial trees for `scraping.parse_mode: targeted`, None when a selector needs the full tree
+	detail_strainer: Optional[SoupStrainer] = None
+	listing_strainer: Optional[SoupStrainer] = None
+
+	@classmethod
+	def compile(cls, scraping_config: Dict) -> "ExtractionPlan":
+		"""
+		Raises like the per-product lookups used to when the detail selectors are missing or invalid.
+		"""
+		plan = cls()
+
+		product_selector = scraping_config.get("product_selector")
+		if product_selector:
+			plan.card_tag = scraping_config.get("product_tag", "")
+			plan.card_class = re.compile(product_selector.replace(".", ""))
+		skip_patterns = scraping_config.get("skip_url_patterns")
+		plan.skip_url_pattern = skip_patterns if _is_set(skip_patterns) else None
+
+		if plan.card_tag:
+			next_selector = (scraping_config.get("pagination") or {}).get("next_selector")
+			next_targets = _selector_targets(next_selector) if next_selector else []
+			if next_targets is not None:
+				plan.listing_strainer = TargetStrainer([_Target(plan.card_tag, class_pattern=plan.card_class)] + next_targets)
+
+		detail_selectors = scraping_config.get("product_detail_selectors", "")
+		plan.name = _compile_selector(detail_selectors["name"])
+
+		descriptions = detail_selectors["description"]
+		if descriptions != "None":
+			descriptions = [descriptions] if isinstance(descriptions, str) else descriptions
+			plan.descriptions = [sv.compile(selector) for selector in descriptions]
+
+		plan.unit_price = _compile_selector(detail_selectors["unit_price"])
+		plan.image_container = _compile_selector(detail_selectors.get("image_selector", ""))
+		plan.detail_image = _compile_selector(detail_selectors["detail_image"])
+
+		category_selector = detail_selectors["original_category"]
+		if _is_set(category_selector):
+			plan.categories_enabled = True
+			if isinstance(category_selector, str) and category_selector.startswith(LITERAL_PREFIX):
+				plan.category_literal = category_selector[len(LITERAL_PREFIX):]
+			else:
+				plan.category = sv.compile(category_selector)
+				plan.category_tag = detail_selectors["category_tag"]
+
+		code_selector = detail_selectors["code"]
+		plan.code = _compile_selector(code_selector) if code_selector else None
+
+		used_selectors = [detail_selectors[key] for key in ("name", "unit_price", "detail_image", "code")]
+		used_selectors.append(detail_selectors.get("image_selector", ""))
+		used_selectors.extend([] if descriptions == "None" else descriptions)
+		if plan.category:
+			used_selectors.append(category_selector)
+		targets = [_Target("meta"), _Target("script")] # read by the meta fallback
+		for selector in used_selectors:
+			if not _is_set(selector):
+				continue
+			selector_targets = _selector_targets(selector)
+			if selector_targets is None:
+				targets = None
+				break
+			targets.extend(selector_targets)
+		plan.detail_strainer = TargetStrainer(targets) if targets else None
+
+		return plan
+
+def _compile_selector(selector) -> Optional[sv.SoupSieve]:
+	return sv.compile(selector) if selector != "None" else None
+
+@dataclass(frozen=True)
+class _Target:
+	"""
+	The first compound of a selector: the element a partial parse has to keep, with all of its
+	descendants, for the rest of the selector to match.
+	"""
+	name: Optional[str] = None
+	classes: frozenset = frozenset()
+	element_id: Optional[str] = None
+	class_pattern: Optional[re.Pattern] = None
+
+	def matches(self, name: str, classes: List[str], element_id: Optional[str]) -> bool:
+		if self.name and self.name != name:
+			return False
+		if self.element_id and self.element_id != element_id:
+			return False
+		if self.classes and not self.classes.issubset(classes):
+			return False
+		if self.class_pattern and not (
+			any(self.class_pattern.search(value) for value in classes)
+			or self.class_pattern.search(" ".join(classes))
+		):
+			return False
+		return True
+
+def _split_selector_list(selector: str) -> List[str]:
+	parts, depth, current = [], 0, ""
+	for char in selector:
+		depth += char == "("
+		depth -= char == ")"
+		if char == "," and depth == 0:
+			parts.append(current)
+			current = ""
+		else:
+			current += char
+	return [part.strip() for part in parts + [current] if part.strip()]
+
+def _selector_targets(selector: str) -> Optional[List[_Target]]:
+	"""
+	Targets for every selector of a selector list, None when a partial tree could change what
+	the selector matches: sibling combinators and structural pseudo-classes depend on nodes
+	outside the kept subtree.
+	"""
+	targets = []
+	for part in _split_selector_list(selector):
+		part = _ATTRIBUTE_SELECTOR.sub("", _CONTAINS_PSEUDO.sub("", part))
+		if any(char in part for char in ":+~") or part.startswith(">"):
+			return None
+
+		compound = re.split(r"[\s>]+", part)[0]
+		name = _TAG_NAME.match(compound)
+		target = _Target(
+			name=name.group(0).lower() if name else None,
+			classes=frozenset(_CLASS_NAME.findall(compound)),
+			element_id=(_ID_NAME.findall(compound) or [None])[0]
+		)
+		if not (target.name or target.classes or target.element_id):
+			return None
+		targets.append(target)
+
+	return targets
+
+class TargetStrainer(SoupStrainer):
+	"""
+	Keeps the top-level elements matched by any target together with their subtrees.
+
+	Beautiful Soup asks `allow_tag_creation` (4.13+) or `search_tag` (4.12) before a tag is
+	created, with the raw tag name and attributes, so both hooks are answered the same way.
+	"""
+
+	def __init__(self, targets: List[_Target]):
+		super().__init__()
+		self.targets = targets
+
+	def keep(self, name: str, attrs) -> bool:
+		if isinstance(attrs, list):
+			attrs = dict(attrs)
+		attrs = attrs or {}
+
+		classes = attrs.get("class") or []
+		if isinstance(classes, str):
+			classes = classes.split()
+		return any(target.matches(name, classes, attrs.get("id")) for target in self.targets)
+
+	def allow_tag_creation(self, nsprefix, name, attrs) -> bool:
+		return self.keep(name, attrs)
+
+	def allow_string_creation(self, string) -> bool:
+		return False
+
+	def search_tag(self, markup_name=None, markup_attrs={}):
+		if isinstance(markup_name, str):
+			return self.keep(markup_name, markup_attrs)
+		return super().search_tag(markup_name, markup_attrs)
+
+	def search(self, markup):
+		# top-level text of 4.12 trees
+		return None if isinstance(markup, str) else super().search(markup)
+
+_plans: Dict[str, ExtractionPlan] = {}
+_plans_lock = threading.Lock()
+
+def get_plan(website_name: str, scraping_config: Dict) -> ExtractionPlan:
+	with _plans_lock:
+		if website_name not in _plans:
+			_plans[website_name] = ExtractionPlan.compile(scraping_config)
+		return _plans[website_name]
@@ -0,0 +1,74 @@
+from collections import Counter
+import logging
+import threading
+import time
+from typing import Dict, Union
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PARSER = "html5lib"
+# html5lib always builds the whole tree, partial parses go through this backend instead
+PARTIAL_PARSER = "lxml"
+
+# backend name in webs_config.yml -> BeautifulSoup tree builder, lxml is the fastest of the three
+PARSER_BACKENDS = {
+	"html5lib": "html5lib",
+	"lxml": "lxml",
+	"html.parser": "html.parser",
+}
+
+_parse_seconds: Counter = Counter()
+_parse_counts: Counter = Counter()
+_stats_lock = threading.Lock()
+_missing_backends = set()
+
+def resolve_backend(backend: str = None) -> str:
+	backend = backend or DEFAULT_PARSER
+	if backend not in PARSER_BACKENDS:
+		logger.warning(f"Unknown parser backend '{backend}', falling back to {DEFAULT_PARSER}")
+		return DEFAULT_PARSER
+
+	return backend
+
+def parse_html(markup: Union[str, bytes], backend: str = DEFAULT_PARSER, parse_only: SoupStrainer = None) -> BeautifulSoup:
+	"""
+	With `parse_only` only the elements kept by the strainer (and their subtrees) are built.
+	"""
+	backend = resolve_backend(backend)
+	if parse_only is not None and PARSER_BACKENDS[backend] == "html5lib":
+		backend = PARTIAL_PARSER
+
+	start = time.perf_counter()
+	try:
+		bs = BeautifulSoup(markup, PARSER_BACKENDS[backend], parse_only=parse_only)
+	except FeatureNotFound:
+		if backend not in _missing_backends:
+			logger.warning(f"Parser backend '{backend}' is not installed, falling back to {DEFAULT_PARSER}")
+			_missing_backends.add(backend)
+		backend = DEFAULT_PARSER
+		parse_only = None
+		bs = BeautifulSoup(markup, PARSER_BACKENDS[backend])
+
+	stats_key = f"{backend} (partial)" if parse_only is not None else backend
+	with _stats_lock:
+		_parse_seconds[stats_key] += time.perf_counter() - start
+		_parse_counts[stats_key] += 1
+
+	return bs
+
+def parse_stats() -> Dict[str, Dict[str, float]]:
+	with _stats_lock:
+		return {
+			backend: {
+				"pages": _parse_counts[backend],
+				"seconds": round(_parse_seconds[backend], 4)
+			}
+			for backend in _parse_counts
+		}
+
+def reset_parse_stats():
+	with _stats_lock:
+		_parse_seconds.clear()
+		_parse_counts.clear()
@@ -0,0 +1,412 @@
+from collections import Counter
+from email.utils import parsedate_to_datetime
+import datetime
+import logging
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from scripts.extract import crawl_archive
+from scripts.extract.response_cache import CachedResponse, ResponseCache, DEFAULT_CACHE_DIRECTORY, DEFAULT_MAX_AGE, DEFAULT_MAX_SIZE_MB
+from utils import helpers
+
+logger = logging.getLogger(__name__)
+config = helpers.load_webconfig("webs_config.yml")
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_TIMEOUT = 30
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5 # seconds
+DEFAULT_BACKOFF_MAX = 30
+DEFAULT_MAX_RETRY_AFTER = 120
+DEFAULT_RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+_sessions: Dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+_response_cache: Optional[ResponseCache] = None
+_response_cache_lock = threading.Lock()
+_cache_stats: Dict[str, Counter] = {}
+_cache_stats_lock = threading.Lock()
+_fetch_counts: Counter = Counter()
+
+_buckets: Dict[str, "TokenBucket"] = {}
+_buckets_lock = threading.Lock()
+
+class TokenBucket:
+	"""
+	Allows `rate` requests per second on average with bursts of up to `burst` requests.
+	"""
+
+	def __init__(self, rate: float, burst: int):
+		self.rate = rate
+		self.capacity = max(burst, 1)
+		self.tokens = float(self.capacity)
+		self.updated_at = time.monotonic()
+		self._lock = threading.Lock()
+
+	def acquire(self) -> float:
+		waited = 0.0
+		while True:
+			with self._lock:
+				now = time.monotonic()
+				self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+				self.updated_at = now
+
+				if self.tokens >= 1:
+					self.tokens -= 1
+					return waited
+				delay = (1 - self.tokens) / self.rate
+
+			time.sleep(delay)
+			waited += delay
+
+class _TrackingHTTPConnectionPool(HTTPConnectionPool):
+	# a pooled connection without a socket is (re)connected before the request is sent
+	num_socket_connects = 0
+
+	def _get_conn(self, timeout=None):
+		conn = super()._get_conn(timeout)
+		if getattr(conn, "sock", None) is None:
+			self.num_socket_connects += 1
+		return conn
+
+class _TrackingHTTPSConnectionPool(HTTPSConnectionPool):
+	num_socket_connects = 0
+
+	def _get_conn(self, timeout=None):
+		conn = super()._get_conn(timeout)
+		if getattr(conn, "sock", None) is None:
+			self.num_socket_connects += 1
+		return conn
+
+class _PooledAdapter(HTTPAdapter):
+	def init_poolmanager(self, *args, **kwargs):
+		super().init_poolmanager(*args, **kwargs)
+		self.poolmanager.pool_classes_by_scheme = {
+			"http": _TrackingHTTPConnectionPool,
+			"https": _TrackingHTTPSConnectionPool
+		}
+
+def _site_http_config(website_name: str) -> Dict:
+	"""
+	Global `http` settings overridden by the site's own `http` block (if any).
+	"""
+	http_config = dict(config.get("http") or {})
+	site_config = config.get("websites", {}).get(website_name, {}).get("http") or {}
+
+	for key, value in site_config.items():
+		if isinstance(value, dict) and isinstance(http_config.get(key), dict):
+			http_config[key] = {**http_config[key], **value}
+		else:
+			http_config[key] = value
+	http_config.setdefault("headers", {})
+
+	return http_config
+
+def _create_session(website_name: str) -> requests.Session:
+	http_config = _site_http_config(website_name)
+
+	session = requests.Session()
+	adapter = _PooledAdapter(
+		pool_connections=int(http_config.get("pool_connections", DEFAULT_POOL_CONNECTIONS)),
+		pool_maxsize=int(http_config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE)),
+	)
+	session.mount("http://", adapter)
+	session.mount("https://", adapter)
+
+	session.headers.update({
+		'User-Agent': http_config.get("user_agent", config["user_agent"]),
+		'Connection': 'keep-alive',
+		**http_config["headers"]
+	})
+
+	logger.debug(f"Created HTTP session for {website_name}: {http_config}")
+	return session
+
+def session_key(website_name: str = None, url: str = None) -> str:
+	# callers that do not know the site (menus crawling) share a session per host
+	return website_name or urlparse(url).netloc
+
+def get_session(website_name: str) -> requests.Session:
+	with _sessions_lock:
+		session = _sessions.get(website_name)
+		if session is None:
+			session = _create_session(website_name)
+			_sessions[website_name] = session
+
+		return session
+
+def get_response_cache() -> Optional[ResponseCache]:
+	global _response_cache
+
+	cache_config = (config.get("http") or {}).get("cache") or {}
+	if not cache_config.get("enabled", False):
+		return None
+
+	with _response_cache_lock:
+		if _response_cache is None:
+			_response_cache = ResponseCache(
+				directory=cache_config.get("directory", DEFAULT_CACHE_DIRECTORY),
+				max_size_bytes=int(cache_config.get("max_size_mb", DEFAULT_MAX_SIZE_MB)) * 1024 * 1024
+			)
+
+		return _response_cache
+
+def _cache_key(url: str, params: Dict = None) -> str:
+	if not params:
+		return url
+	return requests.Request("GET", url, params=params).prepare().url
+
+def _count_cache(website_name: str, outcome: str):
+	with _cache_stats_lock:
+		_cache_stats.setdefault(website_name, Counter())[outcome] += 1
+
+def _response_from_cache(cached: CachedResponse) -> requests.Response:
+	response = requests.Response()
+	response.status_code = 200
+	response.url = cached.url
+	response._content = cached.body
+	response.headers = CaseInsensitiveDict({
+		"Content-Type": cached.content_type,
+		"ETag": cached.etag,
+		"Last-Modified": cached.last_modified
+	})
+	response.from_cache = True
+
+	return response
+
+def _bucket_for(url: str, http_config: Dict) -> Optional[TokenBucket]:
+	rate_config = http_config.get("rate_limit") or {}
+	rate = float(rate_config.get("requests_per_second", 0) or 0)
+	if rate <= 0:
+		return None
+
+	host = urlparse(url).netloc
+	with _buckets_lock:
+		if host not in _buckets:
+			_buckets[host] = TokenBucket(rate, int(rate_config.get("burst", 1)))
+		return _buckets[host]
+
+def _retry_after_seconds(response: requests.Response) -> Optional[float]:
+	value = response.headers.get("Retry-After")
+	if not value:
+		return None
+
+	try:
+		return max(float(value), 0.0)
+	except ValueError:
+		pass
+
+	try:
+		retry_at = parsedate_to_datetime(value)
+		return max((retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds(), 0.0)
+	except (TypeError, ValueError):
+		return None
+
+def _backoff_seconds(attempt: int, retry_config: Dict) -> float:
+	# exponential backoff with full jitter
+	base = float(retry_config.get("backoff_base", DEFAULT_BACKOFF_BASE))
+	ceiling = float(retry_config.get("backoff_max", DEFAULT_BACKOFF_MAX))
+	return random.uniform(0, min(ceiling, base * 2 ** attempt))
+
+def _send(website_name: str, session: requests.Session, url: str, http_config: Dict, **kwargs) -> requests.Response:
+	"""
+	GET through the host's token bucket, retrying transient failures with jittered exponential
+	backoff. A Retry-After header takes precedence over the computed delay.
+	"""
+	retry_config = http_config.get("retry") or {}
+	max_retries = int(retry_config.get("max_retries", DEFAULT_MAX_RETRIES))
+	retry_statuses = set(retry_config.get("statuses", DEFAULT_RETRY_STATUSES))
+	max_retry_after = float(retry_config.get("max_retry_after", DEFAULT_MAX_RETRY_AFTER))
+	bucket = _bucket_for(url, http_config)
+
+	attempt = 0
+	while True:
+		if bucket:
+			bucket.acquire()
+
+		try:
+			response = session.get(url, **kwargs)
+		except (requests.ConnectionError, requests.Timeout) as e:
+			if attempt >= max_retries:
+				raise
+			delay = _backoff_seconds(attempt, retry_config)
+			logger.warning(f"{website_name}: {type(e).__name__} for {url}, retry {attempt + 1}/{max_retries} in {delay:.1f}s")
+		else:
+			if response.status_code not in retry_statuses or attempt >= max_retries:
+				return response
+
+			retry_after = _retry_after_seconds(response)
+			delay = min(retry_after, max_retry_after) if retry_after is not None else _backoff_seconds(attempt, retry_config)
+			logger.warning(
+				f"{website_name}: status {response.status_code} for {url}, "
+				f"retry {attempt + 1}/{max_retries} in {delay:.1f}s"
+			)
+			response.close()
+
+		time.sleep(delay)
+		attempt += 1
+
+def _response_from_archive(archived: crawl_archive.ArchivedResponse) -> requests.Response:
+	response = requests.Response()
+	response.status_code = archived.status_code
+	response.url = archived.url
+	response._content = archived.body
+	response.headers = CaseInsensitiveDict({
+		"Content-Type": archived.content_type,
+		"ETag": archived.etag,
+		"Last-Modified": archived.last_modified
+	})
+	response.from_archive = True
+
+	return response
+
+def fetch(website_name: str, url: str, use_cache: bool = True, **kwargs) -> requests.Response:
+	"""
+	GET through the site's session, the response cache and, when one is active, the crawl archive:
+	recorded after the fetch, or replayed instead of any network access.
+	"""
+	with _cache_stats_lock:
+		_fetch_counts[website_name] += 1
+
+	archive = crawl_archive.get_archive()
+	key = _cache_key(url, kwargs.get("params"))
+	if archive and archive.mode == crawl_archive.REPLAY:
+		archived = archive.response(key)
+		if archived is None:
+			logger.warning(f"{key} is not in the crawl archive {archive.path}")
+			archived = crawl_archive.ArchivedResponse(key, 404, b"", "", "", "")
+		return _response_from_archive(archived)
+
+	response = _fetch(website_name, url, use_cache, **kwargs)
+	if archive:
+		archive.record_response(
+			key,
+			response.status_code,
+			response.content,
+			content_type=response.headers.get("Content-Type", ""),
+			etag=response.headers.get("ETag", ""),
+			last_modified=response.headers.get("Last-Modified", "")
+		)
+
+	return response
+
+def _fetch(website_name: str, url: str, use_cache: bool = True, **kwargs) -> requests.Response:
+	session = get_session(website_name)
+	http_config = _site_http_config(website_name)
+	kwargs.setdefault("timeout", http_config.get("timeout", DEFAULT_TIMEOUT))
+
+	cache = get_response_cache() if use_cache else None
+	if cache is None:
+		return _send(website_name, session, url, http_config, **kwargs)
+
+	key = _cache_key(url, kwargs.get("params"))
+	cached = cache.get(key)
+	max_age = float((http_config.get("cache") or {}).get("max_age", DEFAULT_MAX_AGE))
+
+	if cached and cached.age() < max_age:
+		_count_cache(website_name, "hits")
+		return _response_from_cache(cached)
+
+	headers = dict(kwargs.pop("headers", None) or {})
+	if cached:
+		if cached.etag:
+			headers["If-None-Match"] = cached.etag
+		if cached.last_modified:
+			headers["If-Modified-Since"] = cached.last_modified
+
+	response = _send(website_name, session, url, http_config, headers=headers, **kwargs)
+
+	if response.status_code == 304 and cached:
+		_count_cache(website_name, "revalidated")
+		cache.refresh(key, response.headers.get("ETag", ""), response.headers.get("Last-Modified", ""))
+		return _response_from_cache(cached)
+
+	_count_cache(website_name, "misses")
+	if response.status_code == 200:
+		cache.put(
+			key,
+			response.content,
+			etag=response.headers.get("ETag", ""),
+			last_modified=response.headers.get("Last-Modified", ""),
+			content_type=response.headers.get("Content-Type", "")
+		)
+
+	return response
+
+def fetch_count(website_name: str) -> int:
+	# pages requested through fetch(), whether served from the cache or the network
+	with _cache_stats_lock:
+		return _fetch_counts[website_name]
+
+def cache_stats(website_name: str) -> Dict[str, int]:
+	with _cache_stats_lock:
+		stats = Counter(_cache_stats.get(website_name, {}))
+
+	lookups = stats["hits"] + stats["revalidated"] + stats["misses"]
+	return {
+		"hits": stats["hits"],
+		"revalidated": stats["revalidated"],
+		"misses": stats["misses"],
+		"hit_rate": round((stats["hits"] + stats["revalidated"]) / lookups, 3) if lookups else 0.0
+	}
+
+def log_cache_stats(website_name: str):
+	if get_response_cache() is None:
+		return
+
+	stats = cache_stats(website_name)
+	logger.info(
+		f"HTTP cache for {website_name}: {stats['hits']} hits, {stats['revalidated']} revalidated (304), "
+		f"{stats['misses']} misses, hit rate {stats['hit_rate']:.1%}"
+	)
+
+def connection_stats(website_name: str) -> Dict[str, int]:
+	requests_count = 0
+	connections_count = 0
+
+	session = _sessions.get(website_name)
+	if session:
+		for adapter in set(session.adapters.values()):
+			pools = adapter.poolmanager.pools
+			for key in pools.keys():
+				pool = pools.get(key)
+				if pool is None:
+					continue
+				requests_count += pool.num_requests
+				connections_count += pool.num_socket_connects
+
+	return {
+		"requests": requests_count,
+		"connections": connections_count,
+		"reused": max(requests_count - connections_count, 0)
+	}
+
+def log_connection_stats(website_name: str):
+	stats = connection_stats(website_name)
+	logger.info(
+		f"HTTP connections for {website_name}: {stats['requests']} requests over "
+		f"{stats['connections']} connections ({stats['reused']} reused)"
+	)
+
+def close_sessions():
+	global _response_cache
+
+	with _sessions_lock:
+		for session in _sessions.values():
+			session.close()
+		_sessions.clear()
+
+	with _response_cache_lock:
+		if _response_cache is not None:
+			_response_cache.close()
+			_response_cache = None
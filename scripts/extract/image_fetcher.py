@@ -0,0 +1,328 @@
+"""
+Download the product images referenced by data/processed/product_images.csv into a
+content-addressed store (data/images/<sha[:2]>/<sha>.<ext>) and write the local keys back
+into the images table.
+
+	python -m scripts.extract.image_fetcher --workers 16
+	python -m scripts.extract.image_fetcher --revalidate   # conditional requests for stored images
+
+Images already in the store are not downloaded again, so an interrupted run simply resumes.
+Thumbnails need Pillow and are skipped when it is not installed.
+"""
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import csv
+import datetime
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from scripts.extract import http_client
+from utils import helpers
+from utils.image_keys import DEFAULT_STORE_DIRECTORY, canonical_image_url
+
+try:
+	from PIL import Image
+except ImportError:
+	Image = None
+
+logger = logging.getLogger(__name__)
+config = helpers.load_webconfig("webs_config.yml")
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DEFAULT_IMAGES_TABLE = "data/processed/product_images.csv"
+DEFAULT_WORKERS = 16
+DEFAULT_THUMBNAIL_SIZES = [160, 480]
+THUMBNAIL_QUALITY = 85
+
+CONTENT_TYPE_EXTENSIONS = {
+	"image/jpeg": "jpg",
+	"image/png": "png",
+	"image/webp": "webp",
+	"image/gif": "gif",
+	"image/avif": "avif",
+	"image/svg+xml": "svg",
+}
+
+def _resolve(directory: str) -> str:
+	return directory if os.path.isabs(directory) else os.path.join(BASE_DIR, directory)
+
+class ImageStore:
+	"""
+	Image files named by the sha256 of their content, so the same picture used by several
+	brands or served in several sizes is stored once.
+
+	`index.jsonl` is an append-only log of canonical url -> key, validators and fetch time,
+	the last line of a url wins. It is rewritten compactly by `save`.
+	"""
+
+	def __init__(self, directory: str = DEFAULT_STORE_DIRECTORY):
+		self.directory = _resolve(directory)
+		os.makedirs(self.directory, exist_ok=True)
+
+		self.index_path = os.path.join(self.directory, "index.jsonl")
+		self._lock = threading.Lock()
+		self._entries: Dict[str, Dict] = {}
+
+		if os.path.isfile(self.index_path):
+			with open(self.index_path, encoding="utf-8") as f:
+				for line in f:
+					try:
+						entry = json.loads(line)
+					except json.JSONDecodeError:
+						continue # a line cut short by an interrupted run
+					self._entries[entry["url"]] = entry
+
+		self._log = open(self.index_path, "a", encoding="utf-8")
+
+	def path_for(self, key: str) -> str:
+		return os.path.join(self.directory, key)
+
+	def lookup(self, url: str) -> Optional[Dict]:
+		with self._lock:
+			entry = self._entries.get(canonical_image_url(url))
+		if entry and os.path.isfile(self.path_for(entry["key"])):
+			return entry
+		return None
+
+	def key_for(self, url: str) -> str:
+		entry = self.lookup(url)
+		return entry["key"] if entry else ""
+
+	def put(self, url: str, content: bytes, content_type: str = "", etag: str = None,
+			last_modified: str = None) -> Tuple[str, bool]:
+		"""
+		Store the image and return (key, True when the same content was already stored).
+		"""
+		digest = hashlib.sha256(content).hexdigest()
+		extension = CONTENT_TYPE_EXTENSIONS.get(content_type.split(";")[0].strip().lower())
+		if not extension:
+			extension = os.path.splitext(urlsplit(url).path)[1].lstrip(".").lower() or "bin"
+		key = f"{digest[:2]}/{digest}.{extension}"
+
+		path = self.path_for(key)
+		duplicate = os.path.isfile(path)
+		if not duplicate:
+			os.makedirs(os.path.dirname(path), exist_ok=True)
+			tmp_path = f"{path}.{threading.get_ident()}.tmp"
+			with open(tmp_path, "wb") as f:
+				f.write(content)
+			os.replace(tmp_path, path)
+
+		# the file is on disk before the index points at it
+		self._record(url, key, etag, last_modified)
+		return key, duplicate
+
+	def touch(self, url: str, etag: str = None, last_modified: str = None):
+		entry = self.lookup(url)
+		if entry:
+			self._record(url, entry["key"], etag or entry.get("etag"), last_modified or entry.get("last_modified"))
+
+	def _record(self, url: str, key: str, etag: str, last_modified: str):
+		entry = {
+			"url": canonical_image_url(url),
+			"key": key,
+			"etag": etag,
+			"last_modified": last_modified,
+			"fetched_at": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+		}
+		with self._lock:
+			self._entries[entry["url"]] = entry
+			self._log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+			self._log.flush()
+
+	def keys(self) -> List[str]:
+		with self._lock:
+			return sorted({entry["key"] for entry in self._entries.values()})
+
+	def save(self):
+		with self._lock:
+			self._log.close()
+			tmp_path = f"{self.index_path}.tmp"
+			with open(tmp_path, "w", encoding="utf-8") as f:
+				for entry in self._entries.values():
+					f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+			os.replace(tmp_path, self.index_path)
+			self._log = open(self.index_path, "a", encoding="utf-8")
+
+	def close(self):
+		self.save()
+		with self._lock:
+			self._log.close()
+
+def _fetch_image(store: ImageStore, url: str, revalidate: bool) -> str:
+	entry = store.lookup(url)
+	if entry and not revalidate:
+		return "stored"
+
+	headers = {}
+	if entry:
+		if entry.get("etag"):
+			headers["If-None-Match"] = entry["etag"]
+		if entry.get("last_modified"):
+			headers["If-Modified-Since"] = entry["last_modified"]
+
+	try:
+		# images are stored here, keeping them in the html response cache as well would double the disk use
+		response = http_client.fetch(http_client.session_key(None, url), url, use_cache=False, headers=headers)
+	except Exception as e:
+		logger.error(f"Could not download {url}: {str(e)}")
+		return "failed"
+
+	if response.status_code == 304 and entry:
+		store.touch(url, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+		return "unchanged"
+	if response.status_code != 200 or not response.content:
+		logger.error(f"Image {url} returned status {response.status_code}")
+		return "failed"
+
+	content_type = response.headers.get("Content-Type", "")
+	if content_type and not content_type.startswith("image/"):
+		logger.error(f"Image {url} returned {content_type} instead of an image")
+		return "failed"
+
+	_, duplicate = store.put(url, response.content, content_type, response.headers.get("ETag"),
+					response.headers.get("Last-Modified"))
+	return "deduplicated" if duplicate else "downloaded"
+
+def fetch_images(urls: Iterable[str], store: ImageStore, workers: int = DEFAULT_WORKERS,
+				 revalidate: bool = False) -> Counter:
+	"""
+	Download every distinct image once, variants of the same CDN image count as one.
+	"""
+	by_canonical: Dict[str, str] = {}
+	for url in urls:
+		url = (url or "").strip()
+		if not url:
+			continue
+		if url.startswith("//"):
+			url = "https:" + url
+
+		canonical = canonical_image_url(url)
+		# prefer the original over a resized variant when the data holds both
+		if canonical not in by_canonical or url == canonical:
+			by_canonical[canonical] = url
+
+	stats = Counter()
+	with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="image") as executor:
+		for outcome in executor.map(lambda url: _fetch_image(store, url, revalidate), by_canonical.values()):
+			stats[outcome] += 1
+
+	logger.info(f"Images: {dict(stats)} for {len(by_canonical)} distinct urls")
+	return stats
+
+def thumbnail_path(thumbs_directory: str, size: int, key: str) -> str:
+	return os.path.join(thumbs_directory, str(size), f"{os.path.splitext(key)[0]}.jpg")
+
+def _make_thumbnails(source_path: str, key: str, thumbs_directory: str, sizes: List[int]) -> int:
+	# runs in a worker process
+	created = 0
+	with Image.open(source_path) as image:
+		image = image.convert("RGB")
+		for size in sizes:
+			target = thumbnail_path(thumbs_directory, size, key)
+			if os.path.isfile(target):
+				continue
+
+			thumbnail = image.copy()
+			thumbnail.thumbnail((size, size))
+			os.makedirs(os.path.dirname(target), exist_ok=True)
+			tmp_path = f"{target}.{os.getpid()}.tmp"
+			thumbnail.save(tmp_path, "JPEG", quality=THUMBNAIL_QUALITY)
+			os.replace(tmp_path, target)
+			created += 1
+
+	return created
+
+def generate_thumbnails(store: ImageStore, sizes: List[int] = None, processes: int = None) -> int:
+	if Image is None:
+		logger.warning("Pillow is not installed, skipping thumbnails")
+		return 0
+
+	sizes = sizes or DEFAULT_THUMBNAIL_SIZES
+	thumbs_directory = os.path.join(store.directory, "thumbs")
+	pending = [
+		key for key in store.keys()
+		if not key.endswith(".svg")
+		and not all(os.path.isfile(thumbnail_path(thumbs_directory, size, key)) for size in sizes)
+	]
+	if not pending:
+		return 0
+
+	created = 0
+	with ProcessPoolExecutor(max_workers=processes) as executor:
+		futures = {
+			key: executor.submit(_make_thumbnails, store.path_for(key), key, thumbs_directory, sizes)
+			for key in pending
+		}
+		for key, future in futures.items():
+			try:
+				created += future.result()
+			except Exception as e:
+				logger.error(f"Could not create thumbnails for {key}: {str(e)}")
+
+	logger.info(f"Created {created} thumbnails for {len(pending)} images")
+	return created
+
+def update_images_table(table_path: str, store: ImageStore) -> int:
+	"""
+	Fill the `product_image_key` column of the images table, returns the number of rows with a key.
+	"""
+	with open(table_path, newline="", encoding="utf-8") as f:
+		reader = csv.DictReader(f)
+		fieldnames = list(reader.fieldnames)
+		rows = list(reader)
+
+	if "product_image_key" not in fieldnames:
+		fieldnames.append("product_image_key")
+
+	for row in rows:
+		row["product_image_key"] = store.key_for(row["product_image_url"]) if row["product_image_url"] else ""
+
+	tmp_path = f"{table_path}.tmp"
+	with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+		writer = csv.DictWriter(f, fieldnames=fieldnames)
+		writer.writeheader()
+		writer.writerows(rows)
+	os.replace(tmp_path, table_path)
+
+	return sum(1 for row in rows if row["product_image_key"])
+
+def main():
+	helpers.setup_logger("image_fetcher.log")
+	images_config = config.get("images") or {}
+
+	parser = argparse.ArgumentParser(description="Download product images into the local image store")
+	parser.add_argument("--table", default=images_config.get("table", DEFAULT_IMAGES_TABLE), help="Images table (csv)")
+	parser.add_argument("--store", default=images_config.get("directory", DEFAULT_STORE_DIRECTORY), help="Image store directory")
+	parser.add_argument("--workers", type=int, default=int(images_config.get("workers", DEFAULT_WORKERS)),
+						help="Concurrent downloads")
+	parser.add_argument("--revalidate", action="store_true", help="Check stored images with conditional requests")
+	parser.add_argument("--no-thumbnails", action="store_true", help="Skip thumbnail generation")
+	args = parser.parse_args()
+
+	table_path = _resolve(args.table)
+	with open(table_path, newline="", encoding="utf-8") as f:
+		urls = [row["product_image_url"] for row in csv.DictReader(f)]
+
+	store = ImageStore(args.store)
+	try:
+		stats = fetch_images(urls, store, workers=args.workers, revalidate=args.revalidate)
+		if not args.no_thumbnails:
+			generate_thumbnails(store, images_config.get("thumbnail_sizes") or DEFAULT_THUMBNAIL_SIZES)
+	finally:
+		store.close()
+
+	with_keys = update_images_table(table_path, store)
+	print(f"Images: {dict(stats)}, {with_keys}/{len(urls)} rows of {args.table} have a local key")
+
+	return 1 if stats["failed"] else 0
+
+if __name__ == "__main__":
+	exit(main())
@@ -1,63 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor
+import logging
 import re
-import requests 
+import time
 
 from urllib.error import HTTPError
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
-from utils.helpers import setup_logger
-
-logger = setup_logger("menus_crawling.log")
-config = setup_logger.load_config("webs_config.yml")
-
-def is_parent_category(url_list, parent_url):
-	for u in url_list:
-		parsed_u = urlparse(u)
-    
-		if urlparse(parent_url).path == parsed_u.path:
-			return False 
-
-	return True 
-
-def scrape_website(link, tag_name, menu_selector, filter_keyword):
-	all_product_urls = set() 
-	user_agent = config["user_agent"]
-	
+from scripts.extract import http_client
+from scripts.extract.html_parser import DEFAULT_PARSER, parse_html
+from scripts.extract.url_index import UrlIndex, menu_item_url, normalize_url
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MENU_WORKERS = 16
+
+def scrape_website(link, tag_name, menu_selector, filter_keyword, website_name=None, parser=DEFAULT_PARSER):
 	try: 
-		html = requests.get(
-			link, 
-			headers={
-				'User-Agent': user_agent,
-			}
-		)
-		if html.status_code == 200:
-			bs = BeautifulSoup(html.content, 'html5lib')
-	 
+		html = http_client.fetch(http_client.session_key(website_name, link), link)
+		if html.status_code != 200:
+			logger.warning(f"Menu page {link} returned {html.status_code}")
+			return []
+
+		bs = parse_html(html.content, parser)
 		menu_list = bs.find_all(tag_name, attrs={"class": re.compile(menu_selector)})
 		logger.debug(f"Menu list: {len(menu_list)}")
+
+		index = UrlIndex()
 		for menu in menu_list: 
-			menu_items = menu.find_all('a', href=True)
-   
-			for item in menu_items:
-				url = item['href']
-				if url.startswith('#'):
-					url = item['data-url']
-     
+			for item in menu.find_all('a', href=True):
+				url = menu_item_url(item)
+				if not url:
+					continue
+
 				logger.debug(f"Url: {url}")
-    
 				if filter_keyword == "None" or filter_keyword in url:
-					if not url.startswith('https://'):
-						url = urljoin(link, url)
+					index.add(normalize_url(url, link))
 
-					all_product_urls.add(url) 
-		
-		all_list = list(all_product_urls)
-		unique_list = [url for url in all_list if not is_parent_category(all_list, url)]
-    
-		return unique_list 
+		# parent categories only repeat the products of their subcategories
+		return index.leaves()
 
 	except HTTPError as e:
 		logger.error(f"HTTP Error:", {e.code})
 		if e.code == 403: 
 			logger.warning("Access forbidden")
 
+def scrape_all_websites(websites_config, max_workers=DEFAULT_MENU_WORKERS):
+	"""
+	Discover the leaf category urls of every configured site at the same time.
+	Returns {website_name: [category urls]}, sites that failed map to an empty list.
+	"""
+	def scrape(website_name, site_config):
+		scraping = site_config['scraping']
+		start = time.perf_counter()
+		urls = scrape_website(
+			site_config['path']['website_path'],
+			scraping['tag_name'],
+			scraping['menu_selector'],
+			scraping['filter-keyword'],
+			website_name=website_name,
+			parser=scraping.get('parser', DEFAULT_PARSER)
+		) or []
+		logger.info(f"Found {len(urls)} categories for {website_name} in {time.perf_counter() - start:.2f}s")
+		return urls
+
+	results = {}
+	with ThreadPoolExecutor(max_workers=max_workers) as executor:
+		futures = {
+			website_name: executor.submit(scrape, website_name, site_config)
+			for website_name, site_config in websites_config.items()
+		}
+		for website_name, future in futures.items():
+			try:
+				results[website_name] = future.result()
+			except Exception as e:
+				logger.error(f"Menu discovery failed for {website_name}: {str(e)}")
+				results[website_name] = []
 
+	return results
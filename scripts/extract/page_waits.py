@@ -0,0 +1,137 @@
+import logging
+import time
+from typing import Dict
+
+from selenium.common.exceptions import WebDriverException
+from utils import helpers
+
+logger = logging.getLogger(__name__)
+config = helpers.load_webconfig("webs_config.yml")
+
+DEFAULT_WAIT_MODE = "adaptive"
+DEFAULT_WAIT_TIMEOUT = 5 # seconds
+DEFAULT_IDLE_WINDOW = 0.5 # seconds without pending requests before the network counts as idle
+POLL_INTERVAL = 0.1
+
+# counts in-flight XHR / fetch requests of the current document
+NETWORK_TRACKER_SCRIPT = """
+	if (!window.__bytesmePending) {
+		window.__bytesmePending = {count: 0};
+		var pending = window.__bytesmePending;
+		var send = XMLHttpRequest.prototype.send;
+		XMLHttpRequest.prototype.send = function() {
+			pending.count++;
+			this.addEventListener('loadend', function() { pending.count--; });
+			return send.apply(this, arguments);
+		};
+		if (window.fetch) {
+			var fetch = window.fetch;
+			window.fetch = function() {
+				pending.count++;
+				return fetch.apply(this, arguments).finally(function() { pending.count--; });
+			};
+		}
+	}
+"""
+
+PAGE_STATE_SCRIPT = """
+	var pending = window.__bytesmePending ? window.__bytesmePending.count : 0;
+	return [document.readyState, document.querySelectorAll(arguments[0]).length, pending];
+"""
+
+def wait_config(scraping_config: Dict) -> Dict:
+	"""
+	Global `selenium.waits` settings overridden by the site's `scraping.waits` block.
+	"""
+	global_config = (config.get("selenium") or {}).get("waits") or {}
+	merged = {**global_config, **(scraping_config.get("waits") or {})}
+
+	return {
+		"mode": merged.get("mode", DEFAULT_WAIT_MODE),
+		"timeout": float(merged.get("timeout", DEFAULT_WAIT_TIMEOUT)),
+		"idle_window": float(merged.get("idle_window", DEFAULT_IDLE_WINDOW)),
+	}
+
+class PageWaiter:
+	"""
+	Replaces the fixed sleeps of the Selenium crawls: in adaptive mode a wait ends as soon as the
+	product card count grows, the network goes idle or the timeout passes, whichever comes first.
+	"""
+
+	def __init__(self, driver, card_selector: str, scraping_config: Dict):
+		self.driver = driver
+		self.card_selector = card_selector
+		settings = wait_config(scraping_config)
+		self.mode = settings["mode"]
+		self.timeout = settings["timeout"]
+		self.idle_window = settings["idle_window"]
+
+		self.waited = 0.0
+		self.fixed_equivalent = 0.0
+
+	def install(self):
+		# must run again after every navigation since the tracker lives in the page
+		try:
+			self.driver.execute_script(NETWORK_TRACKER_SCRIPT)
+		except WebDriverException as e:
+			logger.debug(f"Could not install the network tracker: {str(e)}")
+
+	def count_cards(self) -> int:
+		try:
+			return self.driver.execute_script(PAGE_STATE_SCRIPT, self.card_selector)[1]
+		except WebDriverException:
+			return 0
+
+	def wait(self, fixed_seconds: float, previous_count: int = None) -> str:
+		self.fixed_equivalent += fixed_seconds
+		start = time.perf_counter()
+
+		if self.mode == "fixed":
+			time.sleep(fixed_seconds)
+			reason = "fixed"
+		else:
+			reason = self._wait_adaptive(min(self.timeout, fixed_seconds), previous_count)
+
+		elapsed = time.perf_counter() - start
+		self.waited += elapsed
+		logger.debug(f"Waited {elapsed:.2f}s ({reason}) instead of {fixed_seconds}s")
+
+		return reason
+
+	def _wait_adaptive(self, timeout: float, previous_count: int = None) -> str:
+		deadline = time.perf_counter() + timeout
+		idle_since = None
+
+		while time.perf_counter() < deadline:
+			try:
+				ready_state, card_count, pending = self.driver.execute_script(PAGE_STATE_SCRIPT, self.card_selector)
+			except WebDriverException:
+				return "error"
+
+			if previous_count is not None and card_count > previous_count:
+				return "cards"
+
+			now = time.perf_counter()
+			if ready_state == "complete" and pending <= 0:
+				idle_since = idle_since or now
+				if now - idle_since >= self.idle_window:
+					return "idle"
+			else:
+				idle_since = None
+
+			time.sleep(POLL_INTERVAL)
+
+		return "timeout"
+
+	def log_summary(self, url: str):
+		logger.info(
+			f"Waited {self.waited:.1f}s on {url} instead of {self.fixed_equivalent:.1f}s of fixed sleeps "
+			f"(saved {self.fixed_equivalent - self.waited:.1f}s, mode: {self.mode})"
+		)
+
+def card_css_selector(scraping_config: Dict) -> str:
+	# `product_selector` holds a class (".menu-item-single") matched on `product_tag` elements
+	product_selector = scraping_config["product_selector"]
+	if product_selector.startswith("."):
+		return f"{scraping_config['product_tag']}{product_selector}"
+	return product_selector
@@ -0,0 +1,147 @@
+from dataclasses import asdict
+import csv
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Dict, Set
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DEFAULT_SINK_DIRECTORY = "data/raw"
+
+# column layout of data/raw/*_products.csv read by the transform pipeline
+RAW_COLUMNS = [
+	'product_name', 'product_url', 'product_brand', 'original_category', 'product_image',
+	'product_image_type', 'product_image_name', 'product_code', 'product_description',
+	'product_unit_price', 'product_currency', 'product_discount_percentage', 'product_total_orders',
+	'product_stock_quantity', 'product_total_ratings', 'product_overall_stars'
+]
+
+def _join(value) -> str:
+	if isinstance(value, list):
+		return '|'.join(str(item) for item in value)
+	return str(value) if value is not None else ""
+
+def to_raw_row(product) -> Dict:
+	return {
+		'product_name': product.product_name,
+		'product_url': product.product_url,
+		'product_brand': product.product_band,
+		'original_category': _join(product.category_name),
+		'product_image': _join(product.product_image),
+		'product_image_type': product.product_image_type,
+		'product_image_name': _join(product.product_image_name),
+		'product_code': product.product_code,
+		'product_description': product.product_description,
+		'product_unit_price': product.product_unit_price,
+		'product_currency': '₫',
+		'product_discount_percentage': product.product_discount_percent,
+		'product_total_orders': product.product_total_orders,
+		'product_stock_quantity': product.product_stock_quantity,
+		'product_total_ratings': product.product_total_ratings,
+		'product_overall_stars': product.product_overall_stars
+	}
+
+class ProductSink:
+	"""
+	Append-only output for scraped products, written as soon as each product is extracted.
+
+	A checkpoint log next to the output records which product urls were written for which
+	category and which categories finished. With `resume` an interrupted crawl continues the
+	output where it stopped, otherwise the output and its checkpoint start over.
+	"""
+
+	def __init__(self, name: str, fmt: str = "csv", directory: str = DEFAULT_SINK_DIRECTORY, resume: bool = False):
+		if fmt not in ("csv", "jsonl"):
+			raise ValueError(f"Unsupported sink format: {fmt}")
+
+		directory = directory if os.path.isabs(directory) else os.path.join(BASE_DIR, directory)
+		os.makedirs(directory, exist_ok=True)
+
+		self.fmt = fmt
+		self.path = os.path.join(directory, f"{name}_products.{fmt}")
+		self.checkpoint_path = os.path.join(directory, f"{name}_products.checkpoint")
+		self.written = 0
+
+		self._lock = threading.Lock()
+		self._completed: Set[str] = set()
+		self._seen: Dict[str, Set[str]] = {}
+		if resume:
+			self._load_checkpoint()
+
+		mode = "a" if resume else "w"
+		write_header = fmt == "csv" and (not resume or not os.path.isfile(self.path) or os.path.getsize(self.path) == 0)
+		self._file = open(self.path, mode, newline="", encoding="utf-8")
+		self._checkpoint = open(self.checkpoint_path, mode, encoding="utf-8")
+		if fmt == "csv":
+			self._writer = csv.DictWriter(self._file, fieldnames=RAW_COLUMNS)
+			if write_header:
+				self._writer.writeheader()
+				self._file.flush()
+
+	def _load_checkpoint(self):
+		if not os.path.isfile(self.checkpoint_path):
+			return
+
+		with open(self.checkpoint_path, encoding="utf-8") as f:
+			for line in f:
+				parts = line.rstrip("\n").split("\t")
+				if len(parts) == 3 and parts[0] == "product":
+					self._seen.setdefault(parts[1], set()).add(parts[2])
+				elif len(parts) == 2 and parts[0] == "done":
+					self._completed.add(parts[1])
+
+		logger.info(
+			f"Resuming {self.path}: {len(self._completed)} finished categories, "
+			f"{sum(len(urls) for urls in self._seen.values())} products already written"
+		)
+
+	def is_category_done(self, category_url: str) -> bool:
+		return category_url in self._completed
+
+	def has_product(self, category_url: str, product_url: str) -> bool:
+		with self._lock:
+			return product_url in self._seen.get(category_url, ())
+
+	def write(self, product, category_url: str):
+		with self._lock:
+			seen = self._seen.setdefault(category_url, set())
+			if product.product_url in seen:
+				return
+
+			if self.fmt == "csv":
+				self._writer.writerow(to_raw_row(product))
+			else:
+				self._file.write(json.dumps(asdict(product), ensure_ascii=False) + "\n")
+			self._file.flush()
+
+			# the row is on disk before it is checkpointed, a crash in between only repeats it
+			self._checkpoint.write(f"product\t{category_url}\t{product.product_url}\n")
+			self._checkpoint.flush()
+
+			seen.add(product.product_url)
+			self.written += 1
+
+	def complete_category(self, category_url: str):
+		with self._lock:
+			self._checkpoint.write(f"done\t{category_url}\n")
+			self._checkpoint.flush()
+			self._completed.add(category_url)
+			# finished categories are skipped entirely on resume, their urls are no longer needed
+			self._seen.pop(category_url, None)
+
+	def close(self):
+		with self._lock:
+			self._file.close()
+			self._checkpoint.close()
+
+		logger.info(f"Wrote {self.written} products to {self.path}")
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc):
+		self.close()
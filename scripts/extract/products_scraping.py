@@ -1,11 +1,24 @@
-from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+import datetime
 import json
-import re
+import logging
+import queue
+import threading
 import time
-from typing import Dict, List
+from typing import Any, Dict, List
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
-import requests
+from scripts.extract import crawl_archive, http_client
+from scripts.extract.card_harvest import CardHarvester, HarvestedCard
+from scripts.extract.driver_pool import DriverUnavailable, get_driver_pool
+from scripts.extract.extraction_plan import (
+	DIGIT_PATTERN, FILE_EXTENSION_PATTERN, NON_DIGIT_PATTERN, STYLE_URL_PATTERN, XR_SCRIPT_PATTERN, ExtractionPlan, get_plan
+)
+from scripts.extract.html_parser import DEFAULT_PARSER, parse_html
+from scripts.extract.page_waits import PageWaiter, card_css_selector
+from scripts.extract.product_sink import ProductSink
+from scripts.extract.scrape_manifest import content_hash, get_manifest
 from utils import helpers
 
 from selenium.webdriver.common.by import By
@@ -15,14 +28,56 @@ from selenium.webdriver.support import expected_conditions as EC
 
 import time 
 
-logger = helpers.setup_logger("products_scraping.log")
+logger = logging.getLogger(__name__)
 config = helpers.load_webconfig("webs_config.yml")
-user_agent = config["user_agent"]
 
 SCROLL_PAUSE_TIME = 3
 SLEEP_TIME = 5
 
-@dataclass 
+DEFAULT_API_MAX_PAGES = 50
+
+DEFAULT_DETAIL_WORKERS = 1
+DEFAULT_MAX_PER_HOST = 4
+
+# shared across extractors so that several categories of the same site
+# crawled at once still respect the per-host limit
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+def _host_semaphore(host: str, limit: int) -> threading.BoundedSemaphore:
+	with _host_semaphores_lock:
+		if host not in _host_semaphores:
+			_host_semaphores[host] = threading.BoundedSemaphore(limit)
+		return _host_semaphores[host]
+
+def _resolve_path(data: Any, path: str) -> Any:
+	"""
+	Read a dotted path from decoded JSON, e.g. "variants.0.price". A "*" segment maps the rest
+	of the path over every element of a list ("images.*.src").
+	"""
+	if not path:
+		return data
+
+	key, _, rest = path.partition(".")
+	if key == "*":
+		if not isinstance(data, list):
+			return []
+		values = [_resolve_path(item, rest) for item in data]
+		return [value for value in values if value not in (None, "")]
+
+	if isinstance(data, list):
+		try:
+			data = data[int(key)]
+		except (ValueError, IndexError):
+			return None
+	elif isinstance(data, dict):
+		data = data.get(key)
+	else:
+		return None
+
+	return _resolve_path(data, rest) if rest and data is not None else data
+
+@dataclass(slots=True)
 class ProductInfo:
 	product_name: str
 	product_url: str
@@ -48,15 +103,47 @@ class ProductExtractor:
  	Extract products for both pagination and progressive loading techniques
   	"""
 
-	def __init__(self, websites_config: Dict, website_name: str, category_url: str):
+	def __init__(self, websites_config: Dict, website_name: str, category_url: str, incremental: bool = False,
+			  sink: ProductSink = None):
 		self.website_config = websites_config.get(website_name, {}) 
 		self.website_name = website_name
 		self.scraping_config = self.website_config.get('scraping', {})
 		self.need_handle_popups = False 
 		self.category_url = category_url
+		self.parser_backend = self.scraping_config.get("parser", DEFAULT_PARSER)
+		# "targeted" builds only the subtrees the compiled selectors read, the full tree is the fallback
+		self.targeted_parse = self.scraping_config.get("parse_mode", "full") == "targeted"
+
+		# incremental mode: unchanged detail pages reuse the row stored in the site's manifest
+		self.manifest = get_manifest(website_name) if incremental else None
+		self.delta_report = None
+		# set when a listing page, tab or API page could not be read, the category's product list is then
+		# incomplete and its missing products must not be reported as vanished
+		self.listing_failed = False
+
+		# streaming mode: every product is appended to the sink as soon as it is extracted and not kept,
+		# the crawl methods then return empty lists and only `products_count` tells what was extracted
+		self.sink = sink
+		self.products_count = 0
+		self._count_lock = threading.Lock()
+
+		# light card fields harvested in the browser by tab-based crawls, by product url
+		self.harvested_cards: Dict[str, HarvestedCard] = {}
+
+		# false for urls found without a listing (sitemaps), `category_url` then names no category
+		self.from_listing = True
+
+	@property
+	def plan(self) -> ExtractionPlan:
+		# compiled on first use, once per site, so that sites without detail selectors still crawl listings
+		return get_plan(self.website_name, self.scraping_config)
 
 	def process_pages(self) -> List[ProductInfo]:
 		logger.info(f"Extracting products from: ({self.category_url})")
+
+		if self.sink and self.sink.is_category_done(self.category_url):
+			logger.info(f"Category already finished in {self.sink.path}, skipping: {self.category_url}")
+			return []
 	
 		all_products = []
 		first_page = self.category_url 
@@ -66,58 +153,159 @@ class ProductExtractor:
 			all_products = self._crawl_pagination(first_page)
 		elif loading_type == "single-page":
 			all_products = self._crawl_single_page(first_page)	 
+		elif loading_type in ("progressive", "tab-based") and crawl_archive.is_replaying():
+			all_products = self._replay_snapshots(first_page)
 		elif loading_type == "progressive":
 			all_products = self._crawl_progessive(first_page)
 		elif loading_type == "tab-based":
 			all_products = self._crawl_tab_based(first_page)
+		elif loading_type == "api":
+			all_products = self._crawl_api(first_page)
    
-		logger.info(f"Products count: {len(all_products) if all_products else 0}")
+		return self._finish_category(all_products)
+
+	def extract_urls(self, product_urls: List[str], modified_at: Dict[str, datetime.datetime] = None) -> List[ProductInfo]:
+		"""
+		Extract product urls found without a listing crawl, e.g. in the site's sitemap.
+		In incremental runs a page whose `modified_at` is not newer than its last scrape reuses the stored row unfetched.
+		"""
+		logger.info(f"Extracting {len(product_urls)} product urls for: ({self.category_url})")
+		self.from_listing = False
+
+		if self.sink and self.sink.is_category_done(self.category_url):
+			logger.info(f"Category already finished in {self.sink.path}, skipping: {self.category_url}")
+			return []
+
+		modified_at = modified_at or {}
+		all_products = []
+		stale_urls = []
+		for product_url in product_urls:
+			previous_row = None
+			if self.manifest:
+				previous_row = self.manifest.lookup_unmodified(product_url, modified_at.get(product_url), self.category_url)
+			if previous_row is None:
+				stale_urls.append(product_url)
+			elif not (self.sink and self.sink.has_product(self.category_url, product_url)):
+				product = self._emit(ProductInfo(**previous_row))
+				if product:
+					all_products.append(product)
+
+		if len(stale_urls) < len(product_urls):
+			logger.info(f"{len(product_urls) - len(stale_urls)} products not modified since their last scrape")
+		all_products.extend(self._extract_many_product_details(stale_urls))
+
+		return self._finish_category(all_products)
+
+	def _finish_category(self, all_products: List[ProductInfo]) -> List[ProductInfo]:
+		logger.info(f"Products count: {self.products_count}")
+		http_client.log_connection_stats(self.website_name)
+		http_client.log_cache_stats(self.website_name)
+
+		if self.manifest:
+			complete = self.products_count > 0 and not self.listing_failed
+			if not complete:
+				logger.warning(f"Listing of {self.category_url} failed or came back empty, not looking for vanished products")
+			self.delta_report = self.manifest.finish_category(self.category_url, detect_vanished=complete)
+
+		# an empty result may be a failed crawl, leave it to be retried on resume
+		if self.sink and self.products_count:
+			self.sink.complete_category(self.category_url)
  
 		return all_products
 
+	def _emit(self, product: ProductInfo) -> ProductInfo:
+		if not product:
+			return None
+
+		with self._count_lock:
+			self.products_count += 1
+		if self.sink:
+			self.sink.write(product, self.category_url)
+			return None
+		return product
+
+	def _parse_listing_page(self, markup) -> BeautifulSoup:
+		strainer = self.plan.listing_strainer if self.targeted_parse else None
+		if strainer is not None:
+			bs = parse_html(markup, self.parser_backend, parse_only=strainer)
+			if bs.find(self.plan.card_tag, class_=self.plan.card_class):
+				return bs
+			logger.info("No product cards in the partial tree, parsing the full listing page")
+
+		return parse_html(markup, self.parser_backend)
+
+	def _page_source(self, driver, url: str, label: str = "") -> str:
+		html = driver.page_source
+		archive = crawl_archive.get_archive()
+		if archive and archive.mode == crawl_archive.RECORD:
+			archive.record_snapshot(url, html, label)
+		return html
+
+	def _replay_snapshots(self, url: str) -> List[ProductInfo]:
+		"""
+		Browser crawls are replayed from the page sources recorded after each tab click or load more,
+		not by repeating the clicks.
+		"""
+		snapshots = crawl_archive.get_archive().snapshots(url)
+		if not snapshots:
+			logger.warning(f"No recorded snapshots for {url}")
+			self.listing_failed = True
+			return []
+
+		products_info = []
+		processed_urls = set()
+		for html in snapshots:
+			products = self._crawl_each_page(self._parse_listing_page(html))
+			if products:
+				products_info.extend(self._add_products(products, processed_urls))
+
+		logger.info(f"Replayed {len(snapshots)} snapshots of {url}")
+		return products_info
+
 	def _crawl_single_page(self, product_url: str) -> List[ProductInfo]:
 		logger.info(f"Starting single page extraction from: {product_url}")
 	
 		try:
-			headers = {
-				'User-Agent': config["http"]["user_agent"],
-				'Connection': 'keep-alive'
-			}
-			html = requests.get(product_url, headers=headers)
-			if html.status_code == 200:
-				bs = BeautifulSoup(html.content, "html5lib") 
+			html = http_client.fetch(self.website_name, product_url)
+			if html.status_code != 200:
+				logger.error(f"Single page {product_url} returned status {html.status_code}")
+				self.listing_failed = True
+				return []
+			bs = self._parse_listing_page(html.content)
 			
 			# Extract all products from the single page
+			extracted_before = self.products_count
 			products = self._crawl_each_page(bs)
 			
-			if not products:
+			if self.products_count == extracted_before:
 				logger.warning("No products found on the single page")
 				return []
 				
-			logger.info(f"Successfully extracted {len(products)} products from single page")
+			logger.info(f"Successfully extracted {self.products_count - extracted_before} products from single page")
 			return products
 
 		except Exception as e:
 			logger.error(f"Error occurred when extracting products from single page: {str(e)}")
+			self.listing_failed = True
 			return []
     
-	def _hanlde_popups(self):
+	def _hanlde_popups(self, driver):
 		if not self.need_handle_popups:
 		# cookies popup 
 			try:
-				WebDriverWait(user_agent, 10).until(
+				WebDriverWait(driver, 10).until(
 				    EC.presence_of_element_located((By.ID, "CybotCookiebotDialog"))
 				)
-				allow_all_button = user_agent.find_element(By.ID, "CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll")
+				allow_all_button = driver.find_element(By.ID, "CybotCookiebotDialogBodyLevelButtonLevelOptinAllowAll")
 				allow_all_button.click()
-				WebDriverWait(user_agent, 5).until(
+				WebDriverWait(driver, 5).until(
 				    EC.invisibility_of_element_located((By.ID, "CybotCookiebotDialog"))
 				)
 			except Exception as e:
 				logger.warning(f"Cookies popup not found or failed to close: {str(e)}")
 
 			try: 
-				close_button = WebDriverWait(user_agent, 10).until(
+				close_button = WebDriverWait(driver, 10).until(
 					EC.element_to_be_clickable((By.CSS_SELECTOR, "div[class^='storefront-sdk-emotion'] button"))
 				)
 				close_button.click()
@@ -138,67 +326,68 @@ class ProductExtractor:
 
 	def _crawl_tab_based(self, url: str) -> List[ProductInfo]:
 		try:
-			user_agent.get(url)
+			with get_driver_pool().lease(url) as driver:
+				return self._crawl_tabs(driver, url)
+		except DriverUnavailable as e:
+			logger.error(f"Could not lease a Chrome driver for {url}: {str(e)}")
+			self.listing_failed = True
+			return []
+
+	def _crawl_tabs(self, driver, url: str) -> List[ProductInfo]:
+		try:
+			driver.get(url)
 			logger.info(f"Loading page: {url}")
-			time.sleep(3)
-			self._hanlde_popups()
+			waiter = PageWaiter(driver, card_css_selector(self.scraping_config), self.scraping_config)
+			waiter.install()
+			waiter.wait(3)
+			self._hanlde_popups(driver)
 
 			products_info = []
 			processed_url = set()
+			# recorded crawls keep reading page sources, replay needs them
+			harvester = None
+			if self.scraping_config.get("card_harvest") == "browser" and not crawl_archive.is_recording():
+				harvester = CardHarvester(driver, card_css_selector(self.scraping_config))
    
 			logger.info("Waiting for tabs to be loaded ...")
 			try: 
-				tabs = WebDriverWait(user_agent, 15).until(
+				tabs = WebDriverWait(driver, 15).until(
 				    EC.presence_of_all_elements_located((By.CSS_SELECTOR, self.scraping_config["subcategory_selector"]))
 				)
 				logger.debug(f"Found {len(tabs)} tabs")
 	   
 				# extract products from the initial page 
-				html = user_agent.page_source 
-				bs = BeautifulSoup(html, 'html5lib')
-				initial_products = self._crawl_each_page(bs)
-				if initial_products:
-					products_info.extend(self._add_products(initial_products, processed_url))
+				products_info.extend(self._collect_tab(driver, url, "initial", harvester, processed_url))
     
 				for i in range(1, len(tabs)): 
 					try: 
 					
-						user_agent.execute_script("arguments[0].click();", tabs[i])
-						WebDriverWait(user_agent, 15).until(
+						driver.execute_script("arguments[0].click();", tabs[i])
+						WebDriverWait(driver, 15).until(
 						    EC.presence_of_all_elements_located((By.CSS_SELECTOR, self.scraping_config["product_selector"]))
 						)
 
-						html = user_agent.page_source
-						bs = BeautifulSoup(html, 'html5lib')
-						products = self._crawl_each_page(bs)
-						if products:
-							products_info.extend(self._add_products(products, processed_url))
+						products_info.extend(self._collect_tab(driver, url, f"tab {i}", harvester, processed_url))
 
 					except ElementClickInterceptedException:
 						logger.warning("Element click intercepted. Retrying...")
-						time.sleep(5)
+						waiter.wait(5)
 
-						user_agent.execute_script("arguments[0].click();", tabs[i])
-						products = WebDriverWait(user_agent, 15).until(
+						driver.execute_script("arguments[0].click();", tabs[i])
+						WebDriverWait(driver, 15).until(
 						    EC.presence_of_all_elements_located((By.CSS_SELECTOR, self.scraping_config["product_selector"]))
 						)
-						
-						if products: 
-							html = user_agent.page_source
-							bs = BeautifulSoup(html, 'html5lib')
-							products_info.extend(self._add_products(products, processed_url))
-						else: 
-							continue
+
+						products_info.extend(self._collect_tab(driver, url, f"tab {i}", harvester, processed_url))
 		      
 			except TimeoutException: 
 				logger.warning("No tabs are founded within the timeout period")
     
-				html = user_agent.page_source
-				bs = BeautifulSoup(html, 'html5lib')
-				products = self._crawl_each_page(bs)
-				if products:
-					products_info.extend(self._add_products(products, processed_url))
-    
+				products_info.extend(self._collect_tab(driver, url, "no tabs", harvester, processed_url))
+
+			waiter.log_summary(url)
+			if harvester:
+				harvester.log_summary(url)
 			return products_info
  
 		except Exception as e:
@@ -207,54 +396,131 @@ class ProductExtractor:
 			logger.error(f"WebDriver error: {error_type} - {error_message}")
 
 			logger.debug("Current URL: " + url)
+			self.listing_failed = True
 			return []
 		
+	def _collect_tab(self, driver, url: str, label: str, harvester: CardHarvester, processed_urls: set) -> List[ProductInfo]:
+		"""
+		Details of the product cards on the current tab that no earlier tab showed,
+		read in the browser by `harvester` or from the page source.
+		"""
+		if harvester:
+			cards = [
+				card for card in harvester.harvest()
+				if not (self.plan.skip_url_pattern and self.plan.skip_url_pattern in card.product_url)
+			]
+			self.harvested_cards.update((card.product_url, card) for card in cards)
+			product_urls = [card.product_url for card in cards]
+		else:
+			html = self._page_source(driver, url, label)
+			product_urls = self._product_urls_from_page(parse_html(html, self.parser_backend))
+
+		new_urls = [product_url for product_url in dict.fromkeys(product_urls) if product_url not in processed_urls]
+		processed_urls.update(new_urls)
+		logger.info(f"{label}: {len(new_urls)} new of {len(product_urls)} product cards")
+
+		return self._extract_many_product_details(new_urls)
+
 	def _crawl_pagination(self, url: str) -> List[ProductInfo]:
-		products = []
-		processed_urls = set()
+		"""
+		Listing pages are walked by a producer thread that queues new product urls as soon as a
+		page is parsed, while the detail pool drains the queue, so both run at the same time.
+		"""
+		url_queue = queue.Queue()
+		listing_done = object()
   
-		page_count = 0
 		max_pages = 20
   
 		next_selector = self.scraping_config["pagination"]["next_selector"]
 		logger.debug(f"Next selector: {next_selector}")
+
+		def walk_listing_pages(url: str):
+			processed_urls = set()
+			visited_pages = set()
+			page_count = 0
+
+			try:
+				while url and url not in visited_pages and page_count < max_pages: 
+					page_count += 1
+					visited_pages.add(url)
+					try:
+						html = http_client.fetch(self.website_name, url)
+						if html.status_code != 200:
+							# an error page is not the end of the listing, later pages were never seen
+							logger.error(f"Listing page {page_count} returned status {html.status_code}: {url}")
+							self.listing_failed = True
+							break
+						bs = self._parse_listing_page(html.content)
+
+						product_urls = self._product_urls_from_page(bs)
+						if not product_urls:
+							# past the last page some shops answer with an empty grid and a next link
+							logger.info(f"Listing page {page_count} has no products, stopping: {url}")
+							break
+
+						queued = 0
+						for product_url in product_urls:
+							if product_url not in processed_urls:
+								processed_urls.add(product_url)
+								url_queue.put(product_url)
+								queued += 1
+						logger.info(f"Listing page {page_count} queued {queued} product urls: {url}")
+
+						next_page = bs.select_one(next_selector)
+						url = urljoin(url, next_page.get('href')) if next_page and next_page.get('href') else None
+					
+					except Exception as e:
+						logger.error(f"Error occured when extracting products: {str(e)}")
+						self.listing_failed = True
+						url = None
+			finally:
+				url_queue.put(listing_done)
 		
 		logger.info("Start pagination crawling ...")
-		
-		while url and page_count < max_pages: 
-			page_count += 1
-			try:
-				headers = {
-					'User-Agent': config["http"]["user_agent"],
-					'Connection': 'keep-alive'
-				}
-				html = requests.get(url, headers=headers)
-				bs = BeautifulSoup(html.content, "html5lib")
-				products_info = self._crawl_each_page(bs)
-				
-				for product in products_info:
-					if product.product_url not in processed_urls:
-						processed_urls.add(product.product_url)
-						products.append(product)
+		start = time.perf_counter()
+		extracted_before = self.products_count
 
-				next_page = bs.select_one(next_selector)
-				if next_page: 
-					url = next_page.get('href')
-				else: 
-					continue
-			
-			except Exception as e:
-				logger.error(f"Error occured when extracting products: str({e})")
+		producer = threading.Thread(target=walk_listing_pages, args=(url,), name=f"{self.website_name}-listing", daemon=True)
+		producer.start()
+
+		workers = max(self._detail_fetch_config()["workers"], 1)
+		futures = []
+		with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{self.website_name}-detail") as executor:
+			while True:
+				product_url = url_queue.get()
+				if product_url is listing_done:
+					break
+				futures.append(executor.submit(self._extract_product_details_limited, product_url))
+
+			products = [future.result() for future in futures]
+
+		producer.join()
+		products = [product for product in products if product]
+		logger.info(
+			f"Pagination crawl fetched {self.products_count - extracted_before}/{len(futures)} product details "
+			f"in {time.perf_counter() - start:.2f}s"
+		)
 				
 		return products
 
 	def _crawl_progessive(self, url: str) -> List[ProductInfo]:
+		try:
+			with get_driver_pool().lease(url) as driver:
+				return self._crawl_load_more(driver, url)
+		except DriverUnavailable as e:
+			logger.error(f"Could not lease a Chrome driver for {url}: {str(e)}")
+			self.listing_failed = True
+			return []
+
+	def _crawl_load_more(self, driver, url: str) -> List[ProductInfo]:
 		try:
 			logger.info(f"Starting progressive extraction from: {url}")
-			user_agent.get(url)
+			driver.get(url)
+			waiter = PageWaiter(driver, card_css_selector(self.scraping_config), self.scraping_config)
+			waiter.install()
 			
 			# wait for the page to be fully loaded 
-			time.sleep(SLEEP_TIME)
+			waiter.wait(SLEEP_TIME)
 
 			products_info = []
 			max_attemps = 5
@@ -263,21 +529,23 @@ class ProductExtractor:
 			while attempt_count < max_attemps:
 				try: 
 					# Try scrolling to make button visible
-					user_agent.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-					time.sleep(SLEEP_TIME)
+					card_count = waiter.count_cards()
+					driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+					waiter.wait(SLEEP_TIME, previous_count=card_count)
 	 
 					# button selector is a CSS selector including both a class and an element
-					load_more_button = user_agent.find_element(By.CSS_SELECTOR, self.scraping_config["button_selector"])
+					load_more_button = driver.find_element(By.CSS_SELECTOR, self.scraping_config["button_selector"])
 					
 					while load_more_button and load_more_button.is_displayed():
 						logger.debug(f"Load More button found: {load_more_button}")
 						
-						user_agent.execute_script("arguments[0].scrollIntoView(true);", load_more_button)
+						driver.execute_script("arguments[0].scrollIntoView(true);", load_more_button)
 						logger.debug("Clicked the Load More button.")
 		 
-						user_agent.execute_script("arguments[0].click();", load_more_button)
-						time.sleep(SCROLL_PAUSE_TIME)
-						load_more_button = user_agent.find_element(By.CSS_SELECTOR, self.scraping_config["button_selector"])
+						card_count = waiter.count_cards()
+						driver.execute_script("arguments[0].click();", load_more_button)
+						waiter.wait(SCROLL_PAUSE_TIME, previous_count=card_count)
+						load_more_button = driver.find_element(By.CSS_SELECTOR, self.scraping_config["button_selector"])
 
 					break 
 						
@@ -290,42 +558,146 @@ class ProductExtractor:
 					attempt_count += 1
 					if attempt_count == max_attemps:
 						break 
-					time.sleep(SCROLL_PAUSE_TIME)
+					waiter.wait(SCROLL_PAUSE_TIME)
 					continue 
  
 			logger.info("Out of the loop")
-			html = user_agent.page_source
-			bs = BeautifulSoup(html, 'html5lib')
+			waiter.log_summary(url)
+			html = self._page_source(driver, url, "loaded")
+			bs = self._parse_listing_page(html)
+			extracted_before = self.products_count
 			current_products = self._crawl_each_page(bs)
-			logger.debug(f"Extracted {len(current_products)} products from the current page.")
-			if not current_products:
+			logger.debug(f"Extracted {self.products_count - extracted_before} products from the current page.")
+			if self.products_count == extracted_before:
 				logger.warning("No products found on the current page.")
 
 			products_info.extend(current_products)
      
 		except Exception as e:
 			logger.error(f"WebDriver error: {str(e)}")
+			self.listing_failed = True
 			return []
-
-		finally: 
-			if user_agent in locals():
-				user_agent.quit()
     
 		return products_info
 
-	def _crawl_each_page(self, bs: BeautifulSoup) -> List[ProductInfo]: 
-		products= []
+	def _crawl_api(self, url: str) -> List[ProductInfo]:
+		"""
+		Read a category straight from the JSON endpoint that backs the site's product grid.
+		"""
+		api_config = self.scraping_config["api"]
+		category_handle = urlparse(url).path.strip('/').split('/')[-1]
+		endpoint = api_config["endpoint"].format(category_url=url.rstrip('/'), category_handle=category_handle)
+
+		page_param = api_config.get("page_param", "page")
+		page = int(api_config.get("start_page", 1))
+		page_size = int(api_config.get("page_size", 0))
+		max_pages = int(api_config.get("max_pages", DEFAULT_API_MAX_PAGES))
+		logger.info(f"Starting API extraction from: {endpoint}")
+
+		products = []
+		processed_urls = set()
+		for _ in range(max_pages):
+			params = {**(api_config.get("params") or {}), page_param: page}
+			try:
+				response = http_client.fetch(self.website_name, endpoint, params=params)
+				if response.status_code != 200:
+					logger.warning(f"API page {page} returned status {response.status_code}")
+					self.listing_failed = True
+					break
+
+				items = _resolve_path(response.json(), api_config.get("items_path", ""))
+			except Exception as e:
+				logger.error(f"Error occured when reading API page {page}: {str(e)}")
+				self.listing_failed = True
+				break
+
+			if not items:
+				break
+
+			for item in items:
+				product = self._product_from_api_item(item, category_handle)
+				if product and product.product_url not in processed_urls:
+					processed_urls.add(product.product_url)
+					product = self._emit(product)
+					if product:
+						products.append(product)
+
+			logger.debug(f"API page {page}: {len(items)} items")
+			if page_size and len(items) < page_size:
+				break
+			page += 1
+
+		return products
+
+	def _product_from_api_item(self, item: Dict, category_handle: str) -> ProductInfo:
+		values = {}
+		for field_name, source in self.scraping_config["api"]["fields"].items():
+			if not isinstance(source, str) or source == "None":
+				continue
+			if source.startswith("literal:"):
+				values[field_name] = source[8:]
+			elif source.startswith("template:"):
+				try:
+					values[field_name] = source[9:].format(**item)
+				except (KeyError, IndexError):
+					values[field_name] = ""
+			else:
+				values[field_name] = _resolve_path(item, source)
+
+		product_name = str(values.get("product_name") or "").strip()
+		product_url = values.get("product_url") or ""
+		if not product_url:
+			logger.warning(f"API item without product url: {product_name}")
+			return None
+		if not product_url.startswith(("https://", "http://")):
+			product_url = urljoin(self.website_config["path"]["website_path"], product_url)
+
+		price = values.get("product_unit_price")
+		if isinstance(price, (int, float)):
+			product_uprice = int(price)
+		else:
+			try:
+				product_uprice = int(float(str(price)))
+			except (TypeError, ValueError):
+				digits = NON_DIGIT_PATTERN.sub('', str(price or ""))
+				product_uprice = int(digits) if digits else 0
+
+		description = str(values.get("product_description") or "")
+		if "<" in description:
+			description = parse_html(description, "html.parser").get_text(" ", strip=True)
+
+		def as_list(value) -> List[str]:
+			if value in (None, ""):
+				return []
+			return [str(v) for v in value] if isinstance(value, list) else [str(value)]
 
-		product_tag = self.scraping_config["product_tag"]
-		product_selector = self.scraping_config["product_selector"]
-		product_cards = bs.find_all(
-	   		product_tag, 
-		  	class_=re.compile(product_selector.replace(".", ""))
+		images = [f"https:{src}" if src.startswith("//") else src for src in as_list(values.get("product_image"))]
+		return ProductInfo(
+			product_name=product_name,
+			product_url=product_url,
+			category_name=as_list(values.get("category_name")) or [category_handle],
+			product_band=self.website_name,
+			product_code=str(values.get("product_code") or ""),
+			product_description=description,
+			product_unit_price=product_uprice,
+			product_image=images,
+			product_image_name=as_list(values.get("product_image_name")) or [product_name for _ in images]
 		)
+
+	def _crawl_each_page(self, bs: BeautifulSoup) -> List[ProductInfo]: 
+		product_urls = self._product_urls_from_page(bs)
+
+		# get detailed product info 
+		return self._extract_many_product_details(product_urls)
+
+	def _product_urls_from_page(self, bs: BeautifulSoup) -> List[str]:
+		plan = self.plan
+		product_cards = bs.find_all(plan.card_tag, class_=plan.card_class)
 		
 		logger.info(f"Found {len(product_cards)} product elements")
 
 		skip_products = 0
+		product_urls = []
 		for card in product_cards:
 			logger.debug(f"Product card: {card}")
 			product_url = card.get('href')
@@ -335,8 +707,7 @@ class ProductExtractor:
 					product_url = anchor.get('href')
 			
 			if product_url:
-				skip_patterns = self.scraping_config["skip_url_patterns"] 
-				if skip_patterns != "None" and skip_patterns in product_url:
+				if plan.skip_url_pattern and plan.skip_url_pattern in product_url:
 					continue  
  
 			logger.debug(f"Product url: {product_url}")
@@ -352,36 +723,106 @@ class ProductExtractor:
 				skip_products += 1
 				continue 
 
-			# get detailed product info 
-			product = self._extract_product_details(product_url)
-			if product: 
-				products.append(product)
+			product_urls.append(product_url)
 
 		logger.warning(f"Skip {skip_products} products")
-		return products 
+		return product_urls
+
+	def _detail_fetch_config(self) -> Dict:
+		fetch_config = self.scraping_config.get("detail_fetch") or {}
+		return {
+			"workers": int(fetch_config.get("workers", DEFAULT_DETAIL_WORKERS)),
+			"max_per_host": int(fetch_config.get("max_per_host", DEFAULT_MAX_PER_HOST)),
+		}
+
+	def _extract_product_details_limited(self, product_url: str) -> ProductInfo:
+		host = urlparse(product_url).netloc
+		with _host_semaphore(host, self._detail_fetch_config()["max_per_host"]):
+			return self._extract_product_details(product_url)
+
+	def _extract_many_product_details(self, product_urls: List[str]) -> List[ProductInfo]:
+		"""
+		Fetch and parse detail pages, in parallel when the site enables `detail_fetch`.
+		Results keep the order of `product_urls`; failed pages are dropped.
+		"""
+		fetch_config = self._detail_fetch_config()
+		workers = min(fetch_config["workers"], len(product_urls))
+
+		start = time.perf_counter()
+		extracted_before = self.products_count
+		if workers <= 1:
+			results = [self._extract_product_details(url) for url in product_urls]
+		else:
+			with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{self.website_name}-detail") as executor:
+				results = list(executor.map(self._extract_product_details_limited, product_urls))
+
+		products = [product for product in results if product]
+		logger.info(
+			f"Fetched {self.products_count - extracted_before}/{len(product_urls)} product details "
+			f"with {max(workers, 1)} worker(s) in {time.perf_counter() - start:.2f}s"
+		)
+		return products
 
 	def _extract_product_details(self, product_url: str) -> ProductInfo:
+		if self.sink and self.sink.has_product(self.category_url, product_url):
+			logger.info(f"Already written before the crawl was interrupted, skipping: {product_url}")
+			if self.manifest:
+				self.manifest.mark_seen(product_url)
+			return None
+
+		product_info = self._fetch_product_details(product_url)
+		if product_info is None and self.manifest:
+			# still listed, a failed detail fetch does not make the product vanish
+			self.manifest.mark_seen(product_url)
+		card = self.harvested_cards.get(product_url)
+		if product_info and card:
+			# the listing card fills what the detail page did not have
+			product_info.product_name = product_info.product_name or card.name
+			if not product_info.product_image and card.image:
+				product_info.product_image = [card.image]
+				product_info.product_image_name = [product_info.product_name]
+
+		return self._emit(product_info)
+
+	def _fetch_product_details(self, product_url: str) -> ProductInfo:
 		try:
 			logger.info(f"Extracting details from: {product_url}")
 
-			headers = {
-				'User-Agent': config["http"]["user_agent"]
-			}
-			html = requests.get(product_url, headers=headers)
-			bs = BeautifulSoup(html.content, "html5lib")
-			detail_selectors = self.scraping_config.get("product_detail_selectors", "")
+			html = http_client.fetch(self.website_name, product_url)
+			if html.status_code != 200:
+				logger.error(f"Detail page {product_url} returned status {html.status_code}")
+				return None
+
+			page_hash = None
+			if self.manifest:
+				page_hash = content_hash(html.content)
+				previous_row = self.manifest.lookup(product_url, page_hash)
+				if previous_row:
+					logger.info(f"Page unchanged since last run, reusing stored row: {product_url}")
+					return ProductInfo(**previous_row)
+
+			strainer = self.plan.detail_strainer if self.targeted_parse else None
+			bs = parse_html(html.content, self.parser_backend, parse_only=strainer)
 
 			# logger.debug("Product detail page HTML content:")
 			# logger.debug(bs.prettify())
 			
-			product_info = self._extract_from_html(bs, detail_selectors, product_url)
+			product_info = self._extract_from_html(bs, product_url)
 			logger.debug(f"Product info check: {product_info}")
+
+			if strainer is not None and not product_info.product_name and not product_info.product_unit_price:
+				logger.info("Partial tree came back empty, parsing the full page")
+				bs = parse_html(html.content, self.parser_backend)
+				product_info = self._extract_from_html(bs, product_url)
    
 			# extract product info from meta tags
 			if not product_info.product_name and not product_info.product_unit_price:
 				logger.info("HTML extraction failed or incomplete, attempting meta extraction...")
 				product_info = self._extract_from_meta(bs, product_url)
 
+			if self.manifest and product_info:
+				self.manifest.record(product_url, page_hash, asdict(product_info), self.category_url)
+
 			return product_info
 
 		except Exception as e:
@@ -389,8 +830,9 @@ class ProductExtractor:
 			logger.error(str(e))
 			return None 
 
-	def _extract_from_html(self, bs, detail_selectors, product_url) -> ProductInfo:
+	def _extract_from_html(self, bs, product_url) -> ProductInfo:
 		logger.info("Extract from HTML")
+		plan = self.plan
 
 		product_name = ""
 		product_description = ""
@@ -400,38 +842,23 @@ class ProductExtractor:
 		categories = []
   
 		# name
-		name_elem = bs.select_one(detail_selectors["name"])
-		
-		if name_elem != "None":
-			product_name = name_elem.text.strip() if name_elem else ""
+		name_elem = plan.name.select_one(bs) if plan.name else None
+		product_name = name_elem.text.strip() if name_elem else ""
 
 		logger.debug(f"Product name: {product_name}")
   
-		if detail_selectors["description"] != "None":
-			product_description = ""
-			description_selectors = detail_selectors["description"]
-			
-			# Check if description_selectors is a string or a list
-			if isinstance(description_selectors, str):
-				# Handle single selector as string
-				description_elem = bs.select_one(description_selectors)
-				if description_elem:
-					product_description = description_elem.text.strip()
-			else:
-				# Handle multiple selectors as list
-				for selector in description_selectors:
-					description_elem = bs.select_one(selector)
-					if description_elem:
-						product_description = description_elem.text.strip()
-						break 
-		else: 
-			product_description = ""
+		# the first description selector that matches wins
+		for selector in plan.descriptions:
+			description_elem = selector.select_one(bs)
+			if description_elem:
+				product_description = description_elem.text.strip()
+				break 
 
 		logger.debug(f"Product description: {product_description}")
   
 		# price, currency
-		if detail_selectors["unit_price"] != "None":
-			price_elem = bs.select_one(detail_selectors["unit_price"])
+		if plan.unit_price:
+			price_elem = plan.unit_price.select_one(bs)
 
 			logger.debug(f"Raw price element HTML: {price_elem}")
 			if price_elem:
@@ -440,28 +867,21 @@ class ProductExtractor:
 					logger.debug(f"Raw price text: {price_text}") 
 
 					# remove currency symbols and commas 
-					cleaned_price_text = re.sub(r'[^\d]', '', price_text)
+					cleaned_price_text = NON_DIGIT_PATTERN.sub('', price_text)
 					
 					if cleaned_price_text.isdigit():
 						product_uprice = int(cleaned_price_text)
 						logger.debug(f"Unit price: {product_uprice}")
 				except Exception as e:
 					logger.error(f"Error parsing price: {str(e)}")
- 
-				except Exception as e: 
-					logger.error(f"Error parsing price: str{e}")
-			else: 
-				product_uprice = 0
 
 		# images
-		images = []
-		image_names = []
-		imgs_con = bs.select_one(detail_selectors.get("image_selector", ""))
+		imgs_con = plan.image_container.select_one(bs) if plan.image_container else None
 		logger.debug(f"Image HTML content: {imgs_con}")
 
 		if imgs_con:
-			if detail_selectors["detail_image"] != "None":
-				imgs = imgs_con.select(detail_selectors["detail_image"])
+			if plan.detail_image:
+				imgs = plan.detail_image.select(imgs_con)
 				logger.debug(f'Image element: {imgs}')
 				
 				for img_div in imgs:
@@ -477,7 +897,7 @@ class ProductExtractor:
 									if name:
 										# clean the title
 										name = name.replace('_optimized', '')
-										name = re.sub(r'\.[^.]+$', '', name)  # remove file extension
+										name = FILE_EXTENSION_PATTERN.sub('', name)  # remove file extension
 										break
 							
 							if not name:
@@ -488,9 +908,6 @@ class ProductExtractor:
 							if not src.startswith("https://"):
 								src = 'https://' + src.lstrip('//')
 
-							# logger.debug(f"Image source: {src}")
-							# logger.debug(f"Image name: {name}")
-
 							if src:
 								images.append(src)
 							if name:
@@ -503,7 +920,7 @@ class ProductExtractor:
 		# specific for the tljus website
 			if 'style' in imgs_con.attrs:
 				style_attr = imgs_con.attrs['style']
-				match = re.search(r'url\(["\']?(.*?)["\']?\)', style_attr)
+				match = STYLE_URL_PATTERN.search(style_attr)
 				if match:
 					src = match.group(1)
 					if not src.startswith("https://"):
@@ -515,19 +932,15 @@ class ProductExtractor:
 			logger.warning(f"No image container found")
     
 		# categories
-		categories = []
-		category_selector = detail_selectors['original_category']
-		if category_selector and category_selector != "None":
-			if isinstance(category_selector, str) and category_selector.startswith("literal:"):
-				category_value = category_selector[8:]
-				categories.append(category_value)
+		if plan.categories_enabled:
+			if plan.category_literal is not None:
+				categories.append(plan.category_literal)
 			else:
-       
-				categories_elem = bs.select_one(category_selector)
+				categories_elem = plan.category.select_one(bs)
 				logger.debug(f"Category list: {categories_elem}")
 
 				if categories_elem:
-					tags = categories_elem.find_all(detail_selectors["category_tag"])
+					tags = categories_elem.find_all(plan.category_tag)
 					for tag in tags:
 						if not tag.__contains__('Sản phẩm nổi bật'):
 							tag_name = tag.get_text(strip=True)
@@ -542,7 +955,7 @@ class ProductExtractor:
 		logger.debug(f"Categories: {categories}")
 
 		# sku 
-		code_elem = bs.select_one(detail_selectors["code"]) if detail_selectors["code"] else ""
+		code_elem = plan.code.select_one(bs) if plan.code else None
 		product_code = code_elem.get_text(strip=True) if code_elem else ""
 		logger.debug(f"SKU: {product_code}")
   
@@ -573,7 +986,7 @@ class ProductExtractor:
 				logger.debug("Found product data in meta tags")
 				
 				product_name = meta_name['content'] if meta_name else ''
-				product_uprice = int(''.join(re.findall(r'\d', meta_price['content']))) if meta_price else 0
+				product_uprice = int(''.join(DIGIT_PATTERN.findall(meta_price['content']))) if meta_price else 0
 				product_image = [meta_image['content']] if meta_image else []
 			
 			# product description 
@@ -582,7 +995,7 @@ class ProductExtractor:
 			for script in scripts:
 				if script.string and 'const xr =' in script.string:
 					try:
-						match = re.search(r'const xr =\s*(\[.*?\]);', script.string, re.DOTALL)
+						match = XR_SCRIPT_PATTERN.search(script.string)
 						if match:
 							json_str = match.group(1)
 							# Parse the JSON array
@@ -596,10 +1009,11 @@ class ProductExtractor:
 					except Exception as e:
 						logger.error(f"Error extracting product description: {str(e)}")
       
-			# product category 			
-			parsed_url = urlparse(self.category_url)
-			path_parts = parsed_url.path.strip('/').split('/')
-			product_category = path_parts[-1] 
+			# product category, the last segment of the listing url
+			product_category = ""
+			if self.from_listing:
+				path_parts = urlparse(self.category_url).path.strip('/').split('/')
+				product_category = path_parts[-1]
 			
 			product = ProductInfo(
 				product_name=product_name,
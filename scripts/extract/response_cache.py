@@ -0,0 +1,143 @@
+from dataclasses import dataclass
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent.parent
+
+DEFAULT_CACHE_DIRECTORY = "data/cache/http"
+DEFAULT_MAX_AGE = 24 * 60 * 60 # seconds
+DEFAULT_MAX_SIZE_MB = 512
+
+@dataclass
+class CachedResponse:
+	url: str
+	body: bytes
+	etag: str
+	last_modified: str
+	content_type: str
+	fetched_at: float
+
+	def age(self) -> float:
+		return time.time() - self.fetched_at
+
+class ResponseCache:
+	"""
+	Persistent url -> response body store with ETag / Last-Modified validators.
+	Entries are evicted least-recently-used first once the total body size exceeds `max_size_bytes`.
+	"""
+
+	def __init__(self, directory: str = DEFAULT_CACHE_DIRECTORY, max_size_bytes: int = DEFAULT_MAX_SIZE_MB * 1024 * 1024):
+		self.directory = directory if os.path.isabs(directory) else os.path.join(BASE_DIR, directory)
+		self.max_size_bytes = max_size_bytes
+		os.makedirs(self.directory, exist_ok=True)
+
+		self._lock = threading.Lock()
+		self._conn = sqlite3.connect(
+			os.path.join(self.directory, "responses.sqlite3"),
+			timeout=30,
+			check_same_thread=False
+		)
+		self._conn.execute("""
+			CREATE TABLE IF NOT EXISTS responses (
+				url TEXT PRIMARY KEY,
+				body BLOB NOT NULL,
+				etag TEXT,
+				last_modified TEXT,
+				content_type TEXT,
+				fetched_at REAL NOT NULL,
+				last_access REAL NOT NULL,
+				size INTEGER NOT NULL
+			)
+		""")
+		self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+		self._conn.commit()
+
+	def get(self, url: str) -> Optional[CachedResponse]:
+		with self._lock:
+			row = self._conn.execute(
+				"SELECT body, etag, last_modified, content_type, fetched_at FROM responses WHERE url = ?",
+				(url,)
+			).fetchone()
+			if row is None:
+				return None
+
+			self._conn.execute("UPDATE responses SET last_access = ? WHERE url = ?", (time.time(), url))
+			self._conn.commit()
+
+		body, etag, last_modified, content_type, fetched_at = row
+		return CachedResponse(url, body, etag or "", last_modified or "", content_type or "", fetched_at)
+
+	def iter_responses(self, url_prefix: str = "") -> Iterator[CachedResponse]:
+		with self._lock:
+			rows = self._conn.execute(
+				"""
+				SELECT url, body, etag, last_modified, content_type, fetched_at FROM responses
+				WHERE substr(url, 1, ?) = ? ORDER BY url
+				""",
+				(len(url_prefix), url_prefix)
+			).fetchall()
+
+		for url, body, etag, last_modified, content_type, fetched_at in rows:
+			yield CachedResponse(url, body, etag or "", last_modified or "", content_type or "", fetched_at)
+
+	def put(self, url: str, body: bytes, etag: str = "", last_modified: str = "", content_type: str = ""):
+		now = time.time()
+		with self._lock:
+			self._conn.execute(
+				"INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+				(url, body, etag, last_modified, content_type, now, now, len(body))
+			)
+			self._conn.commit()
+			self._evict()
+
+	def refresh(self, url: str, etag: str = "", last_modified: str = ""):
+		"""
+		Mark an entry as freshly validated after a 304 response.
+		"""
+		now = time.time()
+		with self._lock:
+			self._conn.execute(
+				"""
+				UPDATE responses
+				SET fetched_at = ?, last_access = ?,
+					etag = COALESCE(NULLIF(?, ''), etag),
+					last_modified = COALESCE(NULLIF(?, ''), last_modified)
+				WHERE url = ?
+				""",
+				(now, now, etag, last_modified, url)
+			)
+			self._conn.commit()
+
+	def total_size(self) -> int:
+		with self._lock:
+			return self._total_size()
+
+	def _total_size(self) -> int:
+		return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+	def _evict(self):
+		total_size = self._total_size()
+		if total_size <= self.max_size_bytes:
+			return
+
+		evicted = 0
+		for url, size in self._conn.execute("SELECT url, size FROM responses ORDER BY last_access").fetchall():
+			if total_size <= self.max_size_bytes:
+				break
+			self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+			total_size -= size
+			evicted += 1
+
+		self._conn.commit()
+		logger.info(f"Evicted {evicted} cached responses, cache size is now {total_size} bytes")
+
+	def close(self):
+		with self._lock:
+			self._conn.close()
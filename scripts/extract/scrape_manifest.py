@@ -0,0 +1,200 @@
+from contextlib import contextmanager
+import datetime
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import re
+import threading
+from typing import Dict, List, Optional
+
+try:
+	import fcntl
+except ImportError: # windows, the manifest is then only safe with one crawl process per site
+	fcntl = None
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = Path(__file__).parent.parent.parent
+DEFAULT_MANIFEST_DIRECTORY = "data/manifests"
+
+# scripts, styles and comments carry nonces / timestamps that change on every request
+_VOLATILE_MARKUP = re.compile(rb"<script\b.*?</script>|<style\b.*?</style>|<!--.*?-->", re.DOTALL | re.IGNORECASE)
+_WHITESPACE = re.compile(rb"\s+")
+
+def content_hash(content: bytes) -> str:
+	normalized = _WHITESPACE.sub(b" ", _VOLATILE_MARKUP.sub(b"", content))
+	return hashlib.sha256(normalized).hexdigest()
+
+class ScrapeManifest:
+	"""
+	Per-site memory of scraped product pages: url -> content hash, last scrape and last seen times and extracted row.
+	Several crawl processes may share a site's manifest, each save merges this process's changes
+	into the file on disk under a file lock instead of overwriting it.
+	"""
+
+	def __init__(self, website_name: str, directory: str = DEFAULT_MANIFEST_DIRECTORY):
+		directory = directory if os.path.isabs(directory) else os.path.join(BASE_DIR, directory)
+		os.makedirs(directory, exist_ok=True)
+
+		self.website_name = website_name
+		self.path = os.path.join(directory, f"{website_name}.json")
+		self._lock = threading.Lock()
+		self._entries: Dict[str, Dict] = self._read()
+		self._run = {"new": [], "changed": [], "unchanged": [], "seen": set()}
+		# entries changed or removed by this process since the last save
+		self._updated = set()
+		self._removed = set()
+
+	def lookup(self, url: str, page_hash: str) -> Optional[Dict]:
+		"""
+		Return the stored product row when the page content did not change since the last run.
+		"""
+		with self._lock:
+			entry = self._entries.get(url)
+			if entry and entry["content_hash"] == page_hash and entry.get("product"):
+				# the page was fetched, its stored row is as fresh as a new scrape
+				entry["scraped_at"] = entry["last_seen"] = _now()
+				self._updated.add(url)
+				self._run["unchanged"].append(url)
+				self._run["seen"].add(url)
+				return entry["product"]
+
+			return None
+
+	def lookup_unmodified(self, url: str, modified_at: Optional[datetime.datetime], category_url: str) -> Optional[Dict]:
+		"""
+		Return the stored product row when the page was last modified (e.g. its sitemap lastmod)
+		before it was last fetched, without fetching it.
+		Reusing a row moves last_seen but not scraped_at, so skipped runs never push the comparison forward.
+		"""
+		if modified_at is None:
+			return None
+
+		with self._lock:
+			entry = self._entries.get(url)
+			# entries written before scraped_at existed are fetched once more
+			if not entry or not entry.get("product") or not entry.get("scraped_at"):
+				return None
+			if modified_at > datetime.datetime.strptime(entry["scraped_at"], '%Y-%m-%d %H:%M:%S'):
+				return None
+
+			entry["last_seen"] = _now()
+			entry["category_url"] = category_url
+			self._updated.add(url)
+			self._run["unchanged"].append(url)
+			self._run["seen"].add(url)
+			return entry["product"]
+
+	def mark_seen(self, url: str):
+		# the page was handled by an earlier, interrupted run and must not be reported as vanished
+		with self._lock:
+			if url in self._entries:
+				self._run["seen"].add(url)
+
+	def record(self, url: str, page_hash: str, product: Dict, category_url: str):
+		with self._lock:
+			previous = self._entries.get(url)
+			if previous is None:
+				self._run["new"].append(url)
+			elif previous["content_hash"] != page_hash:
+				self._run["changed"].append(url)
+			else:
+				self._run["unchanged"].append(url)
+
+			now = _now()
+			self._entries[url] = {
+				"content_hash": page_hash,
+				"scraped_at": now,
+				"last_seen": now,
+				"category_url": category_url,
+				"product": product
+			}
+			self._updated.add(url)
+			self._removed.discard(url)
+			self._run["seen"].add(url)
+
+	def finish_category(self, category_url: str, detect_vanished: bool = True) -> Dict[str, List[str]]:
+		"""
+		Report what changed for one crawled category and persist the manifest.
+		Products of the category that were not seen during this run are reported as vanished and dropped,
+		unless `detect_vanished` is off because the category listing was not read completely.
+		"""
+		with self._lock, self._file_lock():
+			# pick up what other processes saved since this manifest was loaded
+			self._merge()
+			vanished = [
+				url for url, entry in self._entries.items()
+				if entry.get("category_url") == category_url and url not in self._run["seen"]
+			] if detect_vanished else []
+			in_category = lambda url: self._entries.get(url, {}).get("category_url") == category_url
+			report = {
+				"new": [url for url in self._run["new"] if in_category(url)],
+				"changed": [url for url in self._run["changed"] if in_category(url)],
+				"vanished": vanished,
+				"unchanged": len([url for url in self._run["unchanged"] if in_category(url)])
+			}
+			for url in vanished:
+				self._entries.pop(url)
+				self._updated.discard(url)
+				self._removed.add(url)
+
+			self._save()
+
+		logger.info(
+			f"Delta for {self.website_name} ({category_url}): {len(report['new'])} new, "
+			f"{len(report['changed'])} changed, {len(report['vanished'])} vanished, {report['unchanged']} unchanged"
+		)
+		for kind in ("new", "changed", "vanished"):
+			for url in report[kind]:
+				logger.info(f"  {kind}: {url}")
+
+		return report
+
+	def _read(self) -> Dict[str, Dict]:
+		if not os.path.isfile(self.path):
+			return {}
+		with open(self.path, encoding="utf-8") as f:
+			return json.load(f)
+
+	@contextmanager
+	def _file_lock(self):
+		if fcntl is None:
+			yield
+			return
+		with open(f"{self.path}.lock", "w") as lock_file:
+			fcntl.flock(lock_file, fcntl.LOCK_EX)
+			try:
+				yield
+			finally:
+				fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+	def _merge(self):
+		# the file on disk plus this process's own changes, called with the file lock held
+		entries = self._read()
+		for url in self._updated:
+			entries[url] = self._entries[url]
+		for url in self._removed:
+			entries.pop(url, None)
+		self._entries = entries
+
+	def _save(self):
+		tmp_path = f"{self.path}.{os.getpid()}.tmp"
+		with open(tmp_path, "w", encoding="utf-8") as f:
+			json.dump(self._entries, f, ensure_ascii=False, indent=1)
+		os.replace(tmp_path, self.path)
+		self._updated.clear()
+		self._removed.clear()
+
+def _now() -> str:
+	return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+_manifests: Dict[str, ScrapeManifest] = {}
+_manifests_lock = threading.Lock()
+
+def get_manifest(website_name: str) -> ScrapeManifest:
+	with _manifests_lock:
+		if website_name not in _manifests:
+			_manifests[website_name] = ScrapeManifest(website_name)
+		return _manifests[website_name]
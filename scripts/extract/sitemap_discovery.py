@@ -0,0 +1,167 @@
+"""
+Product url discovery from a site's sitemap, a shortcut past the listing crawls.
+
+WooCommerce (Yoast) and Haravan shops publish a sitemap index pointing at product sitemaps whose
+<url> entries carry a <lastmod>. Product urls are picked from the index and its product sitemaps by
+the site's `sitemap` block and, in incremental runs, pages whose lastmod is older than their last
+scrape reuse the manifest row instead of being fetched again.
+
+	sitemap:
+	  url: https://www.panacota.vn/sitemap.xml
+	  index_filter: sitemap_products # child sitemaps to follow, regex on their url
+	  product_pattern: /products/ # product urls to keep, regex, required
+
+Product sitemaps also list the shop and archive pages, a site without a product_pattern is
+crawled through its listings even with --sitemaps.
+"""
+from dataclasses import dataclass
+import datetime
+import gzip
+import io
+import logging
+import re
+from typing import Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+from scripts.extract import http_client
+
+logger = logging.getLogger(__name__)
+
+MAX_SITEMAP_DEPTH = 3
+
+@dataclass
+class SitemapEntry:
+	url: str
+	lastmod: Optional[datetime.datetime] = None
+
+def parse_lastmod(value: str) -> Optional[datetime.datetime]:
+	"""
+	W3C datetime ("2025-05-20", "2025-05-20T06:10:19+07:00") as naive local time, like the manifest's scraped_at.
+	A date without a time is the end of that day, the page may have changed at any time on it.
+	"""
+	if not value:
+		return None
+	value = value.strip()
+	try:
+		lastmod = datetime.datetime.fromisoformat(value)
+	except ValueError:
+		logger.debug(f"Unparsable lastmod: {value}")
+		return None
+
+	if "T" not in value:
+		return lastmod.replace(hour=23, minute=59, second=59)
+	return lastmod.astimezone().replace(tzinfo=None) if lastmod.tzinfo else lastmod
+
+def _local_name(tag: str) -> str:
+	return tag.rsplit("}", 1)[-1]
+
+def _child_text(element, name: str) -> str:
+	for child in element:
+		if _local_name(child.tag) == name:
+			return (child.text or "").strip()
+	return ""
+
+def parse_sitemap(content: bytes) -> Tuple[List[str], List[SitemapEntry]]:
+	"""
+	Return (child sitemap urls, url entries) of a sitemap or sitemap index.
+	The body is already in memory (it goes through the response cache), finished <url> / <sitemap>
+	elements are dropped from the tree while parsing so that only the entries are kept.
+	"""
+	if content[:2] == b"\x1f\x8b":
+		content = gzip.decompress(content)
+
+	children, entries = [], []
+	root = None
+	for event, element in ElementTree.iterparse(io.BytesIO(content), events=("start", "end")):
+		if root is None:
+			root = element
+		if event != "end":
+			continue
+
+		tag = _local_name(element.tag)
+		if tag == "sitemap":
+			loc = _child_text(element, "loc")
+			if loc:
+				children.append(loc)
+		elif tag == "url":
+			loc = _child_text(element, "loc")
+			if loc:
+				entries.append(SitemapEntry(loc, parse_lastmod(_child_text(element, "lastmod"))))
+		else:
+			continue
+		root.clear()
+
+	return children, entries
+
+def iter_sitemap_entries(website_name: str, sitemap_url: str, index_filter: str = None,
+						 depth: int = 0) -> Iterator[SitemapEntry]:
+	try:
+		response = http_client.fetch(website_name, sitemap_url)
+		if response.status_code != 200:
+			logger.warning(f"Sitemap {sitemap_url} returned {response.status_code}")
+			return
+		children, entries = parse_sitemap(response.content)
+	except (ElementTree.ParseError, OSError) as e:
+		logger.error(f"Could not parse sitemap {sitemap_url}: {str(e)}")
+		return
+
+	logger.info(f"Sitemap {sitemap_url}: {len(entries)} urls, {len(children)} child sitemaps")
+	yield from entries
+
+	if depth >= MAX_SITEMAP_DEPTH:
+		if children:
+			logger.warning(f"Not following {len(children)} sitemaps nested deeper than {MAX_SITEMAP_DEPTH} in {sitemap_url}")
+		return
+	for child in children:
+		if index_filter and not re.search(index_filter, child):
+			continue
+		yield from iter_sitemap_entries(website_name, child, index_filter, depth + 1)
+
+def sitemap_config(site_config: Dict) -> Optional[Dict]:
+	sitemap = site_config.get("sitemap")
+	if not isinstance(sitemap, dict) or not sitemap.get("url"):
+		return None
+	if sitemap.get("product_pattern") in (None, "", "None"):
+		logger.warning(f"Sitemap {sitemap['url']} has no product_pattern, not using it")
+		return None
+	return sitemap
+
+def discover_product_urls(website_name: str, site_config: Dict) -> List[SitemapEntry]:
+	"""
+	Product urls of a site from its sitemap, deduplicated in sitemap order.
+	Sites without a usable `sitemap` block return an empty list.
+	"""
+	sitemap = sitemap_config(site_config)
+	if sitemap is None:
+		return []
+
+	product_pattern = re.compile(sitemap["product_pattern"])
+	entries: Dict[str, SitemapEntry] = {}
+	for entry in iter_sitemap_entries(website_name, sitemap["url"], sitemap.get("index_filter")):
+		if not product_pattern.search(entry.url):
+			continue
+		entries.setdefault(entry.url, entry)
+
+	logger.info(f"Found {len(entries)} product urls in the sitemap of {website_name}")
+	return list(entries.values())
+
+def crawl_sitemap(websites_config: Dict, website_name: str, incremental: bool = False, sink=None) -> List:
+	"""
+	Extract every product listed in the site's sitemap, without listing pages or a browser.
+	The sitemap url stands in for the category url in the sink checkpoints and the manifest,
+	it is never used as a product category.
+	"""
+	from scripts.extract.products_scraping import ProductExtractor
+
+	site_config = websites_config[website_name]
+	entries = discover_product_urls(website_name, site_config)
+	if not entries:
+		return []
+
+	extractor = ProductExtractor(
+		websites_config, website_name, sitemap_config(site_config)["url"], incremental=incremental, sink=sink
+	)
+	return extractor.extract_urls(
+		[entry.url for entry in entries],
+		modified_at={entry.url: entry.lastmod for entry in entries if entry.lastmod}
+	)
@@ -0,0 +1,103 @@
+from typing import Dict, Iterable, List
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# query parameters that only track the visit and never select a different category
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+def normalize_url(url: str, base_url: str = None) -> str:
+	"""
+	Canonical form of a category url: absolute, lower-case host, no fragment and sorted query
+	parameters without tracking ones. The trailing slash is kept, WooCommerce answers
+	/product-category/cake with a 301 to /product-category/cake/.
+	"""
+	url = url.strip()
+	if base_url:
+		url = urljoin(base_url, url)
+
+	parts = urlsplit(url)
+	path = parts.path or "/"
+	query = urlencode(sorted(
+		(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+		if not key.startswith(TRACKING_PARAMS)
+	))
+
+	return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, query, ""))
+
+def menu_item_url(item) -> str:
+	# `#` anchors open a mega menu, the category url sits in `data-url`
+	url = item.get("href", "")
+	if url.startswith("#"):
+		url = item.get("data-url") or ""
+	return url
+
+class _Node:
+	__slots__ = ("children", "url")
+
+	def __init__(self):
+		self.children: Dict[str, "_Node"] = {}
+		self.url = None
+
+class UrlIndex:
+	"""
+	Path trie of category urls. A url is a leaf category when no other indexed url lives
+	below its path, e.g. /collections/cake is dropped when /collections/cake/mousse is indexed.
+	Urls differing only by a trailing slash share a node, the first one added is kept.
+	"""
+
+	def __init__(self, urls: Iterable[str] = ()):
+		self._root = _Node()
+		self._size = 0
+		for url in urls:
+			self.add(url)
+
+	@staticmethod
+	def _segments(url: str) -> List[str]:
+		parts = urlsplit(url)
+		segments = [parts.netloc] + [segment for segment in parts.path.split("/") if segment]
+		if parts.query:
+			# /products?cat=1 and /products?cat=2 are siblings below /products
+			segments.append(f"?{parts.query}")
+		return segments
+
+	def add(self, url: str) -> str:
+		url = normalize_url(url)
+		node = self._root
+		for segment in self._segments(url):
+			node = node.children.setdefault(segment, _Node())
+
+		if node.url is None:
+			node.url = url
+			self._size += 1
+		return url
+
+	def __len__(self) -> int:
+		return self._size
+
+	def __contains__(self, url: str) -> bool:
+		node = self._root
+		for segment in self._segments(normalize_url(url)):
+			node = node.children.get(segment)
+			if node is None:
+				return False
+		return node.url is not None
+
+	def leaves(self) -> List[str]:
+		"""
+		Indexed urls without any indexed descendant, found in a single post-order walk of the trie.
+		"""
+		leaves = []
+		has_url_below = {}
+		stack = [(self._root, False)]
+		while stack:
+			node, children_done = stack.pop()
+			if not children_done:
+				stack.append((node, True))
+				stack.extend((child, False) for child in node.children.values())
+				continue
+
+			below = any(child.url is not None or has_url_below[id(child)] for child in node.children.values())
+			has_url_below[id(node)] = below
+			if node.url is not None and not below:
+				leaves.append(node.url)
+
+		return sorted(leaves)
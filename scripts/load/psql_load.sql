@@ -4,4 +4,4 @@ SET search_path TO app_data;
 
 \copy app_data.products FROM 'data/processed/products.csv' DELIMITER ',' CSV HEADER;
 
-\copy app_data.product_images FROM 'data/processed/product_images.csv' DELIMITER ',' CSV HEADER;
+\copy app_data.product_images (product_image_id, product_id, product_image_url, product_image_name, product_image_type, created_at, updated_at, product_image_key) FROM 'data/processed/product_images.csv' DELIMITER ',' CSV HEADER;
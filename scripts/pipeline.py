@@ -1,26 +1,35 @@
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 import glob
+import logging
 import os
+import time
 from typing import Any, Dict, List
 
 import pandas as pd
 import yaml
-from utils.logger_config import setup_logger, setup_discord_notification
+from utils import helpers
 
-from ops.transform.generate_mock_data import update_product_dataset
-from ops.transform.remove_duplicates import remove_duplicates
-from ops.transform.standardize_categories import standardize_category
-from ops.transform.seperate_tables import seperate_tables
+from scripts.transform.generate_descriptions import DescriptionGenerator, fill_descriptions
+from scripts.transform.generate_mock_data import update_product_dataset
+from scripts.transform.remove_duplicates import remove_duplicates
+from scripts.transform.standardize_categories import CategoryCache, DEFAULT_CATEGORY_CACHE, standardize_category
+from scripts.transform.seperate_tables import seperate_tables
+
+logger = logging.getLogger(__name__)
+
+LOG_FILE = "transform_pipeline.log"
 
-logger = setup_logger("transform_pipeline.log")
-setup_discord_notification(logger)
 class TransformPipeline:
 	def __init__(self, config_path: str = "config/etl_config.yml"):
+		self.config_path = config_path
 		self.config = self._load_config(config_path)
 		self.input_dir = self.config.get('input_directory', "data/raw")
 		self.output_staging_dir = self.config.get("output_directory", "data/staging")
 		self.output_processed_dir = self.config.get("final_output_directory", "data/processed")
 		self.transforms = self.config.get("transforms", [])
+		self._category_cache = None
+		self._description_generator = None
   
 	def _load_config(self,	config_path: str) -> Dict[str, Any]:
 		try:
@@ -35,13 +44,26 @@ class TransformPipeline:
                 "file_pattern": "*.csv"
 			}
    
+	@property
+	def category_cache(self) -> CategoryCache:
+		if self._category_cache is None:
+			cache_path = (self.config.get("categories") or {}).get("cache", DEFAULT_CATEGORY_CACHE)
+			self._category_cache = CategoryCache(cache_path)
+		return self._category_cache
+
+	@property
+	def description_generator(self) -> DescriptionGenerator:
+		if self._description_generator is None:
+			self._description_generator = DescriptionGenerator.from_config(self.config.get("descriptions"))
+		return self._description_generator
+
 	def _get_input_file(self) -> List[str]:
 		pattern = self.config.get("file_pattern", "*.csv")
 		files = glob.glob(os.path.join(self.input_dir, pattern))
 		logger.info(f"Found {len(files)} input files: {files}")
 		return files
     
-	def process_file(self, input_file: str) -> str:
+	def process_file(self, input_file: str, skip_transforms: tuple = ()) -> str:
 		file_name = os.path.basename(input_file)
 		output_staging_file = os.path.join(self.output_staging_dir, file_name)
 		
@@ -50,13 +72,22 @@ class TransformPipeline:
 		logger.info(f"Processing file: {input_file}")
 
 		for transform in self.transforms:
+			if transform in skip_transforms:
+				continue
 			logger.info(f"Applying transformation: {transform}")
 
 			if transform == "standardize_categories":
 				if 'original_category' in df.columns:
 					logger.info("Column original_category is found!")
 				input_df = df[['product_name', 'original_category']]
-				categories = standardize_category(input_df)
+				cache = self.category_cache
+				cache.stats.clear()
+				categories = standardize_category(input_df, cache)
+				cache.save()
+				logger.info(
+					f"Category cache hit rate for {file_name}: {cache.hit_rate():.1%} "
+					f"({cache.stats['hits']} hits, {cache.stats['misses']} misses)"
+				)
 				df['category_name'] = categories 
 				if 'category_name' in df.columns:
 					logger.info(f"Adding category_name succesfully")
@@ -74,9 +105,12 @@ class TransformPipeline:
 				columns_to_update = [col for col in mock_cols if col in df.columns]
 				
 				if columns_to_update:
-					df = update_product_dataset(df, output_staging_file) 
+					seed = (self.config.get("mock_data") or {}).get("seed")
+					df = update_product_dataset(df, output_staging_file, seed=seed, describer=self.description_generator) 
+
+			elif transform == 'generate_descriptions':
+				df = fill_descriptions(df, self.description_generator)
 
-				df.to_csv(self.output_staging_dir)
 			elif transform == 'seperate_tables':
     
 				rs = seperate_tables(self.output_staging_dir, self.output_processed_dir)
@@ -87,34 +121,84 @@ class TransformPipeline:
   
 		return output_staging_file
 
-	def run(self):
+	def _process_file_timed(self, input_file: str) -> Dict[str, Any]:
+		start = time.perf_counter()
+		try:
+			# seperate_tables reads every staging file, run() calls it once after all files
+			output_file = self.process_file(input_file, skip_transforms=("seperate_tables",))
+			result = {
+				"input": input_file,
+				"output": output_file,
+				"status": "success"
+			}
+		except Exception as e:
+			logger.error(f"Error processing {input_file}: {str(e)}")
+			result = {
+				"input": input_file,
+				"status": "error",
+				"message": str(e)
+			}
+
+		result["worker"] = os.getpid()
+		result["seconds"] = round(time.perf_counter() - start, 3)
+		return result
+
+	def run(self, workers: int = 1):
+		"""
+		Process the input files one after another, or with `workers` > 1 on a process pool
+		where every file succeeds or fails on its own.
+		"""
 		input_files = self._get_input_file()
-		results = []
+		workers = max(min(workers, len(input_files)), 1)
+		start = time.perf_counter()
+
+		if workers == 1:
+			results = [self._process_file_timed(input_file) for input_file in input_files]
+		else:
+			logger.info(f"Processing {len(input_files)} files with {workers} workers")
+			with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.config_path,)) as executor:
+				results = list(executor.map(_process_file_in_worker, input_files))
+
+		for worker in sorted({r["worker"] for r in results}):
+			worker_results = [r for r in results if r["worker"] == worker]
+			timings = ", ".join(f"{os.path.basename(r['input'])} {r['seconds']:.2f}s" for r in worker_results)
+			logger.info(
+				f"Worker {worker}: {len(worker_results)} files in {sum(r['seconds'] for r in worker_results):.2f}s ({timings})"
+			)
 
-		for input_file in input_files:
+		if "seperate_tables" in self.transforms:
 			try:
-				output_file = self.process_file(input_file)
-				results.append({
-					"input": input_file,
-					"output": output_file,
-					"status": "success"
-				})
+				rs = seperate_tables(self.output_staging_dir, self.output_processed_dir)
+				logger.info(f"Result of seperating tables: {rs}")
 			except Exception as e:
-				logger.error(f"Error processing {input_file}: {str(e)}")
-				results.append({
-					"input": input_file,
-					"status": "error",
-					"message": str(e)
-				})
+				logger.error(f"Error seperating tables: {str(e)}")
+
 		success_count = sum(1 for r in results if r["status"] == "success")
-		logger.info(f"Pipeline completed: {success_count}/{len(results)} files processed successfully")
+		logger.info(
+			f"Pipeline completed: {success_count}/{len(results)} files processed successfully "
+			f"in {time.perf_counter() - start:.2f}s"
+		)
 		logger.info(f"Check result: {results}")
 		return results
 
+# each worker process builds its own pipeline once, its caches then stay warm across the files it gets
+_worker_pipeline = None
+
+def _init_worker(config_path: str):
+	global _worker_pipeline
+	helpers.setup_logger(LOG_FILE)
+	_worker_pipeline = TransformPipeline(config_path)
+
+def _process_file_in_worker(input_file: str) -> Dict[str, Any]:
+	return _worker_pipeline._process_file_timed(input_file)
+
 def main():
+	helpers.setup_logger(LOG_FILE)
+
 	parser = argparse.ArgumentParser(description="Run transformation pipeline on CSV files")
 	parser.add_argument("--config", default="config/etl_config.yml", help="Path to config YAML file")
 	parser.add_argument("--file", help="Process a specific file instead of all files")
+	parser.add_argument("--workers", type=int, help="Files processed in parallel (default: config `workers`, else every core)")
 	args = parser.parse_args()
 
 	pipeline = TransformPipeline(args.config)
@@ -129,7 +213,8 @@ def main():
 			return 1
 	else:
 		# Process all files
-		pipeline.run()
+		workers = args.workers or pipeline.config.get("workers") or os.cpu_count() or 1
+		pipeline.run(workers=int(workers))
 
 	return 0	
 
@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# First install Ollama: https://ollama.com/
+# Then run: ollama pull <model_name>
+DEFAULT_ENDPOINT = "http://localhost:11434/api/generate"
+DEFAULT_MODEL = "mrjacktung/phogpt-4b-chat-gguf"
+DEFAULT_TIMEOUT = 60 # seconds per request
+DEFAULT_WORKERS = 4
+DEFAULT_DESCRIPTION_CACHE = "data/cache/descriptions.json"
+
+# bump the version whenever the template changes, cached descriptions of older prompts are not reused
+PROMPT_VERSION = "v1"
+PROMPT_TEMPLATE = """
+			Viết mô tả ngắn gọn về sản phẩm topping ăn kèm với các món ngọt khác có tên {product_name}
+
+		"""
+
+class DescriptionCache:
+	"""
+	Generated descriptions kept across runs, keyed by prompt version and product name.
+	"""
+
+	def __init__(self, path: str = DEFAULT_DESCRIPTION_CACHE):
+		self.path = path
+		self._lock = threading.Lock()
+		self._dirty = False
+		self.entries: Dict[str, str] = self._read()
+
+	def _read(self) -> Dict[str, str]:
+		try:
+			with open(self.path, encoding="utf-8") as f:
+				return json.load(f)
+		except FileNotFoundError:
+			return {}
+		except (OSError, ValueError) as e:
+			logger.warning(f"Ignoring unreadable description cache {self.path}: {str(e)}")
+			return {}
+
+	@staticmethod
+	def key(product_name: str, prompt_version: str = PROMPT_VERSION) -> str:
+		return f"{prompt_version}\x1f{str(product_name).strip()}"
+
+	def get(self, product_name: str, prompt_version: str = PROMPT_VERSION) -> Optional[str]:
+		with self._lock:
+			return self.entries.get(self.key(product_name, prompt_version))
+
+	def put(self, product_name: str, description: str, prompt_version: str = PROMPT_VERSION):
+		with self._lock:
+			self.entries[self.key(product_name, prompt_version)] = description
+			self._dirty = True
+
+	def save(self):
+		with self._lock:
+			if not self._dirty:
+				return
+			os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+			# parallel pipeline workers share the file, keep what the others saved in the meantime
+			self.entries = {**self._read(), **self.entries}
+			tmp_path = f"{self.path}.{os.getpid()}.tmp"
+			with open(tmp_path, "w", encoding="utf-8") as f:
+				json.dump(self.entries, f, ensure_ascii=False, indent=1)
+			os.replace(tmp_path, self.path)
+			self._dirty = False
+
+class DescriptionGenerator:
+	"""
+	Fills missing product descriptions through an Ollama-compatible `/api/generate` endpoint,
+	one request per distinct product name on a bounded pool, cached across runs.
+	"""
+
+	def __init__(self, endpoint: str = DEFAULT_ENDPOINT, model: str = DEFAULT_MODEL, timeout: float = DEFAULT_TIMEOUT,
+				 workers: int = DEFAULT_WORKERS, cache: DescriptionCache = None, prompt_version: str = PROMPT_VERSION):
+		self.endpoint = endpoint
+		self.model = model
+		self.timeout = timeout
+		self.workers = max(int(workers), 1)
+		self.cache = cache if cache is not None else DescriptionCache()
+		self.prompt_version = prompt_version
+
+		self.session = requests.Session()
+		adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+		self.session.mount("http://", adapter)
+		self.session.mount("https://", adapter)
+
+	@classmethod
+	def from_config(cls, descriptions_config: Dict = None) -> "DescriptionGenerator":
+		descriptions_config = descriptions_config or {}
+		return cls(
+			endpoint=descriptions_config.get("endpoint", DEFAULT_ENDPOINT),
+			model=descriptions_config.get("model", DEFAULT_MODEL),
+			timeout=float(descriptions_config.get("timeout", DEFAULT_TIMEOUT)),
+			workers=int(descriptions_config.get("workers", DEFAULT_WORKERS)),
+			cache=DescriptionCache(descriptions_config.get("cache", DEFAULT_DESCRIPTION_CACHE)),
+			prompt_version=str(descriptions_config.get("prompt_version", PROMPT_VERSION))
+		)
+
+	def generate(self, product_name: str) -> str:
+		try:
+			response = self.session.post(
+				self.endpoint,
+				json={
+					'model': self.model,
+					'prompt': PROMPT_TEMPLATE.format(product_name=product_name),
+					'stream': False,
+					# 'temperature': 0.8 # level of creativity
+				},
+				timeout=self.timeout
+			)
+			response.raise_for_status()
+			description = str(response.json()['response']).strip()
+		except Exception as e:
+			logger.error(f"Error generating description for {product_name}: {e}")
+			return ""
+
+		# failures are not cached so the next run asks again
+		if description:
+			self.cache.put(product_name, description, self.prompt_version)
+		return description
+
+	def describe(self, product_names) -> Dict[str, str]:
+		"""
+		Description of every distinct name, from the cache or generated concurrently.
+		"""
+		descriptions = {}
+		missing = []
+		for product_name in dict.fromkeys(str(name) for name in product_names):
+			cached = self.cache.get(product_name, self.prompt_version)
+			if cached is not None:
+				descriptions[product_name] = cached
+			else:
+				missing.append(product_name)
+
+		start = time.perf_counter()
+		if missing:
+			with ThreadPoolExecutor(max_workers=min(self.workers, len(missing)), thread_name_prefix="describe") as executor:
+				descriptions.update(zip(missing, executor.map(self.generate, missing)))
+			self.cache.save()
+
+		logger.info(
+			f"Descriptions for {len(descriptions)} products: {len(descriptions) - len(missing)} cached, "
+			f"{len(missing)} generated in {time.perf_counter() - start:.2f}s"
+		)
+		return descriptions
+
+def fill_descriptions(df: pd.DataFrame, generator: DescriptionGenerator = None) -> pd.DataFrame:
+	missing = (df['product_description'].isna() | (df['product_description'] == '')).to_numpy()
+	if not missing.any():
+		return df
+
+	generator = generator or DescriptionGenerator()
+	names = df.loc[missing, 'product_name'].astype(str)
+	descriptions = generator.describe(names)
+
+	df['product_description'] = df['product_description'].astype(object)
+	df.loc[missing, 'product_description'] = names.map(descriptions).fillna('')
+	return df
@@ -1,141 +1,88 @@
-import json
 import logging
 import os
-import time
 import pandas as pd
 import numpy as np 
-import requests
+
+from scripts.transform.generate_descriptions import DescriptionGenerator, fill_descriptions
 
 logger = logging.getLogger(__name__)
 
-def _generate_product_code(product_brand: str, product_cat: str, iter: int) -> str:
-	brand = product_brand[:2].upper()
-	cat = product_cat[:2].upper()
- 
-	product_code = f"{brand}-{cat}-{str(iter + 1).zfill(3)}"
-	return product_code
-                       
-def _generate_discount_percentage(num_products: int) -> int:
+# rows of these categories get S/M/L sizes and prices, the others keep their scraped price
+SIZED_CATEGORIES = ['Bingsu', 'Frosty', 'Tea', 'Chocolate & Cacao', 'Coffee', 'Chilled & Cold', 'Cakes']
+SIZES = ['S', 'M', 'L']
+DEFAULT_BASE_PRICE = 50000
+
+def _generate_product_codes(df: pd.DataFrame) -> pd.Series:
+	# "TL-CA-001": brand and category prefixes, numbered per category in row order
+	brand = df['product_brand'].astype(str).str[:2].str.upper()
+	cat = df['category_name'].astype(str).str[:2].str.upper()
+	number = df.groupby('category_name', sort=False, dropna=False).cumcount() + 1
+
+	return brand + "-" + cat + "-" + number.astype(str).str.zfill(3)
+
+def _generate_discount_percentage(rng: np.random.Generator, num_products: int) -> np.ndarray:
 	discount_prob = 0.3
-	has_discount = np.random.rand(num_products) < discount_prob
+	has_discount = rng.random(num_products) < discount_prob
 	
 	return np.where(
 		has_discount, 
-		np.random.randint(5, 50, size=num_products),
+		rng.integers(5, 50, size=num_products),
 		0
 	)   
 
-def _generate_total_ratings() -> int: 
+def _generate_total_ratings(rng: np.random.Generator, num_products: int) -> np.ndarray: 
     # most products have relatively few ratings, but some popular ones have many
     # using a power-law-like distribution
-	return int(np.random.exponential(scale=50)) + 1 
+	return rng.exponential(scale=50, size=num_products).astype(int) + 1 
 
-def _generate_overall_stars() -> float:
+def _generate_overall_stars(rng: np.random.Generator, num_products: int) -> np.ndarray:
     # using beta distribution skewed toward higher values (most products 3.5+ stars)
-	return round(np.random.beta(4, 1.5) * 4 + 1, 1)
-
-DEFAULT_BASE_PRICE = 50000
-
-def _generate_total_orders() -> int: 
-    return np.random.randint(0, 500)
-
-def _generate_product_description_with_ollama(row):
-	# First install Ollama: https://ollama.com/
-	# Then run: ollama pull <model_name> 
+	return np.round(rng.beta(4, 1.5, size=num_products) * 4 + 1, 1)
 
-	try:
-		
-		input_prompt = f"""
-			Viết mô tả ngắn gọn về sản phẩm topping ăn kèm với các món ngọt khác có tên {row['product_name']}  
-			
-		"""
-		response = requests.post('http://localhost:11434/api/generate', 
-							   json={
-								   'model': 'mrjacktung/phogpt-4b-chat-gguf',
-								   'prompt': input_prompt,
-								   'stream': False,
-           							# 'temperature': 0.8 # level of creativity 
-							   })
-		
-		result = response.json()
-		
-		return result['response']
-	except Exception as e:
-		print(f"Error generating description for {row['product_name']} with Ollama: {e}")
-		return ""
+def _generate_total_orders(rng: np.random.Generator, num_products: int) -> np.ndarray: 
+    return rng.integers(0, 500, size=num_products)
 
-def _generate_json_size_price(base_price: int, cate_name: str) -> json:
-	sizes = ['S', 'M', 'L']
+def _generate_json_size_price(base_prices: pd.Series, cate_names: np.ndarray) -> list:
+	additional_prices = np.where(cate_names == 'Cakes', 12000, 5000)
+	prices = base_prices.to_numpy()[:, None] + np.arange(len(SIZES)) * additional_prices[:, None]
+	product_sizes = '|'.join(SIZES)
  
-	additional_price = 5000
-	if cate_name == 'Cakes':
-		additional_price = 12000
-  
-	prices = [base_price + i * additional_price for i in range(len(sizes))]
- 
-	return {
-		'product_sizes': '|'.join(sizes),
-		'product_prices': '|'.join(str(price) for price in prices) 
-	}
-
-def update_product_dataset(df: pd.DataFrame, output_file: str) -> pd.DataFrame: 
-	cat_counters = {}
-	print("Checkpoint")
-	if 'product_code' in df.columns:
-		df['product_code'] = df['product_code'].astype(str)
+	return [
+		{
+			'product_sizes': product_sizes,
+			'product_prices': '|'.join(map(str, row))
+		}
+		for row in prices.tolist()
+	]
+
+def update_product_dataset(df: pd.DataFrame, output_file: str, seed: int = None,
+						   describer: DescriptionGenerator = None) -> pd.DataFrame: 
+	"""
+	Fill the mock columns column-wise from one generator, the same `seed` reproduces the same dataset.
+	Missing descriptions are generated by `describer` (the default local Ollama endpoint when None).
+	"""
+	rng = np.random.default_rng(seed)
+	df = df.reset_index(drop=True)
+	num_products = len(df)
+
+	df['product_code'] = _generate_product_codes(df)
+	df['product_total_ratings'] = _generate_total_ratings(rng, num_products)
+	df['product_overall_stars'] = _generate_overall_stars(rng, num_products)
+	df['product_total_orders'] = _generate_total_orders(rng, num_products)
 
-	df['product_overall_stars'] = df['product_overall_stars'].astype(float)
 	df['product_unit_price'] = df['product_unit_price'].astype(object)
- 
-	for idx in range(len(df)):
-		web_name = df.at[idx, 'product_brand']
-		cat_name = df.at[idx, 'category_name']
-		
-		if cat_name not in cat_counters:
-			cat_counters[cat_name] = 0
-   
-		df.at[idx, 'product_code'] = _generate_product_code(
-			product_brand=web_name,
-			product_cat=cat_name,
-			iter=cat_counters[cat_name]
-		)
-
-		cat_counters[cat_name] += 1
-
-		df.at[idx, 'product_total_ratings'] = _generate_total_ratings()
-  
-		df.at[idx, 'product_overall_stars'] = _generate_overall_stars()
-		df.at[idx, 'product_total_orders'] = _generate_total_orders()
-
-		processed_cols = ['Bingsu', 'Frosty', 'Tea', 'Chocolate & Cacao', 'Coffee',
-                    'Chilled & Cold', 'Cakes']
-		
-		cur_price = int(df.at[idx, 'product_unit_price'])
-		if cur_price == 0:
-			cur_price = DEFAULT_BASE_PRICE
-			logger.debug(f"Check current price: {cur_price}")
-   
-		cur_cate = df.at[idx, 'category_name'] 
-  
-		if cur_cate in processed_cols:
-			df.at[idx, 'product_unit_price'] = _generate_json_size_price(cur_price, str(cur_cate))
-			logger.info(f"Check product price: {df.at[idx, 'product_unit_price']}")
-		else: 
-			if cur_price == 0:
-				logger.info("Checkpoint")
-				mock_price = np.random.randint(low = 55000, high=200000) 
-				df.at[idx, 'product_unit_price'] = {'product_price': str(mock_price)}
-				logger.info(f"Check product price: {df.at[idx, 'product_unit_price']}")	
-    
-		if pd.isna(df.at[idx, 'product_description']) or df.at[idx, 'product_description'] == '':
-			description = _generate_product_description_with_ollama(df.loc[idx])
-			df.at[idx, 'product_description'] = str(description) if description is not None else ''
-			logger.info(f"Check product description: {description}") 
+	sized = df['category_name'].isin(SIZED_CATEGORIES).to_numpy()
+	if sized.any():
+		base_prices = df.loc[sized, 'product_unit_price'].astype(int).replace(0, DEFAULT_BASE_PRICE)
+		size_prices = _generate_json_size_price(base_prices, df.loc[sized, 'category_name'].to_numpy())
+		df.loc[sized, 'product_unit_price'] = pd.Series(size_prices, index=base_prices.index, dtype=object)
+	logger.info(f"Generated sizes and prices for {int(sized.sum())}/{num_products} products")
+
+	df = fill_descriptions(df, describer)
     
-	df['product_discount_percentage'] = _generate_discount_percentage(len(df))
+	df['product_discount_percentage'] = _generate_discount_percentage(rng, num_products)
 
 	os.makedirs('data/staging', exist_ok=True)
-	output_file_exists = os.path.isfile(output_file)
 	df.to_csv(
 		output_file,
 		index=False,
@@ -143,5 +90,3 @@ def update_product_dataset(df: pd.DataFrame, output_file: str) -> pd.DataFrame:
 	)	
 	
 	return df
-
-
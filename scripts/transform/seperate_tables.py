@@ -7,6 +7,8 @@ import json
 
 import numpy as np
 
+from utils.image_keys import canonical_image_url, load_image_keys
+
 logger = logging.getLogger(__name__)
 categories = {} 
 products = []
@@ -162,20 +164,26 @@ def _write_outputs(output_dir: str):
 	            **product
 	        })
 
+	# images downloaded by scripts.extract.image_fetcher keep their local store key
+	image_keys = load_image_keys()
+
 	product_image_urls_file = os.path.join(output_dir, 'product_images.csv')
 	with open(product_image_urls_file, 'w', newline='', encoding='UTF-8') as f:
 		writer = csv.DictWriter(f, fieldnames=['product_image_url_id', 'product_id', 
 											  'product_image_url', 'product_image_name',
-											  'product_image_type', 'created_at', 'updated_at'])
+											  'product_image_type', 'created_at', 'updated_at',
+											  'product_image_key'])
 		writer.writeheader()
 		for i, product in enumerate(product_image_urls_names, 1):
 			product_code = product.pop('product_code')
 			product_id = product_id_map[product_code]
+			image_url = product['product_image_url']
 
 			writer.writerow({
 	            'product_image_url_id': i,
 	            'product_id': product_id,
-	            **product 	
+	            **product,
+	            'product_image_key': image_keys.get(canonical_image_url(image_url), '') if image_url else ''
 	        })	
 	
 	logger.info(f"Separated data into {len(categories)} categories, {len(products)} products, and {len(product_image_urls_names)} product images")
@@ -1,12 +1,19 @@
 
+from collections import Counter, deque
+import hashlib
+import json
 import logging
-from typing import List
-import re
+import os
+import sys
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CATEGORY_CACHE = "data/cache/categories.json"
+
 CATEGORIES_MAPPING = {
     'Cakes': ['cakes', 'dry cakes', 'cake slices', 'bánh kem bơ', 'bánh flan gato' 
               'gato cắt miếng/cupcake', 'bánh ngọt', 'gato box - cake box', 'bánh bông lan', 'bông lan'],
@@ -35,40 +42,199 @@ CATEGORIES_MAPPING = {
     'Topping thêm': 'Topping thêm'
 }
 
-def standardize_category(df_products_name_cate: pd.DataFrame) -> List[str]:
-    product_raw_cats = [str(cat).lower().strip() for cat in df_products_name_cate['original_category']]
-    product_names = [str(name).lower().strip() for name in df_products_name_cate['product_name']]
-    category_patterns = {
-        standard_cat: '|'.join(map(re.escape, raw_cats))
-        for standard_cat, raw_cats in CATEGORIES_MAPPING.items()
-    }
-    output_standard_cats = []
-    
-    for i in range(len(product_raw_cats)):
-        cat_found = False 
-        
-        cur_cat = product_raw_cats[i] 
-        if '|' in cur_cat and 'bánh tiệc - bánh sinh nhật' in cur_cat:
-            output_standard_cats.append('Season & Specialist')
-            continue
-        
-        for standard_cat, raw_cats in CATEGORIES_MAPPING.items():
-            raw_cats_lower = [cat.lower() for cat in raw_cats]
-            if cur_cat in raw_cats_lower:
-                output_standard_cats.append(standard_cat)
-                cat_found = True 
-                break 
-            
-        if not cat_found or cur_cat == 'khác':
-            for standard_cat, pattern in category_patterns.items():
-                if re.search(pattern, product_names[i], re.IGNORECASE):
-                    output_standard_cats.append(standard_cat)
-                    cat_found = True
+# re.IGNORECASE also matches these to the keyword letters i and s, names are folded the same way
+_IGNORECASE_FOLD = str.maketrans({'ı': 'i', 'ſ': 's'})
+_NO_MATCH = sys.maxsize
+
+def _raw_categories(raw_cats) -> List[str]:
+    # a plain string entry is iterated like a list, one raw category per character
+    return [cat.lower() for cat in raw_cats]
+
+class _KeywordAutomaton:
+    """
+    Aho-Corasick automaton over the name keywords, reporting the smallest category index of any keyword
+    found in a name, i.e. the category the old per-category `re.search` loop stopped at.
+    """
+
+    def __init__(self, keywords: List[Tuple[str, int]]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.best: List[int] = [_NO_MATCH]
+
+        for keyword, index in keywords:
+            node = 0
+            for char in keyword:
+                if char not in self.goto[node]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(_NO_MATCH)
+                    self.goto[node][char] = len(self.goto) - 1
+                node = self.goto[node][char]
+            self.best[node] = min(self.best[node], index)
+
+        # breadth first, so a node's failure target is final before its children are linked
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                fail = self.fail[node]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[child] = self.goto[fail].get(char, 0)
+                self.best[child] = min(self.best[child], self.best[self.fail[child]])
+                queue.append(child)
+
+    def search(self, text: str) -> int:
+        goto, fail, best_at = self.goto, self.fail, self.best
+        best = best_at[0]
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if best_at[node] < best:
+                best = best_at[node]
+                if best == 0:
                     break
-            
-            if not cat_found:
-                output_standard_cats.append('Others')
-                
-    return output_standard_cats
+        return best
+
+class CategoryStandardizer:
+    """
+    `CATEGORIES_MAPPING` compiled once: exact raw categories resolve through a dict, product names are
+    scanned once by a keyword automaton, and each distinct category / name is resolved only once.
+    """
+
+    def __init__(self, mapping: Dict):
+        self.standard_cats = list(mapping)
+        self.exact: Dict[str, str] = {}
+        keywords = []
+        for index, (standard_cat, raw_cats) in enumerate(mapping.items()):
+            for raw_cat in _raw_categories(raw_cats):
+                self.exact.setdefault(raw_cat, standard_cat)
+                keywords.append((raw_cat, index))
+        self.automaton = _KeywordAutomaton(keywords)
+
+    def category_for_raw(self, raw_cat: str) -> Optional[str]:
+        if '|' in raw_cat and 'bánh tiệc - bánh sinh nhật' in raw_cat:
+            return 'Season & Specialist'
+        return self.exact.get(raw_cat)
+
+    def category_for_name(self, name: str) -> str:
+        index = self.automaton.search(name.translate(_IGNORECASE_FOLD))
+        return self.standard_cats[index] if index != _NO_MATCH else 'Others'
+
+    def standardize(self, df_products_name_cate: pd.DataFrame) -> List[str]:
+        cat_codes, raw_cats = pd.factorize(df_products_name_cate['original_category'], use_na_sentinel=False)
+        name_codes, names = pd.factorize(df_products_name_cate['product_name'], use_na_sentinel=False)
+
+        by_raw_cat = np.array([self.category_for_raw(str(cat).lower().strip()) for cat in raw_cats], dtype=object)
+        standard_cats = by_raw_cat[cat_codes]
+
+        # names are only needed for rows whose raw category is unknown
+        unresolved = np.flatnonzero(pd.isna(standard_cats))
+        if len(unresolved):
+            needed_codes, needed_rows = np.unique(name_codes[unresolved], return_inverse=True)
+            by_name = np.array(
+                [self.category_for_name(str(names[code]).lower().strip()) for code in needed_codes], dtype=object
+            )
+            standard_cats[unresolved] = by_name[needed_rows]
+
+        return standard_cats.tolist()
+
+_standardizers: Dict[str, CategoryStandardizer] = {}
+
+def get_standardizer(mapping: Dict = None) -> CategoryStandardizer:
+    mapping = CATEGORIES_MAPPING if mapping is None else mapping
+    key = json.dumps(mapping, ensure_ascii=False)
+    if key not in _standardizers:
+        _standardizers[key] = CategoryStandardizer(mapping)
+    return _standardizers[key]
+
+def mapping_version(mapping: Dict = None) -> str:
+    mapping = CATEGORIES_MAPPING if mapping is None else mapping
+    return hashlib.sha256(json.dumps(mapping, ensure_ascii=False).encode("utf-8")).hexdigest()[:16]
+
+class CategoryCache:
+    """
+    Resolved categories of (original_category, product_name) pairs kept across pipeline runs.
+    The file is stamped with the mapping version and starts empty once `CATEGORIES_MAPPING` changes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CATEGORY_CACHE, mapping: Dict = None):
+        self.path = path
+        self.version = mapping_version(mapping)
+        self.entries: Dict[str, str] = {}
+        self.stats = Counter()
+        self._dirty = False
+
+        if os.path.isfile(path):
+            stored = self._read()
+            if stored.get("version") == self.version:
+                self.entries = stored.get("entries", {})
+            else:
+                logger.info(f"CATEGORIES_MAPPING changed, discarding {len(stored.get('entries', {}))} cached categories")
+                self._dirty = True
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable category cache {self.path}: {str(e)}")
+            return {}
+
+    @staticmethod
+    def key(raw_cat, name) -> str:
+        return f"{str(raw_cat).lower().strip()}\x1f{str(name).lower().strip()}"
+
+    def hit_rate(self) -> float:
+        total = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / total if total else 0.0
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        # parallel pipeline workers share the file, keep what the others saved in the meantime
+        stored = self._read()
+        if stored.get("version") == self.version:
+            self.entries = {**stored.get("entries", {}), **self.entries}
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "entries": self.entries}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+def standardize_category(df_products_name_cate: pd.DataFrame, cache: CategoryCache = None) -> List[str]:
+    if cache is None:
+        return get_standardizer().standardize(df_products_name_cate)
+
+    # distinct (category, name) pairs, looked up in the cache once each
+    cat_codes, raw_cats = pd.factorize(df_products_name_cate['original_category'], use_na_sentinel=False)
+    name_codes, names = pd.factorize(df_products_name_cate['product_name'], use_na_sentinel=False)
+    width = max(len(names), 1)
+    pair_codes, pairs = pd.factorize(cat_codes.astype(np.int64) * width + name_codes)
+    pair_cats, pair_names = raw_cats[pairs // width], names[pairs % width]
+
+    keys = [CategoryCache.key(raw_cat, name) for raw_cat, name in zip(pair_cats, pair_names)]
+    by_pair = np.array([cache.entries.get(key) for key in keys], dtype=object)
+
+    missing = np.flatnonzero(pd.isna(by_pair))
+    if len(missing):
+        resolved = get_standardizer().standardize(pd.DataFrame({
+            'product_name': pair_names[missing],
+            'original_category': pair_cats[missing],
+        }))
+        by_pair[missing] = resolved
+        cache.entries.update(zip((keys[i] for i in missing), resolved))
+        cache._dirty = True
 
+    missed_rows = int(np.bincount(pair_codes, minlength=len(pairs))[missing].sum())
+    cache.stats["misses"] += missed_rows
+    cache.stats["hits"] += len(pair_codes) - missed_rows
 
+    return by_pair[pair_codes].tolist()
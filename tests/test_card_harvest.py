@@ -0,0 +1,30 @@
+from scripts.extract.card_harvest import CardHarvester, HarvestedCard
+from scripts.extract.products_scraping import ProductExtractor, config
+
+class FakeDriver:
+	def __init__(self, tabs):
+		self.tabs = tabs
+
+	def execute_script(self, script, card_selector):
+		return self.tabs.pop(0)
+
+def test_harvest_rows():
+	harvester = CardHarvester(FakeDriver([[["https://tljus.com/p/a", "Cake A", "a.jpg"], ["", "no url", ""]]]), "div.card")
+	assert harvester.harvest() == [HarvestedCard("https://tljus.com/p/a", "Cake A", "a.jpg")]
+	assert harvester.calls == 1
+
+def test_only_new_cards_are_extracted(monkeypatch):
+	extractor = ProductExtractor(config["websites"], "tljus", "https://tljus.com/menus/cakes")
+	requested = []
+	monkeypatch.setattr(extractor, "_extract_many_product_details", lambda urls: requested.append(urls) or [])
+
+	harvester = CardHarvester(FakeDriver([
+		[["https://tljus.com/p/a", "A", ""], ["https://tljus.com/p/b", "B", ""]],
+		[["https://tljus.com/p/b", "B", ""], ["https://tljus.com/p/c", "C", "c.jpg"]],
+	]), "div.card")
+	processed_urls = set()
+	extractor._collect_tab(None, extractor.category_url, "initial", harvester, processed_urls)
+	extractor._collect_tab(None, extractor.category_url, "tab 1", harvester, processed_urls)
+
+	assert requested == [["https://tljus.com/p/a", "https://tljus.com/p/b"], ["https://tljus.com/p/c"]]
+	assert extractor.harvested_cards["https://tljus.com/p/c"].image == "c.jpg"
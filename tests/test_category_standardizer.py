@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from scripts.transform.standardize_categories import CategoryCache, CategoryStandardizer, standardize_category
+
+def _standardize(rows):
+	return standardize_category(pd.DataFrame(rows, columns=['product_name', 'original_category']))
+
+def test_exact_raw_categories():
+	assert _standardize([
+		('Tiramisu', ' Cake Slices '),
+		('Bánh mì bơ', 'buns|savory'),
+		('Set quà', 'x|bánh tiệc - bánh sinh nhật'),
+		('Flan', 'bánh flan gatogato cắt miếng/cupcake'),
+	]) == ['Cakes', 'Breads & Buns', 'Season & Specialist', 'Cakes']
+
+def test_name_keywords_follow_mapping_order():
+	assert _standardize([
+		('bánh mì cookies', 'khác'),
+		('hộp sweetbox bánh lạnh', np.nan),
+		('xyz', 'khác'),
+	]) == ['Breads & Buns', 'Chilled & Cold', 'Others']
+
+def test_string_entries_match_single_characters():
+	# 'Bingsu' and 'Topping thêm' are strings, not lists, so each of their letters is a raw category
+	assert _standardize([('xyz', 'b'), ('xyz', 'ê'), ('sữa', 'unknown'), ('đá xay', 'unknown')]) == [
+		'Bingsu', 'Topping thêm', 'Bingsu', 'Topping thêm'
+	]
+
+def test_automaton_reports_the_lowest_category():
+	standardizer = CategoryStandardizer({'A': ['cd', 'xbcdy'], 'B': ['bc'], 'C': ['abcde']})
+	assert standardizer.category_for_name('abcde') == 'A'
+	assert standardizer.category_for_name('xbc') == 'B'
+	assert standardizer.category_for_name('xyz') == 'Others'
+
+def test_category_cache_persists_and_follows_the_mapping(tmp_path):
+	path = str(tmp_path / "categories.json")
+	df = pd.DataFrame({'product_name': ['Tiramisu', 'Tiramisu', 'xyz'], 'original_category': ['cakes', 'cakes', 'khác']})
+
+	cache = CategoryCache(path)
+	assert standardize_category(df, cache) == ['Cakes', 'Cakes', 'Others']
+	assert (cache.stats['hits'], cache.stats['misses']) == (0, 3)
+	cache.save()
+
+	cache = CategoryCache(path)
+	assert standardize_category(df, cache) == ['Cakes', 'Cakes', 'Others']
+	assert cache.hit_rate() == 1.0
+
+	assert CategoryCache(path, mapping={'Cakes': ['cakes']}).entries == {}
@@ -0,0 +1,23 @@
+import pytest
+
+from scripts.extract.crawl_archive import CrawlArchive, RECORD, REPLAY
+
+def test_archive_round_trip(tmp_path):
+	path = str(tmp_path / "run.sqlite3")
+	archive = CrawlArchive(path, RECORD)
+	archive.record_response("https://a.vn/p/1", 200, "bánh".encode("utf-8"), content_type="text/html", etag='"1"')
+	archive.record_snapshot("https://a.vn/menu", "<div>tab 0</div>", "initial")
+	archive.record_snapshot("https://a.vn/menu", "<div>tab 1</div>", "tab 1")
+	archive.close()
+
+	replay = CrawlArchive(path, REPLAY)
+	response = replay.response("https://a.vn/p/1")
+	assert response.status_code == 200 and response.body.decode("utf-8") == "bánh" and response.etag == '"1"'
+	assert replay.response("https://a.vn/p/2") is None
+	assert replay.snapshots("https://a.vn/menu") == ["<div>tab 0</div>", "<div>tab 1</div>"]
+	assert replay.stats()["responses"] == 1 and replay.stats()["snapshots"] == 2
+	replay.close()
+
+def test_replay_requires_an_existing_archive(tmp_path):
+	with pytest.raises(FileNotFoundError):
+		CrawlArchive(str(tmp_path / "missing.sqlite3"), REPLAY)
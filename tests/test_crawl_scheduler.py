@@ -0,0 +1,74 @@
+import json
+import time
+
+from scripts.extract import crawl_scheduler, product_sink
+from scripts.extract.crawl_scheduler import CrawlResult, CrawlTask
+from scripts.extract.products_scraping import ProductInfo
+
+def fake_crawl_category(task: CrawlTask, incremental: bool) -> CrawlResult:
+	products = [
+		ProductInfo(product_name=f"{task.category_url} {i}", product_url=f"{task.category_url}/p{i}", product_band=task.website_name)
+		for i in range(3)
+	]
+	now = time.time()
+	return CrawlResult(task, products=products, products_count=len(products), pages=4, started_at=now, finished_at=now)
+
+def sleepy_crawl_category(task: CrawlTask, incremental: bool) -> CrawlResult:
+	started_at = time.time()
+	time.sleep(0.15)
+	return CrawlResult(task, pages=1, started_at=started_at, finished_at=time.time())
+
+def max_overlap(results) -> int:
+	return max(
+		sum(1 for other in results if other.started_at < result.finished_at and result.started_at < other.finished_at)
+		for result in results
+	)
+
+def test_results_keep_counts_not_products(tmp_path, monkeypatch):
+	monkeypatch.setattr(product_sink, "BASE_DIR", tmp_path)
+	monkeypatch.setattr(crawl_scheduler, "_crawl_category", fake_crawl_category)
+	tasks = [CrawlTask("cake", "breadtalk", f"https://breadtalkvietnam.com/c{i}") for i in range(3)]
+
+	results = crawl_scheduler.run(tasks, max_workers=2, max_per_site=2)
+
+	assert all(result.products == [] and result.products_count == 3 for result in results)
+	with open(tmp_path / "data" / "raw" / "cake_products.csv", encoding="utf-8") as f:
+		assert len(f.readlines()) == 1 + 9
+	assert "9.00 products/s" in crawl_scheduler.summarize(results, 1.0)
+
+def test_per_site_limit_holds(tmp_path, monkeypatch):
+	monkeypatch.setattr(product_sink, "BASE_DIR", tmp_path)
+	monkeypatch.setattr(crawl_scheduler, "_crawl_category", sleepy_crawl_category)
+	tasks = [
+		CrawlTask("cake", website_name, f"https://{website_name}.vn/c{i}")
+		for website_name in ("breadtalk", "igloo") for i in range(4)
+	]
+
+	results = crawl_scheduler.run(tasks, max_workers=6, max_per_site=2)
+
+	assert sorted(result.task.category_url for result in results) == sorted(task.category_url for task in tasks)
+	for website_name in ("breadtalk", "igloo"):
+		assert max_overlap([result for result in results if result.task.website_name == website_name]) == 2
+	assert max_overlap(results) <= 4
+
+def test_tasks_run_in_catalog_and_listing_order(tmp_path, monkeypatch):
+	web_urls = tmp_path / "data" / "web_urls"
+	web_urls.mkdir(parents=True)
+	(web_urls / "drink_urls.json").write_text(json.dumps({"igloo": ["https://igloo.vn/d1"]}))
+	(web_urls / "cake_urls.json").write_text(json.dumps({
+		"igloo": ["https://igloo.vn/c2", "https://igloo.vn/c1"],
+		"not-configured": ["https://nowhere.vn/c1"],
+		"breadtalk": ["https://breadtalk.vn/c1"]
+	}))
+	monkeypatch.setattr(crawl_scheduler, "BASE_DIR", tmp_path)
+	monkeypatch.setattr(product_sink, "BASE_DIR", tmp_path)
+	monkeypatch.setattr(crawl_scheduler, "_crawl_category", sleepy_crawl_category)
+
+	tasks = crawl_scheduler.load_tasks()
+	expected = ["https://igloo.vn/c2", "https://igloo.vn/c1", "https://breadtalk.vn/c1", "https://igloo.vn/d1"]
+	assert [task.category_url for task in tasks] == expected
+	assert [task.category_url for task in crawl_scheduler.load_tasks()] == expected
+
+	# one worker runs them exactly in that order
+	results = crawl_scheduler.run(tasks, max_workers=1, max_per_site=2)
+	assert [result.task.category_url for result in results] == expected
@@ -0,0 +1,125 @@
+import pytest
+from selenium.common.exceptions import WebDriverException
+
+from scripts.extract import driver_pool
+from scripts.extract.driver_pool import DriverPool, DriverUnavailable
+
+class FakeDriver:
+	def __init__(self, number: int):
+		self.number = number
+		self.alive = True
+		self.fail_reset = False
+		self.quit_called = False
+		self.cookies_deleted = 0
+		self.window_handles = ["main"]
+		self.switch_to = self
+		self.current_url = "about:blank"
+
+	def set_page_load_timeout(self, seconds):
+		pass
+
+	def execute_script(self, script, *args):
+		if not self.alive:
+			raise WebDriverException("chrome not reachable")
+		return 1
+
+	def window(self, handle):
+		pass
+
+	def close(self):
+		self.window_handles.pop()
+
+	def delete_all_cookies(self):
+		if self.fail_reset:
+			raise WebDriverException("session deleted")
+		self.cookies_deleted += 1
+
+	def get(self, url):
+		self.current_url = url
+
+	def quit(self):
+		self.quit_called = True
+
+class FakeChrome:
+	"""
+	Stands in for helpers.setup_selenium, numbering the drivers it starts.
+	"""
+
+	def __init__(self):
+		self.started = []
+		self.failing = False
+
+	def __call__(self, user_agent, light=True):
+		if self.failing:
+			raise WebDriverException("chromedriver failed to start")
+		driver = FakeDriver(len(self.started))
+		self.started.append(driver)
+		return driver
+
+@pytest.fixture
+def chrome(monkeypatch):
+	chrome = FakeChrome()
+	monkeypatch.setattr(driver_pool.helpers, "setup_selenium", chrome)
+	monkeypatch.setattr(driver_pool, "DEFAULT_LEASE_TIMEOUT", 1)
+	return chrome
+
+def test_lease_resets_and_reuses_the_driver(chrome):
+	pool = DriverPool(size=1, user_agent="test")
+	with pool.lease("first") as driver:
+		driver.window_handles.append("popup")
+		driver.get("https://shop.vn/")
+
+	assert driver.window_handles == ["main"] and driver.cookies_deleted == 1
+	assert driver.current_url == "about:blank"
+	with pool.lease("second") as again:
+		assert again is driver
+	assert len(chrome.started) == 1
+
+def test_crashed_driver_is_replaced(chrome):
+	pool = DriverPool(size=1, user_agent="test")
+	with pytest.raises(WebDriverException):
+		with pool.lease() as driver:
+			driver.alive = False
+			raise WebDriverException("tab crashed")
+
+	assert driver.quit_called
+	with pool.lease() as replacement:
+		assert replacement is chrome.started[1]
+
+def test_driver_that_fails_to_reset_is_replaced(chrome):
+	pool = DriverPool(size=1, user_agent="test")
+	with pool.lease() as driver:
+		driver.fail_reset = True
+
+	with pool.lease() as replacement:
+		assert replacement is not driver and driver.quit_called
+
+def test_dead_idle_driver_is_replaced_on_lease(chrome):
+	pool = DriverPool(size=1, user_agent="test")
+	pool.start()
+	chrome.started[0].alive = False
+
+	with pool.lease() as driver:
+		assert driver is chrome.started[1]
+
+def test_slot_survives_a_failed_replacement(chrome):
+	pool = DriverPool(size=1, user_agent="test")
+	with pool.lease() as driver:
+		driver.fail_reset = True
+		chrome.failing = True
+
+	# the replacement could not start, the next lease retries instead of waiting for a lost slot
+	with pytest.raises(DriverUnavailable):
+		with pool.lease():
+			pass
+
+	chrome.failing = False
+	with pool.lease() as driver:
+		assert driver is chrome.started[-1] and len(chrome.started) == 2
+
+def test_lease_times_out_when_every_driver_is_busy(chrome):
+	pool = DriverPool(size=1, user_agent="test")
+	with pool.lease():
+		with pytest.raises(DriverUnavailable):
+			with pool.lease():
+				pass
@@ -0,0 +1,63 @@
+from bs4 import BeautifulSoup
+from scripts.extract.extraction_plan import ExtractionPlan
+
+SCRAPING_CONFIG = {
+	"product_tag": "div",
+	"product_selector": ".product-item",
+	"skip_url_patterns": "None",
+	"product_detail_selectors": {
+		"name": ".title",
+		"code": "None",
+		"description": [".short-description", ".long-description"],
+		"unit_price": "None",
+		"image_selector": ".gallery",
+		"detail_image": ".slide",
+		"original_category": "literal:Bingsu",
+		"category_tag": "None"
+	}
+}
+
+def test_compile_resolves_disabled_selectors():
+	plan = ExtractionPlan.compile(SCRAPING_CONFIG)
+
+	assert plan.code is None
+	assert plan.unit_price is None
+	assert plan.skip_url_pattern is None
+	assert plan.category is None
+	assert plan.categories_enabled and plan.category_literal == "Bingsu"
+	assert len(plan.descriptions) == 2
+
+def test_compiled_selectors_match():
+	plan = ExtractionPlan.compile(SCRAPING_CONFIG)
+	bs = BeautifulSoup(
+		'<div class="product-item card"><h1 class="title">Tiramisu</h1>'
+		'<p class="long-description">Mascarpone</p><div class="gallery"><div class="slide"></div></div></div>',
+		"html.parser"
+	)
+
+	assert plan.name.select_one(bs).text == "Tiramisu"
+	assert [selector.select_one(bs) is not None for selector in plan.descriptions] == [False, True]
+	assert len(plan.detail_image.select(plan.image_container.select_one(bs))) == 1
+	assert len(bs.find_all(plan.card_tag, class_=plan.card_class)) == 1
+
+def test_string_description_is_a_single_selector():
+	config = {**SCRAPING_CONFIG, "product_detail_selectors": {**SCRAPING_CONFIG["product_detail_selectors"], "description": ".desc"}}
+	assert len(ExtractionPlan.compile(config).descriptions) == 1
+
+def test_detail_strainer_keeps_selected_subtrees():
+	plan = ExtractionPlan.compile(SCRAPING_CONFIG)
+	bs = BeautifulSoup(
+		'<html><head><meta property="og:title" content="Tiramisu"></head><body>'
+		'<div class="header"><h1 class="title">Header</h1></div><footer>Footer</footer>'
+		'<div class="gallery"><div class="slide"><img src="a.jpg"></div></div></body></html>',
+		"html.parser", parse_only=plan.detail_strainer
+	)
+
+	assert bs.find("footer") is None
+	assert bs.find("meta")["content"] == "Tiramisu"
+	assert plan.name.select_one(bs).text == "Header"
+	assert len(plan.detail_image.select(plan.image_container.select_one(bs))) == 1
+
+def test_structural_selectors_disable_the_partial_tree():
+	selectors = {**SCRAPING_CONFIG["product_detail_selectors"], "name": "h1:first-child"}
+	assert ExtractionPlan.compile({**SCRAPING_CONFIG, "product_detail_selectors": selectors}).detail_strainer is None
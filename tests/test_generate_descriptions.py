@@ -0,0 +1,66 @@
+import http.server
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from scripts.transform.generate_descriptions import DescriptionCache, DescriptionGenerator, fill_descriptions
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+	prompts = []
+
+	def do_POST(self):
+		body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+		StubHandler.prompts.append(body["prompt"])
+		if "chậm" in body["prompt"]:
+			time.sleep(1)
+
+		payload = json.dumps({"response": f"mô tả {len(StubHandler.prompts)}"}).encode("utf-8")
+		self.send_response(200)
+		self.send_header("Content-Type", "application/json")
+		self.send_header("Content-Length", str(len(payload)))
+		self.end_headers()
+		self.wfile.write(payload)
+
+	def log_message(self, *args):
+		pass
+
+@pytest.fixture
+def endpoint():
+	StubHandler.prompts = []
+	server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+	threading.Thread(target=server.serve_forever, daemon=True).start()
+	yield f"http://127.0.0.1:{server.server_port}/api/generate"
+	server.shutdown()
+
+def _products():
+	return pd.DataFrame({
+		'product_name': ['Trân châu', 'Thạch dừa', 'Trân châu', 'Pudding'],
+		'product_description': ['', None, float('nan'), 'có sẵn'],
+	})
+
+def test_descriptions_are_generated_once_and_cached(endpoint, tmp_path):
+	cache_path = str(tmp_path / "descriptions.json")
+	generator = DescriptionGenerator(endpoint, workers=2, cache=DescriptionCache(cache_path))
+	df = fill_descriptions(_products(), generator)
+
+	assert len(StubHandler.prompts) == 2
+	assert df.loc[0, 'product_description'] == df.loc[2, 'product_description'] != ''
+	assert df.loc[3, 'product_description'] == 'có sẵn'
+
+	rerun = DescriptionGenerator(endpoint, cache=DescriptionCache(cache_path))
+	assert fill_descriptions(_products(), rerun)['product_description'].tolist() == df['product_description'].tolist()
+	assert len(StubHandler.prompts) == 2
+
+	new_prompt = DescriptionGenerator(endpoint, cache=DescriptionCache(cache_path), prompt_version="v2")
+	fill_descriptions(_products(), new_prompt)
+	assert len(StubHandler.prompts) == 4
+
+def test_timeouts_are_not_cached(endpoint, tmp_path):
+	generator = DescriptionGenerator(endpoint, timeout=0.2, cache=DescriptionCache(str(tmp_path / "descriptions.json")))
+	df = fill_descriptions(pd.DataFrame({'product_name': ['Bánh chậm'], 'product_description': ['']}), generator)
+
+	assert df.loc[0, 'product_description'] == ''
+	assert generator.cache.get('Bánh chậm') is None
@@ -0,0 +1,35 @@
+import pandas as pd
+
+from scripts.transform.generate_mock_data import update_product_dataset
+
+def _products():
+	return pd.DataFrame({
+		'product_name': ['Tiramisu', 'Mousse', 'Bánh mì', 'Cookie'],
+		'product_brand': ['tljus', 'panacota', 'breadtalk', 'tljus'],
+		'category_name': ['Cakes', 'Cakes', 'Breads & Buns', 'Chilled & Cold'],
+		'product_code': ['', '', '', ''],
+		'product_description': ['a', 'b', 'c', 'd'],
+		'product_unit_price': [0, 60000, 25000, 40000],
+		'product_total_ratings': 0,
+		'product_overall_stars': 0.0,
+		'product_total_orders': 0,
+	})
+
+def test_codes_and_prices(tmp_path):
+	df = update_product_dataset(_products(), str(tmp_path / "out.csv"), seed=1)
+
+	assert df['product_code'].tolist() == ['TL-CA-001', 'PA-CA-002', 'BR-BR-001', 'TL-CH-001']
+	assert df['product_unit_price'].tolist() == [
+		{'product_sizes': 'S|M|L', 'product_prices': '50000|62000|74000'},
+		{'product_sizes': 'S|M|L', 'product_prices': '60000|72000|84000'},
+		25000,
+		{'product_sizes': 'S|M|L', 'product_prices': '40000|45000|50000'},
+	]
+	assert df['product_overall_stars'].between(1, 5).all()
+
+def test_same_seed_same_output(tmp_path):
+	first = update_product_dataset(_products(), str(tmp_path / "first.csv"), seed=7)
+	second = update_product_dataset(_products(), str(tmp_path / "second.csv"), seed=7)
+
+	assert (tmp_path / "first.csv").read_text() == (tmp_path / "second.csv").read_text()
+	assert first['product_total_ratings'].tolist() == second['product_total_ratings'].tolist()
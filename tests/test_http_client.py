@@ -0,0 +1,124 @@
+import datetime
+from email.utils import format_datetime
+
+import pytest
+import requests
+
+from scripts.extract import http_client
+from scripts.extract.http_client import TokenBucket, _retry_after_seconds, _send
+
+class FakeClock:
+	"""
+	Stands in for the `time` module of http_client: sleeping advances the clock instantly.
+	"""
+
+	def __init__(self):
+		self.now = 1000.0
+		self.sleeps = []
+
+	def monotonic(self) -> float:
+		return self.now
+
+	def sleep(self, seconds: float):
+		self.sleeps.append(seconds)
+		self.now += seconds
+
+class StubSession:
+	"""
+	Answers every get() with the next status code (or raises the next exception) of `replies`.
+	"""
+
+	def __init__(self, replies):
+		self.replies = list(replies)
+		self.calls = 0
+
+	def get(self, url, **kwargs):
+		self.calls += 1
+		reply = self.replies.pop(0)
+		if isinstance(reply, Exception):
+			raise reply
+
+		status, headers = reply if isinstance(reply, tuple) else (reply, {})
+		response = requests.Response()
+		response.status_code = status
+		response.headers.update(headers)
+		response._content = b""
+		response._content_consumed = True
+		return response
+
+@pytest.fixture
+def clock(monkeypatch):
+	clock = FakeClock()
+	monkeypatch.setattr(http_client, "time", clock)
+	return clock
+
+def response_with(headers) -> requests.Response:
+	response = requests.Response()
+	response.headers.update(headers)
+	return response
+
+RETRY_CONFIG = {"retry": {"max_retries": 3, "backoff_base": 0.5, "backoff_max": 4, "max_retry_after": 10}}
+
+def test_token_bucket_allows_a_burst_then_the_rate(clock):
+	bucket = TokenBucket(rate=2, burst=3)
+	assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+	assert bucket.acquire() == pytest.approx(0.5)
+
+	clock.now += 60 # idle time refills the bucket up to its burst only
+	assert [bucket.acquire() for _ in range(3)] == [0.0, 0.0, 0.0]
+	assert bucket.acquire() == pytest.approx(0.5)
+
+def test_send_retries_transient_statuses(clock):
+	session = StubSession([503, 502, 200])
+	response = _send("shop", session, "https://shop.vn/", RETRY_CONFIG)
+
+	assert response.status_code == 200 and session.calls == 3
+	assert len(clock.sleeps) == 2
+	# full jitter: attempt n waits up to backoff_base * 2**n
+	assert 0 <= clock.sleeps[0] <= 0.5 and 0 <= clock.sleeps[1] <= 1.0
+
+def test_send_honours_retry_after_up_to_its_cap(clock):
+	session = StubSession([(429, {"Retry-After": "2"}), (429, {"Retry-After": "3600"}), 200])
+	assert _send("shop", session, "https://shop.vn/", RETRY_CONFIG).status_code == 200
+	assert clock.sleeps == [2.0, 10.0]
+
+def test_send_gives_up_after_max_retries(clock):
+	session = StubSession([500] * 4)
+	assert _send("shop", session, "https://shop.vn/", RETRY_CONFIG).status_code == 500
+	assert session.calls == 4 and len(clock.sleeps) == 3
+
+def test_send_does_not_retry_client_errors(clock):
+	session = StubSession([404])
+	assert _send("shop", session, "https://shop.vn/", RETRY_CONFIG).status_code == 404
+	assert clock.sleeps == []
+
+def test_send_retries_connection_errors_then_raises(clock):
+	session = StubSession([requests.ConnectionError("reset"), 200])
+	assert _send("shop", session, "https://shop.vn/", RETRY_CONFIG).status_code == 200
+
+	session = StubSession([requests.Timeout("slow")] * 4)
+	with pytest.raises(requests.Timeout):
+		_send("shop", session, "https://shop.vn/", RETRY_CONFIG)
+	assert session.calls == 4
+
+def test_send_waits_for_the_host_token_bucket(clock, monkeypatch):
+	monkeypatch.setattr(http_client, "_buckets", {})
+	http_config = {"rate_limit": {"requests_per_second": 4, "burst": 1}}
+	session = StubSession([200, 200, 200])
+	for _ in range(3):
+		_send("shop", session, "https://shop.vn/", http_config)
+	assert clock.sleeps == pytest.approx([0.25, 0.25])
+
+def test_retry_after_in_seconds():
+	assert _retry_after_seconds(response_with({"Retry-After": "120"})) == 120.0
+	assert _retry_after_seconds(response_with({"Retry-After": "-5"})) == 0.0
+	assert _retry_after_seconds(response_with({})) is None
+	assert _retry_after_seconds(response_with({"Retry-After": "soon"})) is None
+
+def test_retry_after_as_http_date():
+	now = datetime.datetime.now(datetime.timezone.utc)
+	in_a_minute = format_datetime(now + datetime.timedelta(seconds=60), usegmt=True)
+	an_hour_ago = format_datetime(now - datetime.timedelta(hours=1), usegmt=True)
+
+	assert 55 <= _retry_after_seconds(response_with({"Retry-After": in_a_minute})) <= 60
+	assert _retry_after_seconds(response_with({"Retry-After": an_hour_ago})) == 0.0
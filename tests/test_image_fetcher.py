@@ -0,0 +1,30 @@
+from scripts.extract.image_fetcher import ImageStore
+from utils.image_keys import canonical_image_url, load_image_keys
+
+def test_canonical_image_url_drops_cdn_sizes():
+	assert canonical_image_url("https://shop.vn/wp/cake-300x300.jpg") == "https://shop.vn/wp/cake.jpg"
+	assert canonical_image_url("//cdn.hstatic.net/cake_1024x.png") == "https://cdn.hstatic.net/cake.png"
+	assert canonical_image_url("https://cdn.shopify.com/cake_600x600@2x.JPG") == "https://cdn.shopify.com/cake.JPG"
+	assert canonical_image_url("https://igloo.com.vn/thumbs/540x540x2/upload/product/a.png") == "https://igloo.com.vn/upload/product/a.png"
+	assert canonical_image_url("https://shop.vn/cake.jpg#zoom") == "https://shop.vn/cake.jpg"
+
+def test_canonical_image_url_keeps_sizes_that_are_part_of_the_name():
+	assert canonical_image_url("https://shop.vn/wp/combo-2x1.jpg") == "https://shop.vn/wp/combo-2x1.jpg"
+	assert canonical_image_url("https://shop.vn/wp/cake-300x300-front.jpg") == "https://shop.vn/wp/cake-300x300-front.jpg"
+	assert canonical_image_url("https://shop.vn/300x300-cake/cake.jpg") == "https://shop.vn/300x300-cake/cake.jpg"
+	assert canonical_image_url("https://shop.vn/menu-300x300.pdf") == "https://shop.vn/menu-300x300.pdf"
+
+def test_store_deduplicates_content(tmp_path):
+	store = ImageStore(str(tmp_path))
+	key, duplicate = store.put("https://a.vn/cake.jpg", b"jpeg bytes", "image/jpeg", etag='"1"')
+	other_key, other_duplicate = store.put("https://b.vn/banh.jpg", b"jpeg bytes", "image/jpeg")
+
+	assert key == other_key and not duplicate and other_duplicate
+	assert key.endswith(".jpg") and (tmp_path / key).read_bytes() == b"jpeg bytes"
+	assert store.key_for("https://a.vn/cake-600x600.jpg") == key
+	store.close()
+
+	reopened = ImageStore(str(tmp_path))
+	assert reopened.lookup("https://a.vn/cake.jpg")["etag"] == '"1"'
+	assert load_image_keys(str(tmp_path)) == {"https://a.vn/cake.jpg": key, "https://b.vn/banh.jpg": key}
+	reopened.close()
@@ -23,7 +23,9 @@ def test_menu_parsing():
 			menu_selector = site_config['scraping']['menu_selector']
 			filter_keyword = site_config['scraping']['filter-keyword']
 
-			menu_urls = scrape_website(website_path, tag_name, menu_selector, filter_keyword)
+			parser = site_config['scraping'].get('parser', 'html5lib')
+
+			menu_urls = scrape_website(website_path, tag_name, menu_selector, filter_keyword, website_name=site_name, parser=parser)
    
 			results[site_name] = {
 				'success': True,
@@ -0,0 +1,45 @@
+import yaml
+
+from scripts.pipeline import TransformPipeline
+
+HEADER = "product_name,product_url,product_brand,original_category,product_unit_price\n"
+INPUTS = {
+	"cake_products.csv": HEADER + (
+		"Tiramisu,https://shop.vn/tiramisu,shop,cakes,55000\n"
+		"Tiramisu,https://shop.vn/tiramisu,shop,cakes,55000\n"
+		"Bánh Flan,https://shop.vn/flan,shop,Bánh ngọt,25000\n"
+	),
+	"drink_products.csv": HEADER + (
+		"Trà Đào,https://shop.vn/tra-dao,shop,tea,45000\n"
+		"Bingsu Xoài,https://shop.vn/bingsu-xoai,shop,Bingsu,65000\n"
+	),
+}
+
+def write_config(tmp_path, name: str) -> str:
+	config_path = tmp_path / f"{name}.yml"
+	config_path.write_text(yaml.safe_dump({
+		"input_directory": str(tmp_path / "raw"),
+		"output_directory": str(tmp_path / name),
+		"final_output_directory": str(tmp_path / f"{name}_processed"),
+		"file_pattern": "*.csv",
+		"transforms": ["remove_duplicates", "standardize_categories"],
+		"categories": {"cache": str(tmp_path / f"{name}_categories.json")},
+	}))
+	(tmp_path / name).mkdir()
+	return str(config_path)
+
+def test_parallel_run_matches_the_serial_run(tmp_path):
+	(tmp_path / "raw").mkdir()
+	for file_name, content in INPUTS.items():
+		(tmp_path / "raw" / file_name).write_text(content, encoding="utf-8")
+
+	serial = TransformPipeline(write_config(tmp_path, "serial")).run(workers=1)
+	parallel = TransformPipeline(write_config(tmp_path, "parallel")).run(workers=2)
+
+	assert [r["status"] for r in serial] == [r["status"] for r in parallel] == ["success", "success"]
+	assert len({r["worker"] for r in serial}) == 1
+	for file_name in INPUTS:
+		serial_output = (tmp_path / "serial" / file_name).read_bytes()
+		assert serial_output == (tmp_path / "parallel" / file_name).read_bytes()
+		assert "original_category" not in serial_output.decode().splitlines()[0]
+	assert len((tmp_path / "serial" / "cake_products.csv").read_text(encoding="utf-8").splitlines()) == 3
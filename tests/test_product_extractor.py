@@ -0,0 +1,334 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+from scripts.extract import crawl_archive, http_client
+from scripts.extract.product_sink import ProductSink
+from scripts.extract.products_scraping import ProductExtractor, _resolve_path
+from scripts.extract.scrape_manifest import ScrapeManifest
+
+SITE = "teashop"
+SITE_URL = "https://teashop.vn"
+CATEGORY_URL = f"{SITE_URL}/category/tea/"
+
+WEBSITES_CONFIG = {
+	SITE: {
+		"path": {"website_path": f"{SITE_URL}/"},
+		"scraping": {
+			"loading_type": "pagination",
+			"pagination": {"next_selector": ".next"},
+			"detail_fetch": {"workers": 4, "max_per_host": 4},
+			"product_tag": "a",
+			"product_selector": ".card",
+			"skip_url_patterns": "None",
+			"product_detail_selectors": {
+				"name": ".title",
+				"code": "None",
+				"description": "None",
+				"unit_price": ".price",
+				"image_selector": "None",
+				"detail_image": "None",
+				"original_category": "literal:Tea",
+				"category_tag": "None"
+			}
+		}
+	}
+}
+
+def listing_page(product_paths, next_path=None) -> bytes:
+	cards = "".join(f'<a class="card" href="{path}">{path}</a>' for path in product_paths)
+	next_link = f'<a class="next" href="{next_path}">next</a>' if next_path else ""
+	return f"<html><body>{cards}{next_link}</body></html>".encode()
+
+def detail_page(name: str) -> bytes:
+	return f'<html><body><h1 class="title">{name}</h1><span class="price">45.000đ</span></body></html>'.encode()
+
+class FakeSite:
+	"""
+	Stands in for http_client.fetch: url -> page bytes, an exception to raise, or a status code.
+	"""
+
+	def __init__(self, pages):
+		self.pages = pages
+		self.fetched = []
+
+	def fetch(self, website_name, url, **kwargs):
+		self.fetched.append(url)
+		page = self.pages.get(url, 404)
+		if isinstance(page, Exception):
+			raise page
+		if isinstance(page, int):
+			return SimpleNamespace(status_code=page, content=b"")
+		return SimpleNamespace(status_code=200, content=page)
+
+@pytest.fixture
+def fake_site(monkeypatch):
+	def install(pages):
+		site = FakeSite({f"{SITE_URL}{path}" if path.startswith("/") else path: page for path, page in pages.items()})
+		monkeypatch.setattr(http_client, "fetch", site.fetch)
+		return site
+	return install
+
+def make_extractor(tmp_path) -> ProductExtractor:
+	extractor = ProductExtractor(WEBSITES_CONFIG, SITE, CATEGORY_URL)
+	extractor.manifest = ScrapeManifest(SITE, directory=str(tmp_path))
+	return extractor
+
+def seed_manifest(tmp_path, paths):
+	manifest = ScrapeManifest(SITE, directory=str(tmp_path))
+	for path in paths:
+		manifest.record(f"{SITE_URL}{path}", "old", {"product_name": path}, CATEGORY_URL)
+	manifest.finish_category(CATEGORY_URL)
+
+def test_failed_listing_page_reports_nothing_vanished(tmp_path, fake_site):
+	seed_manifest(tmp_path, ["/p/a", "/p/b", "/p/c"])
+	fake_site({
+		CATEGORY_URL: listing_page(["/p/a"], next_path="/category/tea/page/2/"),
+		"/category/tea/page/2/": ConnectionError("reset by peer"),
+		"/p/a": detail_page("A"),
+	})
+
+	extractor = make_extractor(tmp_path)
+	assert [product.product_name for product in extractor.process_pages()] == ["A"]
+	assert extractor.listing_failed
+	assert extractor.delta_report["vanished"] == []
+	assert len(ScrapeManifest(SITE, directory=str(tmp_path))._entries) == 3
+
+def test_listing_page_error_status_reports_nothing_vanished(tmp_path, fake_site):
+	seed_manifest(tmp_path, ["/p/a", "/p/b", "/p/c"])
+	site = fake_site({
+		CATEGORY_URL: listing_page(["/p/a"], next_path="/category/tea/page/2/"),
+		"/category/tea/page/2/": 503,
+		"/p/a": detail_page("A"),
+	})
+
+	extractor = make_extractor(tmp_path)
+	assert [product.product_name for product in extractor.process_pages()] == ["A"]
+	assert extractor.listing_failed
+	assert extractor.delta_report["vanished"] == []
+	assert len(ScrapeManifest(SITE, directory=str(tmp_path))._entries) == 3
+	assert f"{SITE_URL}/category/tea/page/2/" in site.fetched
+
+def test_failed_detail_page_is_not_vanished(tmp_path, fake_site):
+	seed_manifest(tmp_path, ["/p/a", "/p/b", "/p/c"])
+	fake_site({
+		CATEGORY_URL: listing_page(["/p/a", "/p/c"]),
+		"/p/a": detail_page("A"),
+		"/p/c": 503,
+	})
+
+	extractor = make_extractor(tmp_path)
+	extractor.process_pages()
+	assert not extractor.listing_failed
+	assert extractor.delta_report["vanished"] == [f"{SITE_URL}/p/b"]
+	assert sorted(ScrapeManifest(SITE, directory=str(tmp_path))._entries) == [f"{SITE_URL}/p/a", f"{SITE_URL}/p/c"]
+
+def test_empty_listing_reports_nothing_vanished(tmp_path, fake_site):
+	seed_manifest(tmp_path, ["/p/a"])
+	fake_site({CATEGORY_URL: listing_page([])})
+
+	extractor = make_extractor(tmp_path)
+	assert extractor.process_pages() == []
+	assert extractor.delta_report["vanished"] == []
+
+def test_sink_mode_streams_products_without_keeping_them(tmp_path, fake_site):
+	fake_site({
+		CATEGORY_URL: listing_page(["/p/a", "/p/b"]),
+		"/p/a": detail_page("A"),
+		"/p/b": detail_page("B"),
+	})
+
+	with ProductSink("tea", directory=str(tmp_path)) as sink:
+		extractor = ProductExtractor(WEBSITES_CONFIG, SITE, CATEGORY_URL, sink=sink)
+		assert extractor.process_pages() == []
+		assert extractor.products_count == 2 and sink.written == 2
+		assert sink.is_category_done(CATEGORY_URL)
+
+SHOPIFY_PRODUCTS = {
+	"products": [
+		{
+			"title": " Trà Sen Vàng ",
+			"handle": "tra-sen-vang",
+			"product_type": "Trà",
+			"body_html": "<p>Trà <b>sen</b> vàng</p>",
+			"variants": [{"sku": "TSV-M", "price": "45000.00"}, {"sku": "TSV-L", "price": "55000.00"}],
+			"images": [{"src": "//cdn.shop.vn/tsv.jpg"}, {"src": ""}, {"alt": "no src"}, {"src": "https://cdn.shop.vn/tsv-2.jpg"}]
+		},
+		{
+			"title": "Bánh Mì Que",
+			"handle": "banh-mi-que",
+			"variants": [],
+			"images": []
+		}
+	]
+}
+
+API_CONFIG = {
+	"endpoint": "{category_url}/products.json",
+	"page_param": "page",
+	"page_size": 2,
+	"items_path": "products",
+	"fields": {
+		"product_name": "title",
+		"product_url": "template:/products/{handle}",
+		"product_code": "variants.0.sku",
+		"product_unit_price": "variants.0.price",
+		"product_description": "body_html",
+		"product_image": "images.*.src",
+		"category_name": "product_type",
+		"product_total_ratings": "None"
+	}
+}
+
+@pytest.fixture
+def api_extractor():
+	websites_config = {SITE: {**WEBSITES_CONFIG[SITE], "scraping": {**WEBSITES_CONFIG[SITE]["scraping"], "loading_type": "api", "api": API_CONFIG}}}
+	return ProductExtractor(websites_config, SITE, f"{SITE_URL}/collections/tea")
+
+def test_resolve_path_reads_nested_keys_and_list_indices():
+	item = SHOPIFY_PRODUCTS["products"][0]
+	assert _resolve_path(item, "variants.1.sku") == "TSV-L"
+	assert _resolve_path(SHOPIFY_PRODUCTS, "products.1.handle") == "banh-mi-que"
+	assert _resolve_path(item, "") is item
+
+def test_resolve_path_maps_star_over_lists():
+	# empty and missing values are left out
+	assert _resolve_path(SHOPIFY_PRODUCTS["products"][0], "images.*.src") == ["//cdn.shop.vn/tsv.jpg", "https://cdn.shop.vn/tsv-2.jpg"]
+	assert _resolve_path(SHOPIFY_PRODUCTS, "products.*.variants.0.sku") == ["TSV-M"]
+	assert _resolve_path({"images": "not a list"}, "images.*.src") == []
+
+def test_resolve_path_missing_keys_and_indices_are_none():
+	item = SHOPIFY_PRODUCTS["products"][1]
+	assert _resolve_path(item, "vendor") is None
+	assert _resolve_path(item, "variants.0.price") is None
+	assert _resolve_path(item, "variants.first") is None
+	assert _resolve_path(item, "title.length") is None
+
+def test_product_from_api_item(api_extractor):
+	product = api_extractor._product_from_api_item(SHOPIFY_PRODUCTS["products"][0], "tea")
+
+	assert product.product_name == "Trà Sen Vàng"
+	assert product.product_url == f"{SITE_URL}/products/tra-sen-vang"
+	assert product.product_code == "TSV-M" and product.product_unit_price == 45000
+	assert product.product_description == "Trà sen vàng"
+	assert product.product_image == ["https://cdn.shop.vn/tsv.jpg", "https://cdn.shop.vn/tsv-2.jpg"]
+	assert product.product_image_name == ["Trà Sen Vàng", "Trà Sen Vàng"]
+	assert product.category_name == ["Trà"]
+
+def test_product_from_api_item_with_missing_fields(api_extractor):
+	product = api_extractor._product_from_api_item(SHOPIFY_PRODUCTS["products"][1], "tea")
+
+	assert product.product_code == "" and product.product_unit_price == 0
+	assert product.product_image == [] and product.product_image_name == []
+	assert product.category_name == ["tea"] # the category handle when the item has no type
+
+def test_product_from_api_item_without_url_is_skipped(api_extractor):
+	api_extractor.scraping_config["api"] = {**API_CONFIG, "fields": {**API_CONFIG["fields"], "product_url": "url"}}
+	assert api_extractor._product_from_api_item(SHOPIFY_PRODUCTS["products"][0], "tea") is None
+
+def test_crawl_api_pages_until_a_short_page(api_extractor, monkeypatch):
+	pages = {1: SHOPIFY_PRODUCTS, 2: {"products": [{**SHOPIFY_PRODUCTS["products"][0], "handle": "tra-dao"}]}}
+	requested = []
+
+	def fetch(website_name, url, params=None, **kwargs):
+		requested.append((url, params["page"]))
+		return SimpleNamespace(status_code=200, json=lambda: pages[params["page"]])
+
+	monkeypatch.setattr(http_client, "fetch", fetch)
+	products = api_extractor._crawl_api(f"{SITE_URL}/collections/tea/")
+
+	assert requested == [(f"{SITE_URL}/collections/tea/products.json", 1), (f"{SITE_URL}/collections/tea/products.json", 2)]
+	assert [product.product_url.rsplit("/", 1)[-1] for product in products] == ["tra-sen-vang", "banh-mi-que", "tra-dao"]
+	assert not api_extractor.listing_failed
+
+class SlowSite(FakeSite):
+	# detail pages answer in reverse order of the listing, so completion order differs from listing order
+	def fetch(self, website_name, url, **kwargs):
+		if "/p/" in url:
+			time.sleep(0.05 / (int(url.rsplit("/", 1)[-1]) + 1))
+		return super().fetch(website_name, url, **kwargs)
+
+def test_pagination_keeps_listing_order_and_dedups_across_pages(tmp_path, monkeypatch):
+	site = SlowSite({
+		CATEGORY_URL: listing_page(["/p/0", "/p/1", "/p/2"], next_path="/category/tea/page/2/"),
+		f"{SITE_URL}/category/tea/page/2/": listing_page(["/p/2", "/p/3", "/p/0"], next_path="/category/tea/page/3/"),
+		f"{SITE_URL}/category/tea/page/3/": listing_page([], next_path="/category/tea/page/4/"),
+		**{f"{SITE_URL}/p/{i}": detail_page(f"P{i}") for i in range(4)}
+	})
+	monkeypatch.setattr(http_client, "fetch", site.fetch)
+
+	extractor = ProductExtractor(WEBSITES_CONFIG, SITE, CATEGORY_URL)
+	products = extractor.process_pages()
+
+	assert [product.product_name for product in products] == ["P0", "P1", "P2", "P3"]
+	# each detail page once, and the walk stops at the empty page 3 despite its next link
+	assert sorted(url for url in site.fetched if "/p/" in url) == [f"{SITE_URL}/p/{i}" for i in range(4)]
+	assert f"{SITE_URL}/category/tea/page/4/" not in site.fetched
+	assert not extractor.listing_failed
+
+def test_pagination_producer_failure_keeps_earlier_pages(fake_site):
+	fake_site({
+		CATEGORY_URL: listing_page(["/p/a", "/p/b"], next_path="/category/tea/page/2/"),
+		"/category/tea/page/2/": TimeoutError("listing timed out"),
+		"/p/a": detail_page("A"),
+		"/p/b": detail_page("B"),
+	})
+
+	extractor = ProductExtractor(WEBSITES_CONFIG, SITE, CATEGORY_URL)
+	assert [product.product_name for product in extractor.process_pages()] == ["A", "B"]
+	assert extractor.listing_failed
+
+class RecordingSession:
+	"""
+	Stands in for a site's requests session: serves `pages` (url -> bytes) or 404, or fails every get() when None.
+	"""
+
+	def __init__(self, pages=None):
+		self.pages = pages
+
+	def get(self, url, **kwargs):
+		if self.pages is None:
+			raise AssertionError(f"network access during replay: {url}")
+		response = requests.Response()
+		response.status_code = 200 if url in self.pages else 404
+		response.url = url
+		response.headers["Content-Type"] = "text/html; charset=utf-8"
+		response._content = self.pages.get(url, b"")
+		response._content_consumed = True
+		return response
+
+@pytest.fixture
+def archive_env(monkeypatch):
+	# each test activates its own archive, none leaks into the process environment or later tests
+	monkeypatch.setenv(crawl_archive.ARCHIVE_ENV, "")
+	monkeypatch.setattr(crawl_archive, "_archive", None)
+	monkeypatch.setattr(crawl_archive, "_archive_pid", None)
+	monkeypatch.setattr(http_client, "get_response_cache", lambda: None)
+	monkeypatch.setattr(http_client, "_bucket_for", lambda url, http_config: None)
+	yield
+	if crawl_archive._archive is not None:
+		crawl_archive._archive.close()
+
+def test_replayed_archive_extracts_the_recorded_products(tmp_path, monkeypatch, archive_env):
+	pages = {
+		CATEGORY_URL: listing_page(["/p/a", "/p/b"], next_path="/category/tea/page/2/"),
+		f"{SITE_URL}/category/tea/page/2/": listing_page(["/p/c"]),
+		**{f"{SITE_URL}/p/{slug}": detail_page(slug.upper()) for slug in "abc"}
+	}
+	path = str(tmp_path / "run.sqlite3")
+
+	monkeypatch.setattr(http_client, "get_session", lambda website_name: RecordingSession(pages))
+	crawl_archive.activate(crawl_archive.RECORD, path)
+	recorded = ProductExtractor(WEBSITES_CONFIG, SITE, CATEGORY_URL).process_pages()
+	assert crawl_archive.get_archive().stats()["responses"] == len(pages)
+
+	monkeypatch.setattr(http_client, "get_session", lambda website_name: RecordingSession())
+	crawl_archive.activate(crawl_archive.REPLAY, path)
+	extractor = ProductExtractor(WEBSITES_CONFIG, SITE, CATEGORY_URL)
+	replayed = extractor.process_pages()
+
+	assert [product.product_name for product in recorded] == ["A", "B", "C"]
+	assert replayed == recorded
+	assert not extractor.listing_failed
@@ -0,0 +1,56 @@
+import csv
+
+from scripts.extract.product_sink import ProductSink
+from scripts.extract.products_scraping import ProductInfo
+
+CAKE_URL = "https://shop.vn/collections/cake"
+DRINK_URL = "https://shop.vn/collections/drink"
+
+def product(slug: str) -> ProductInfo:
+	return ProductInfo(
+		product_name=slug.title(), product_url=f"https://shop.vn/products/{slug}", product_band="shop",
+		product_image=["a.jpg", "b.jpg"]
+	)
+
+def read_rows(sink: ProductSink):
+	with open(sink.path, newline="", encoding="utf-8") as f:
+		return list(csv.DictReader(f))
+
+def test_write_skips_products_already_written_for_the_category(tmp_path):
+	with ProductSink("cake", directory=str(tmp_path)) as sink:
+		sink.write(product("flan"), CAKE_URL)
+		sink.write(product("flan"), CAKE_URL)
+		sink.write(product("flan"), DRINK_URL)
+
+	rows = read_rows(sink)
+	assert sink.written == 2
+	assert [row["product_name"] for row in rows] == ["Flan", "Flan"]
+	assert rows[0]["product_image"] == "a.jpg|b.jpg"
+
+def test_resume_continues_an_interrupted_run(tmp_path):
+	sink = ProductSink("cake", directory=str(tmp_path))
+	sink.write(product("flan"), CAKE_URL)
+	sink.complete_category(CAKE_URL)
+	sink.write(product("latte"), DRINK_URL)
+	sink.close() # interrupted before the drink category finished
+
+	with ProductSink("cake", directory=str(tmp_path), resume=True) as resumed:
+		assert resumed.is_category_done(CAKE_URL)
+		assert not resumed.is_category_done(DRINK_URL)
+		assert resumed.has_product(DRINK_URL, "https://shop.vn/products/latte")
+		resumed.write(product("latte"), DRINK_URL)
+		resumed.write(product("mocha"), DRINK_URL)
+
+	assert [row["product_name"] for row in read_rows(resumed)] == ["Flan", "Latte", "Mocha"]
+
+def test_fresh_run_starts_the_output_over(tmp_path):
+	with ProductSink("cake", directory=str(tmp_path)) as sink:
+		sink.write(product("flan"), CAKE_URL)
+		sink.complete_category(CAKE_URL)
+
+	with ProductSink("cake", directory=str(tmp_path)) as fresh:
+		assert not fresh.is_category_done(CAKE_URL)
+		assert not fresh.has_product(CAKE_URL, "https://shop.vn/products/flan")
+		fresh.write(product("tiramisu"), CAKE_URL)
+
+	assert [row["product_name"] for row in read_rows(fresh)] == ["Tiramisu"]
@@ -0,0 +1,99 @@
+import pytest
+import requests
+
+from scripts.extract import http_client, response_cache
+from scripts.extract.response_cache import ResponseCache
+
+URL = "https://shop.vn/products/flan"
+
+class FakeClock:
+	def __init__(self):
+		self.now = 1_700_000_000.0
+
+	def time(self) -> float:
+		return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+	clock = FakeClock()
+	monkeypatch.setattr(response_cache, "time", clock)
+	return clock
+
+@pytest.fixture
+def cache(tmp_path, clock, monkeypatch):
+	cache = ResponseCache(directory=str(tmp_path))
+	monkeypatch.setattr(http_client, "get_response_cache", lambda: cache)
+	monkeypatch.setattr(http_client, "_site_http_config", lambda website_name: {"cache": {"max_age": 3600}, "headers": {}})
+	yield cache
+	cache.close()
+
+class StubSend:
+	"""
+	Replaces http_client._send, answering with `status` and remembering the request headers.
+	"""
+
+	def __init__(self, status: int, body: bytes = b"", headers=None):
+		self.status = status
+		self.body = body
+		self.headers = headers or {}
+		self.requests = []
+
+	def __call__(self, website_name, session, url, http_config, headers=None, **kwargs):
+		self.requests.append(dict(headers or {}))
+		response = requests.Response()
+		response.status_code = self.status
+		response.headers.update(self.headers)
+		response._content = self.body
+		return response
+
+def test_fresh_entry_is_served_without_a_request(cache, monkeypatch):
+	cache.put(URL, b"<html>flan</html>", etag='"v1"')
+	send = StubSend(200, b"new")
+	monkeypatch.setattr(http_client, "_send", send)
+
+	response = http_client._fetch("shop", URL)
+	assert response.content == b"<html>flan</html>" and response.from_cache
+	assert send.requests == []
+
+def test_expired_entry_is_revalidated_and_reused_on_304(cache, clock, monkeypatch):
+	cache.put(URL, b"<html>flan</html>", etag='"v1"', last_modified="Tue, 20 May 2025 06:10:19 GMT")
+	clock.now += 3601
+	send = StubSend(304, headers={"ETag": '"v2"'})
+	monkeypatch.setattr(http_client, "_send", send)
+
+	response = http_client._fetch("shop", URL)
+	assert response.status_code == 200 and response.content == b"<html>flan</html>"
+	assert send.requests == [{"If-None-Match": '"v1"', "If-Modified-Since": "Tue, 20 May 2025 06:10:19 GMT"}]
+
+	# the 304 restarted the entry's max age and updated its validator
+	refreshed = cache.get(URL)
+	assert refreshed.age() == 0 and refreshed.etag == '"v2"'
+	assert refreshed.last_modified == "Tue, 20 May 2025 06:10:19 GMT"
+
+def test_expired_entry_is_replaced_on_200(cache, clock, monkeypatch):
+	cache.put(URL, b"old", etag='"v1"')
+	clock.now += 3601
+	monkeypatch.setattr(http_client, "_send", StubSend(200, b"new", {"ETag": '"v2"'}))
+
+	assert http_client._fetch("shop", URL).content == b"new"
+	assert cache.get(URL).body == b"new" and cache.get(URL).etag == '"v2"'
+
+def test_ttl_is_measured_from_the_last_fetch(cache, clock):
+	cache.put(URL, b"flan")
+	clock.now += 120
+	assert cache.get(URL).age() == 120
+
+def test_least_recently_used_entries_are_evicted_first(tmp_path, clock):
+	cache = ResponseCache(directory=str(tmp_path), max_size_bytes=10)
+	cache.put("https://shop.vn/a", b"aaaa")
+	clock.now += 1
+	cache.put("https://shop.vn/b", b"bbbb")
+	clock.now += 1
+	cache.get("https://shop.vn/a") # a is now more recently used than b
+	clock.now += 1
+	cache.put("https://shop.vn/c", b"cccc")
+
+	assert cache.get("https://shop.vn/b") is None
+	assert cache.get("https://shop.vn/a").body == b"aaaa" and cache.get("https://shop.vn/c").body == b"cccc"
+	assert cache.total_size() == 8
+	cache.close()
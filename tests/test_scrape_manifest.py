@@ -0,0 +1,46 @@
+import json
+import multiprocessing
+
+from scripts.extract.scrape_manifest import ScrapeManifest
+
+SITE_URL = "https://shop.vn"
+
+def _crawl_category(directory, category, barrier):
+	# every worker loads the manifest before any of them saves, like parallel scheduler tasks
+	manifest = ScrapeManifest("shop", directory=directory)
+	barrier.wait()
+	category_url = f"{SITE_URL}/{category}"
+	for i in range(3):
+		manifest.record(f"{category_url}/p{i}", f"hash-{i}", {"product_name": f"{category} {i}"}, category_url)
+	manifest.finish_category(category_url)
+
+def test_parallel_workers_keep_each_others_entries(tmp_path):
+	context = multiprocessing.get_context("fork")
+	categories = ["cake", "drink", "bread", "topping"]
+	barrier = context.Barrier(len(categories))
+	workers = [context.Process(target=_crawl_category, args=(str(tmp_path), category, barrier)) for category in categories]
+	for worker in workers:
+		worker.start()
+	for worker in workers:
+		worker.join(timeout=30)
+		assert worker.exitcode == 0
+
+	with open(tmp_path / "shop.json", encoding="utf-8") as f:
+		entries = json.load(f)
+	assert sorted(entries) == sorted(f"{SITE_URL}/{category}/p{i}" for category in categories for i in range(3))
+
+def test_finish_category_removes_only_own_vanished_pages(tmp_path):
+	first = ScrapeManifest("shop", directory=str(tmp_path))
+	first.record(f"{SITE_URL}/cake/a", "h", {"product_name": "A"}, f"{SITE_URL}/cake")
+	first.record(f"{SITE_URL}/cake/b", "h", {"product_name": "B"}, f"{SITE_URL}/cake")
+	first.finish_category(f"{SITE_URL}/cake")
+
+	stale = ScrapeManifest("shop", directory=str(tmp_path))
+	other = ScrapeManifest("shop", directory=str(tmp_path))
+	other.record(f"{SITE_URL}/drink/c", "h", {"product_name": "C"}, f"{SITE_URL}/drink")
+	other.finish_category(f"{SITE_URL}/drink")
+
+	stale.lookup(f"{SITE_URL}/cake/a", "h")
+	report = stale.finish_category(f"{SITE_URL}/cake")
+	assert report["vanished"] == [f"{SITE_URL}/cake/b"]
+	assert sorted(ScrapeManifest("shop", directory=str(tmp_path))._entries) == [f"{SITE_URL}/cake/a", f"{SITE_URL}/drink/c"]
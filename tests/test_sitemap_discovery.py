@@ -0,0 +1,119 @@
+import datetime
+import gzip
+from types import SimpleNamespace
+
+from scripts.extract import http_client
+from scripts.extract.scrape_manifest import ScrapeManifest
+from scripts.extract.sitemap_discovery import crawl_sitemap, discover_product_urls, parse_lastmod, parse_sitemap, sitemap_config
+
+INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+	<sitemap><loc>https://shop.vn/product-sitemap.xml</loc><lastmod>2025-05-20T06:10:19+00:00</lastmod></sitemap>
+	<sitemap><loc>https://shop.vn/page-sitemap.xml</loc></sitemap>
+</sitemapindex>"""
+
+URLSET = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9" xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+	<url><loc>https://shop.vn/products/banh-flan</loc><lastmod>2025-05-01</lastmod>
+		<image:image><image:loc>https://shop.vn/flan.jpg</image:loc></image:image></url>
+	<url><loc> https://shop.vn/products/tiramisu </loc></url>
+</urlset>"""
+
+def test_parse_sitemap_index():
+	children, entries = parse_sitemap(INDEX)
+	assert children == ["https://shop.vn/product-sitemap.xml", "https://shop.vn/page-sitemap.xml"]
+	assert entries == []
+
+def test_parse_urlset():
+	children, entries = parse_sitemap(gzip.compress(URLSET))
+	assert children == []
+	assert [entry.url for entry in entries] == ["https://shop.vn/products/banh-flan", "https://shop.vn/products/tiramisu"]
+	assert entries[0].lastmod == datetime.datetime(2025, 5, 1, 23, 59, 59) and entries[1].lastmod is None
+
+def test_parse_lastmod():
+	assert parse_lastmod("2025-05-20T06:10:19Z").tzinfo is None
+	assert parse_lastmod("2025-05-20T06:10:19") == datetime.datetime(2025, 5, 20, 6, 10, 19)
+	assert parse_lastmod(" 2025-05-20 ") == datetime.datetime(2025, 5, 20, 23, 59, 59)
+	assert parse_lastmod("not a date") is None and parse_lastmod("") is None
+
+def test_manifest_reuses_unmodified_pages(tmp_path):
+	manifest = ScrapeManifest("shop", directory=str(tmp_path))
+	manifest.record("https://shop.vn/products/a", "hash", {"product_name": "A"}, "https://shop.vn/sitemap.xml")
+
+	yesterday = datetime.datetime.now() - datetime.timedelta(days=1)
+	tomorrow = datetime.datetime.now() + datetime.timedelta(days=1)
+	assert manifest.lookup_unmodified("https://shop.vn/products/a", yesterday, "https://shop.vn/sitemap.xml") == {"product_name": "A"}
+	assert manifest.lookup_unmodified("https://shop.vn/products/a", tomorrow, "https://shop.vn/sitemap.xml") is None
+	assert manifest.lookup_unmodified("https://shop.vn/products/a", None, "https://shop.vn/sitemap.xml") is None
+	assert manifest.lookup_unmodified("https://shop.vn/products/b", yesterday, "https://shop.vn/sitemap.xml") is None
+
+def test_reused_pages_keep_their_scrape_time(tmp_path):
+	manifest = ScrapeManifest("shop", directory=str(tmp_path))
+	manifest.record("https://shop.vn/products/a", "hash", {"product_name": "A"}, "https://shop.vn/sitemap.xml")
+	entry = manifest._entries["https://shop.vn/products/a"]
+	entry["scraped_at"] = entry["last_seen"] = "2025-05-20 10:00:00"
+
+	# edited later on the day of the scrape, the date-only lastmod is the end of that day
+	assert manifest.lookup_unmodified("https://shop.vn/products/a", parse_lastmod("2025-05-20"), "https://shop.vn/sitemap.xml") is None
+	# a skipped page is seen now but stays scraped at 10:00, a lastmod published late still triggers a fetch
+	assert manifest.lookup_unmodified("https://shop.vn/products/a", parse_lastmod("2025-05-19"), "https://shop.vn/sitemap.xml") == {"product_name": "A"}
+	assert entry["scraped_at"] == "2025-05-20 10:00:00" and entry["last_seen"] != "2025-05-20 10:00:00"
+	assert manifest.lookup_unmodified("https://shop.vn/products/a", datetime.datetime(2025, 5, 20, 12), "https://shop.vn/sitemap.xml") is None
+
+	del entry["scraped_at"]
+	assert manifest.lookup_unmodified("https://shop.vn/products/a", parse_lastmod("2025-05-19"), "https://shop.vn/sitemap.xml") is None
+
+PRODUCT_SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+	<url><loc>https://shop.vn/shop/</loc></url>
+	<url><loc>https://shop.vn/products/banh-flan</loc></url>
+	<url><loc>https://shop.vn/products/tiramisu</loc></url>
+	<url><loc>https://shop.vn/products/banh-flan</loc></url>
+</urlset>"""
+
+SITE_CONFIG = {
+	"path": {"website_path": "https://shop.vn/"},
+	"sitemap": {"url": "https://shop.vn/sitemap_index.xml", "index_filter": "product-sitemap", "product_pattern": "/products/"},
+	"scraping": {
+		"product_tag": "a",
+		"product_selector": ".card",
+		"skip_url_patterns": "None",
+		"product_detail_selectors": {
+			"name": ".missing-title", "code": "None", "description": "None", "unit_price": "None",
+			"image_selector": "None", "detail_image": "None", "original_category": "None", "category_tag": "None"
+		}
+	}
+}
+
+def fake_fetch(pages):
+	def fetch(website_name, url, **kwargs):
+		return SimpleNamespace(status_code=200, content=pages[url]) if url in pages else SimpleNamespace(status_code=404, content=b"")
+	return fetch
+
+def test_sitemap_needs_a_product_pattern():
+	assert sitemap_config(SITE_CONFIG) is SITE_CONFIG["sitemap"]
+	for pattern in (None, "None", ""):
+		assert sitemap_config({"sitemap": {**SITE_CONFIG["sitemap"], "product_pattern": pattern}}) is None
+	assert discover_product_urls("shop", {"sitemap": {"url": "https://shop.vn/sitemap_index.xml"}}) == []
+
+def test_discover_keeps_only_product_urls(monkeypatch):
+	monkeypatch.setattr(http_client, "fetch", fake_fetch({
+		"https://shop.vn/sitemap_index.xml": INDEX,
+		"https://shop.vn/product-sitemap.xml": PRODUCT_SITEMAP,
+	}))
+
+	entries = discover_product_urls("shop", SITE_CONFIG)
+	assert [entry.url for entry in entries] == ["https://shop.vn/products/banh-flan", "https://shop.vn/products/tiramisu"]
+
+def test_sitemap_products_get_no_category_from_the_sitemap_url(monkeypatch):
+	detail = b'<html><head><meta property="og:title" content="Tiramisu"></head><body></body></html>'
+	monkeypatch.setattr(http_client, "fetch", fake_fetch({
+		"https://shop.vn/sitemap_index.xml": INDEX,
+		"https://shop.vn/product-sitemap.xml": PRODUCT_SITEMAP,
+		"https://shop.vn/products/banh-flan": detail,
+		"https://shop.vn/products/tiramisu": detail,
+	}))
+
+	products = crawl_sitemap({"shop": SITE_CONFIG}, "shop")
+	assert [product.product_url for product in products] == ["https://shop.vn/products/banh-flan", "https://shop.vn/products/tiramisu"]
+	assert all(product.product_name == "Tiramisu" and not product.category_name for product in products)
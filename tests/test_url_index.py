@@ -0,0 +1,36 @@
+from scripts.extract.url_index import UrlIndex, normalize_url
+
+def test_normalize_url():
+	assert normalize_url("https://Shop.vn/collections/cake/") == "https://shop.vn/collections/cake/"
+	assert normalize_url("/collections/cake#top", "https://shop.vn/") == "https://shop.vn/collections/cake"
+	assert normalize_url("https://shop.vn/products?page=2&cat=5&utm_source=fb") == "https://shop.vn/products?cat=5&page=2"
+	assert normalize_url("https://shop.vn/") == "https://shop.vn/"
+
+def test_leaf_categories():
+	index = UrlIndex([
+		"https://shop.vn/collections/cake",
+		"https://shop.vn/collections/cake/mousse/",
+		"https://shop.vn/collections/cake/tiramisu",
+		"https://shop.vn/collections/drink",
+		"https://shop.vn/products",
+		"https://shop.vn/products?cat=1",
+		"https://shop.vn/products?cat=2",
+	])
+
+	assert len(index) == 7
+	assert "https://shop.vn/collections/cake/" in index
+	assert index.leaves() == [
+		"https://shop.vn/collections/cake/mousse/",
+		"https://shop.vn/collections/cake/tiramisu",
+		"https://shop.vn/collections/drink",
+		"https://shop.vn/products?cat=1",
+		"https://shop.vn/products?cat=2",
+	]
+
+def test_duplicates_collapse():
+	index = UrlIndex(["https://shop.vn/cake", "https://shop.vn/cake/", "https://shop.vn/cake#x"])
+	assert index.leaves() == ["https://shop.vn/cake"]
+
+	index = UrlIndex(["https://shop.vn/product-category/cake/", "https://shop.vn/product-category/cake"])
+	assert len(index) == 1
+	assert index.leaves() == ["https://shop.vn/product-category/cake/"]
@@ -1,7 +1,8 @@
+from functools import lru_cache
 import logging
 import os
 from pathlib import Path
-import json
+import yaml
 
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
@@ -24,10 +25,22 @@ def setup_logger(log_name: str):
 def load_webconfig(config_path: str):
 	base_dir = Path(__file__).parent 
 	with open(os.path.join(base_dir, config_path), 'r') as f: 
-		data = json.load(f) 
+		data = yaml.safe_load(f) 
 	return data 
 
-def setup_selenium(user_agent: str) -> ChromeDriverManager:
+# resources the light browser profile never downloads
+LIGHT_PROFILE_BLOCKED_URLS = [
+	"*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+	"*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+	"*.mp4", "*.webm", "*.mp3", "*.m4a", "*.ogg",
+]
+
+@lru_cache(maxsize=1)
+def chromedriver_path() -> str:
+	# resolve (and download if needed) the driver binary once per process
+	return ChromeDriverManager().install()
+
+def setup_selenium(user_agent: str, light: bool = False) -> ChromeDriverManager:
 	options = Options()
   
 	options.add_argument('--headless')
@@ -37,12 +50,24 @@ def setup_selenium(user_agent: str) -> ChromeDriverManager:
 	options.add_argument(f'--user-agent={user_agent}')
 	options.add_experimental_option("excludeSwitches", ["enable-automation"])
 	options.add_experimental_option('useAutomationExtension', False)
+
+	if light:
+		options.add_argument('--blink-settings=imagesEnabled=false')
+		options.add_argument('--autoplay-policy=user-gesture-required')
+		options.add_experimental_option("prefs", {
+			"profile.managed_default_content_settings.images": 2,
+			"profile.managed_default_content_settings.media_stream": 2,
+		})
 	
 	driver = webdriver.Chrome(
-		service=Service(ChromeDriverManager().install()),
+		service=Service(chromedriver_path()),
 		options=options
 	)
 
+	if light:
+		driver.execute_cdp_cmd("Network.enable", {})
+		driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": LIGHT_PROFILE_BLOCKED_URLS})
+
 	driver.execute_script("""
 		(function(open) {
 			XMLHttpRequest.prototype.open = function() {
@@ -0,0 +1,54 @@
+"""
+Canonical image urls and the url -> key index of the image store, shared by the image fetcher
+and the transform steps. Importing this module has no side effects (no config, no logging setup).
+"""
+import json
+import os
+from pathlib import Path
+import re
+from typing import Dict
+from urllib.parse import urlsplit, urlunsplit
+
+BASE_DIR = Path(__file__).parent.parent
+DEFAULT_STORE_DIRECTORY = "data/images"
+
+_IMAGE_EXTENSION = r"(?=\.(?:jpe?g|png|webp|gif|avif)$)"
+
+# resized variants served by the storefront CDNs, they all point at the same original,
+# sizes are only stripped right before the file extension
+CDN_SIZE_SUFFIXES = [
+	(re.compile(r"-\d{2,4}x\d{2,4}" + _IMAGE_EXTENSION, re.IGNORECASE), ""), # WooCommerce: cake-300x300.jpg
+	(re.compile(r"_(?:\d{2,4}x\d{0,4}|x\d{2,4})(?:@[23]x)?" + _IMAGE_EXTENSION, re.IGNORECASE), ""), # Haravan / Shopify: cake_600x600.jpg, cake_1024x.jpg
+	(re.compile(r"/thumbs/\d+x\d+x\d+/"), "/"), # igloo: /thumbs/540x540x2/upload/...
+]
+
+def canonical_image_url(url: str) -> str:
+	url = url.strip()
+	if url.startswith("//"):
+		url = "https:" + url
+
+	parts = urlsplit(url)
+	path = parts.path
+	for pattern, replacement in CDN_SIZE_SUFFIXES:
+		path = pattern.sub(replacement, path)
+
+	return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+def load_image_keys(directory: str = DEFAULT_STORE_DIRECTORY) -> Dict[str, str]:
+	"""
+	canonical image url -> store key, empty when no image was downloaded yet.
+	"""
+	directory = directory if os.path.isabs(directory) else os.path.join(BASE_DIR, directory)
+	index_path = os.path.join(directory, "index.jsonl")
+	if not os.path.isfile(index_path):
+		return {}
+
+	keys = {}
+	with open(index_path, encoding="utf-8") as f:
+		for line in f:
+			try:
+				entry = json.loads(line)
+			except json.JSONDecodeError:
+				continue
+			keys[entry["url"]] = entry["key"]
+	return keys